@@ -1,29 +1,93 @@
-from fastapi import FastAPI, HTTPException, UploadFile, File, Form, Depends
+import time
+_import_started = time.perf_counter()
+
+from fastapi import FastAPI, HTTPException, UploadFile, File, Form, Depends, Query, Request, Response, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from typing import List, Dict, Optional
+from fastapi.responses import FileResponse
+from fastapi.concurrency import run_in_threadpool
+from typing import List, Dict, Optional, Tuple
+from contextlib import asynccontextmanager
 import os
 import json
-import shutil
+import uuid
+import threading
 from pathlib import Path
 
 from ..models.artwork import Artwork, ArtworkClassification, Question, ModelStats
-from ..ml.active_learner import ActiveLearner
-from ..ml.feature_extractor import FeatureExtractor
+from ..ml.ann_index import IVFIndex
+from ..ml.compression import PCACompressor
+from ..ml.feature_space import FeatureSpace
+from ..ml.learner_registry import LearnerRegistry, LearnerSession, DEFAULT_CAMPAIGN
+from ..ml.lazy_extractor import LazyFeatureExtractor
 from ..utils.data_manager import DataManager
+from ..utils.jobs import BatchJobQueue
+from ..utils.metrics import registry as metrics
+from ..utils.startup_timer import StartupTimer
+from ..utils.thumbnails import ThumbnailCache, THUMBNAIL_FORMATS, THUMBNAIL_VERSION_LENGTH
+
+# Durées des étapes du démarrage, rapportées par /api/status
+startup_timer = StartupTimer()
+startup_timer.record("import", time.perf_counter() - _import_started)
 
 # Initialisation des chemins
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
 DATA_DIR = os.path.join(BASE_DIR, "data")
 IMAGES_DIR = os.path.join(DATA_DIR, "images")
-MODEL_STATE_PATH = os.path.join(DATA_DIR, "model_state.json")
+THUMBNAILS_DIR = os.path.join(DATA_DIR, "thumbnails")
+ANN_INDEX_DIR = os.path.join(DATA_DIR, "ann_index")
+
+# Nombre de classifications journalisées entre deux instantanés complets de l'état
+SNAPSHOT_INTERVAL = 100
+
+# Nombre maximal de campagnes dont le learner est gardé en mémoire
+MAX_LOADED_CAMPAIGNS = 8
+
+# Durée de réservation des œuvres proposées par lot (en secondes)
+RESERVATION_TTL_SECONDS = 300
+
+# Taille maximale d'une page de /api/artworks
+MAX_PAGE_SIZE = 1000
+
+# Nombre maximal d'œuvres similaires retournées par /api/artworks/{id}/similar
+MAX_SIMILAR = 100
+
+# Nombre de voisins par œuvre du graphe de propagation des classifications
+KNN_NEIGHBORS = 10
+
+# Nombre maximal d'images traitées dans une même passe d'extraction
+UPLOAD_BATCH_SIZE = 16
+
+# Précharger l'extracteur en arrière-plan après le démarrage (sinon à la première extraction)
+WARM_UP_FEATURE_EXTRACTOR = os.getenv("WARM_UP_FEATURE_EXTRACTOR", "0") == "1"
+
+# Backend d'inférence de l'extracteur (eager, torchscript, onnx, onnx-int8)
+FEATURE_EXTRACTOR_BACKEND = os.getenv("FEATURE_EXTRACTOR_BACKEND", "eager")
+
+# Compression PCA des caractéristiques utilisées par les learners (0: désactivée)
+# et type de stockage des caractéristiques compressées (float16 divise encore la
+# mémoire par deux, mais la conversion à chaque requête ralentit les calculs)
+FEATURE_COMPRESSION_COMPONENTS = int(os.getenv("FEATURE_COMPRESSION_COMPONENTS", "0"))
+FEATURE_COMPRESSION_DTYPE = os.getenv("FEATURE_COMPRESSION_DTYPE", "float32")
 
 # Créer les répertoires s'ils n'existent pas
 os.makedirs(DATA_DIR, exist_ok=True)
 os.makedirs(IMAGES_DIR, exist_ok=True)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Cycle de vie de l'API : à l'arrêt, écrit un instantané de chaque session chargée
+    pour que les classifications journalisées n'aient pas à être rejouées
+    """
+    yield
+    try:
+        await run_in_threadpool(learners.save_all)
+    except Exception as e:
+        print(f"Erreur lors de l'enregistrement des sessions à l'arrêt: {e}")
+
 # Initialisation de l'API
-app = FastAPI(title="Museum Active Learning API")
+app = FastAPI(title="Museum Active Learning API", lifespan=lifespan)
 
 # Configuration CORS pour permettre au frontend d'accéder à l'API
 app.add_middleware(
@@ -32,23 +96,162 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # En-têtes lisibles par le frontend (pagination par curseur, revalidation)
+    expose_headers=["ETag", "X-Total-Count", "X-Next-After-Id", "X-Content-Version"],
 )
 
+# Métriques HTTP : requêtes en cours, nombre et durée par route (le modèle de chemin,
+# et non le chemin lui-même, pour borner le nombre de séries)
+requests_in_flight = metrics.gauge("http_requests_in_flight", "Requêtes HTTP en cours de traitement")
+requests_total = metrics.counter("http_requests_total", "Nombre de requêtes HTTP traitées")
+request_duration = metrics.histogram("http_request_duration_seconds", "Durée de traitement des requêtes HTTP")
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """
+    Mesure la durée et compte les requêtes, par méthode, route et statut
+    """
+    requests_in_flight.inc()
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        requests_in_flight.dec()
+        route = request.scope.get("route")
+        labels = {"method": request.method, "route": getattr(route, "path", "unmatched"), "status": status}
+        request_duration.observe(time.perf_counter() - started, **labels)
+        requests_total.inc(**labels)
+
 # Variables globales pour stocker les instances
-data_manager = DataManager(DATA_DIR)
-feature_extractor = FeatureExtractor()
-active_learner = None
+with startup_timer.phase("data_load"):
+    data_manager = DataManager(DATA_DIR)
+# torch, timm et les poids du modèle ne sont chargés qu'à la première extraction
+feature_extractor = LazyFeatureExtractor(backend=FEATURE_EXTRACTOR_BACKEND)
+# Un learner par campagne de classification, sur un espace de caractéristiques partagé
+compression = None
+if FEATURE_COMPRESSION_COMPONENTS > 0:
+    compression = PCACompressor(FEATURE_COMPRESSION_COMPONENTS, dtype=FEATURE_COMPRESSION_DTYPE)
+learners = LearnerRegistry(
+    DATA_DIR,
+    max_loaded=MAX_LOADED_CAMPAIGNS,
+    snapshot_interval=SNAPSHOT_INTERVAL,
+    reservation_ttl=RESERVATION_TTL_SECONDS,
+    learner_kwargs={"knn_k": KNN_NEIGHBORS},
+    compression=compression
+)
 
-# Initialisation du learner si les données sont disponibles
+# Initialisation du learner de la campagne par défaut si les données sont disponibles
 if data_manager.get_features() is not None and data_manager.artwork_data is not None:
-    active_learner = ActiveLearner(data_manager.get_features(), data_manager.artwork_data)
-    # Charger l'état du modèle s'il existe
-    if os.path.exists(MODEL_STATE_PATH):
-        active_learner.load_state(MODEL_STATE_PATH)
+    with startup_timer.phase("state_load"):
+        learners.space = FeatureSpace(data_manager.get_features(), data_manager.artwork_data,
+                                      compression=compression)
+        if compression is not None:
+            print(f"Caractéristiques compressées: {compression.describe()}")
+        # Charger l'état du modèle (instantané puis journal des classifications)
+        with learners.session(DEFAULT_CAMPAIGN):
+            pass
+
+# Index des plus proches voisins, rechargé depuis le disque ou reconstruit
+ann_index: Optional[IVFIndex] = None
+if learners.space is not None:
+    with startup_timer.phase("ann_index"):
+        ann_index = IVFIndex.load(ANN_INDEX_DIR, data_manager.get_features())
+        if ann_index is None:
+            ann_index = IVFIndex()
+            ann_index.build(data_manager.get_features())
+            ann_index.save(ANN_INDEX_DIR)
+
+def _extend_knn_graph() -> None:
+    """
+    Construit ou étend le graphe kNN partagé avec l'index des voisins (caractéristiques
+    en pleine précision), hors du chemin des requêtes
+    """
+    try:
+        learners.space.extend_knn_graph(KNN_NEIGHBORS, features=data_manager.get_features(), index=ann_index)
+    except Exception as e:
+        print(f"Erreur lors de la construction du graphe kNN: {e}")
+
+# Graphe kNN construit en arrière-plan (/api/model/predictions répond 503 en attendant)
+if ann_index is not None:
+    threading.Thread(target=_extend_knn_graph, name="knn-graph", daemon=True).start()
+
+startup_timer.print_report()
+if WARM_UP_FEATURE_EXTRACTOR:
+    feature_extractor.warm_up()
+
+# Miniatures générées à la demande et mises en cache sur disque
+thumbnails = ThumbnailCache(IMAGES_DIR, THUMBNAILS_DIR)
+
+def _thumbnail_version(imagepath: Optional[str]) -> Optional[str]:
+    """
+    Retourne la version de l'image d'une œuvre (paramètre v des URL de ses miniatures)
+    """
+    if not isinstance(imagepath, str):
+        return None
+    return thumbnails.version(os.path.basename(imagepath))
+
+def _with_thumbnail_version(artwork: Dict) -> Dict:
+    """
+    Retourne une copie de l'œuvre avec la version de son image
+    """
+    return {**artwork, "thumbnail_version": _thumbnail_version(artwork.get("imagepath"))}
+
+# Les œuvres retournées par le gestionnaire de données portent la version de leur image
+data_manager.thumbnail_version = _thumbnail_version
+
+# Déclarée avant le montage de /images, qui intercepterait sinon ces chemins
+@app.get("/images/{size}/{filename}")
+def get_thumbnail(size: int, filename: str, request: Request, format: Optional[str] = None,
+                  v: Optional[str] = None):
+    """
+    Sert une miniature d'une image à une largeur fixe (200, 400 ou 800 pixels), en WebP
+    si le navigateur l'accepte (sinon en JPEG, ou selon le paramètre format)
+    
+    Le nom de fichier ne change pas lorsqu'une image est remplacée : la miniature est
+    revalidée à chaque utilisation grâce à l'ETag (empreinte du contenu de l'original),
+    sauf si l'URL contient cette empreinte (paramètre v, en-tête X-Content-Version),
+    auquel cas elle peut être gardée en cache indéfiniment.
+    """
+    if format is None:
+        format = "webp" if "image/webp" in request.headers.get("accept", "") else "jpeg"
+    if format not in THUMBNAIL_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported format: {format}")
+    if size not in thumbnails.widths:
+        raise HTTPException(status_code=404, detail=f"Unsupported size: {size}")
+    
+    try:
+        path, digest = thumbnails.get(filename, size, format)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Image not found")
+    
+    version = digest[:THUMBNAIL_VERSION_LENGTH]
+    headers = {
+        "Cache-Control": "public, max-age=31536000, immutable" if v == version else "no-cache",
+        "ETag": f'"{digest[:32]}-{size}-{format}"',
+        "Vary": "Accept",
+        "X-Content-Version": version
+    }
+    if request.headers.get("if-none-match") == headers["ETag"]:
+        return Response(status_code=304, headers=headers)
+    return FileResponse(path, media_type=THUMBNAIL_FORMATS[format][1], headers=headers)
 
 # Servir les images statiques
 app.mount("/images", StaticFiles(directory=IMAGES_DIR), name="images")
 
+def _get_session(campaign: str) -> LearnerSession:
+    """
+    Retourne la session de classification d'une campagne
+    """
+    if learners.space is None:
+        raise HTTPException(status_code=400, detail="Active learner not initialized")
+    try:
+        return learners.session(campaign)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 # Routes API
 
 @app.get("/api/status")
@@ -60,15 +263,54 @@ async def get_status():
         "status": "active",
         "artworks_count": len(data_manager.artwork_data) if data_manager.artwork_data is not None else 0,
         "features_available": data_manager.get_features() is not None,
-        "active_learner_initialized": active_learner is not None
+        "active_learner_initialized": learners.space is not None,
+        "campaigns": learners.sessions(),
+        "feature_extractor": feature_extractor.status(),
+        "feature_compression": compression.describe() if compression is not None else None,
+        "startup_seconds": startup_timer.report()
     }
 
+@app.get("/metrics")
+async def get_metrics():
+    """
+    Expose les métriques de l'application au format texte de Prometheus
+    """
+    return Response(content=metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 @app.get("/api/artworks")
-async def get_artworks():
+def get_artworks(
+    request: Request,
+    offset: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    after_id: Optional[int] = None,
+    fields: Optional[str] = None
+):
     """
-    Récupère toutes les œuvres d'art
+    Récupère les œuvres d'art, toutes ou par page (offset/limit ou curseur after_id),
+    éventuellement restreintes à certains champs (fields=id,title,...)
+    
+    Le corps JSON est mis en cache jusqu'au prochain ajout d'œuvre ; l'en-tête ETag
+    permet au client de revalider avec If-None-Match (réponse 304 sans corps).
     """
-    return data_manager.get_all_artworks()
+    field_list = [field.strip() for field in fields.split(",") if field.strip()] if fields else None
+    try:
+        page = data_manager.serialize_artworks(offset, limit, after_id=after_id, fields=field_list)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    headers = {
+        "ETag": page["etag"],
+        "Cache-Control": "no-cache",
+        "X-Total-Count": str(page["total"])
+    }
+    if page["next_after_id"] is not None:
+        headers["X-Next-After-Id"] = str(page["next_after_id"])
+    
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and page["etag"] in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+    
+    return Response(content=page["body"], media_type="application/json", headers=headers)
 
 @app.get("/api/artworks/{artwork_id}")
 async def get_artwork(artwork_id: int):
@@ -80,42 +322,179 @@ async def get_artwork(artwork_id: int):
         raise HTTPException(status_code=404, detail="Artwork not found")
     return artwork
 
+@app.get("/api/artworks/{artwork_id}/similar")
+def get_similar_artworks(artwork_id: int, k: int = Query(10, ge=1, le=MAX_SIMILAR)):
+    """
+    Récupère les k œuvres les plus similaires à une œuvre (similarité cosinus des
+    caractéristiques, recherche approchée dans l'index des voisins)
+    """
+    space = learners.space
+    if space is None or ann_index is None:
+        raise HTTPException(status_code=400, detail="Features not available")
+    
+    # L'index porte sur les caractéristiques en pleine précision (même compressées
+    # dans l'espace des learners)
+    row = space.id_to_row.get(artwork_id)
+    artwork_data = space.artwork_data
+    if row is None or row >= len(artwork_data):
+        raise HTTPException(status_code=404, detail="Artwork not found")
+    
+    rows, scores = ann_index.search(data_manager.get_features()[row], k, exclude=[row])
+    similar = []
+    for similar_row, score in zip(rows.tolist(), scores.tolist()):
+        if similar_row >= len(artwork_data):
+            continue
+        artwork = _with_thumbnail_version(artwork_data.iloc[similar_row].to_dict())
+        artwork["similarity"] = score
+        similar.append(artwork)
+    return similar
+
 @app.get("/api/next-artwork")
-async def get_next_artwork():
+def get_next_artwork(session_id: Optional[str] = None, campaign: str = DEFAULT_CAMPAIGN):
     """
     Obtient la prochaine œuvre à classifier selon l'algorithme d'active learning
+    (les œuvres réservées par d'autres sessions sont ignorées)
     """
-    if active_learner is None:
-        raise HTTPException(status_code=400, detail="Active learner not initialized")
+    session = _get_session(campaign)
     
-    index, artwork = active_learner.get_next_artwork()
-    return artwork
+    with session:
+        learner = session.learner
+        had_seed_pair = learner.seed_pair is not None
+        index, artwork = learner.get_next_artwork(exclude_ids=session.reservations.reserved_by_others(session_id))
+        
+        # Persister la paire initiale dès son premier calcul pour éviter de la recalculer au redémarrage
+        if not had_seed_pair and learner.seed_pair is not None:
+            session.snapshot()
+    
+    return _with_thumbnail_version(artwork)
+
+@app.get("/api/next-artworks")
+def get_next_artworks(
+    k: int = Query(5, ge=1, le=100),
+    session_id: Optional[str] = None,
+    reserve: bool = True,
+    campaign: str = DEFAULT_CAMPAIGN
+):
+    """
+    Obtient un lot de k œuvres informatives et diversifiées à classifier,
+    réservées pour la session afin que les sessions concurrentes ne se chevauchent pas
+    """
+    session = _get_session(campaign)
+    
+    if session_id is None:
+        session_id = uuid.uuid4().hex
+    
+    with session:
+        selection = session.learner.get_next_artworks(
+            k, exclude_ids=session.reservations.reserved_by_others(session_id))
+        artworks = [artwork for _, artwork in selection]
+        
+        reserved_until = None
+        if reserve and artworks:
+            reserved_until = session.reservations.reserve([artwork["id"] for artwork in artworks], session_id)
+    
+    return {
+        "session_id": session_id,
+        "reserved_until": reserved_until,
+        "artworks": [_with_thumbnail_version(artwork) for artwork in artworks]
+    }
 
 @app.post("/api/artworks/classify")
-async def classify_artwork(classification: ArtworkClassification):
+def classify_artwork(classification: ArtworkClassification, background_tasks: BackgroundTasks,
+                     campaign: str = DEFAULT_CAMPAIGN):
     """
-    Enregistre la classification d'une œuvre et met à jour le modèle
+    Enregistre la classification d'une œuvre et met à jour le modèle de la campagne
+    
+    La prochaine œuvre est précalculée après l'envoi de la réponse, pour que l'appel
+    suivant à /api/next-artwork soit servi sans recalcul.
     """
-    if active_learner is None:
-        raise HTTPException(status_code=400, detail="Active learner not initialized")
+    session = _get_session(campaign)
     
     try:
-        active_learner.update(classification.artwork_id, classification.classification)
-        # Sauvegarder l'état du modèle
-        active_learner.save_state(MODEL_STATE_PATH)
+        with session:
+            session.classify(classification.artwork_id, classification.classification)
+        background_tasks.add_task(session.precompute_next)
         return {"status": "success"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to classify artwork: {str(e)}")
 
 @app.get("/api/model/stats")
-async def get_model_stats():
+def get_model_stats(request: Request, points: Optional[int] = Query(None, ge=2), campaign: str = DEFAULT_CAMPAIGN):
     """
-    Récupère les statistiques du modèle
+    Récupère les statistiques du modèle de la campagne, la courbe d'apprentissage
+    étant éventuellement réduite à points valeurs régulièrement espacées
+    
+    Le corps JSON est mis en cache jusqu'à la prochaine classification ; l'en-tête
+    ETag permet au client de revalider avec If-None-Match (réponse 304 sans corps).
     """
-    if active_learner is None:
-        raise HTTPException(status_code=400, detail="Active learner not initialized")
+    session = _get_session(campaign)
+    
+    with session:
+        stats = session.learner.serialize_stats(points)
+    
+    headers = {"ETag": stats["etag"], "Cache-Control": "no-cache"}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and stats["etag"] in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+    
+    return Response(content=stats["body"], media_type="application/json", headers=headers)
+
+@app.get("/api/model/predictions")
+def get_model_predictions(
+    offset: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    campaign: str = DEFAULT_CAMPAIGN
+):
+    """
+    Récupère, pour une page d'œuvres, les réponses prédites par propagation des
+    classifications de la campagne sur le graphe des plus proches voisins
+    
+    Le graphe est construit en arrière-plan au démarrage et après chaque ajout
+    d'œuvres ; tant qu'il ne couvre pas toutes les œuvres, la réponse est 503.
+    """
+    session = _get_session(campaign)
+    if learners.space.knn_graph(KNN_NEIGHBORS) is None:
+        raise HTTPException(status_code=503, detail="kNN graph is being built",
+                            headers={"Retry-After": "5"})
+    
+    with session:
+        learner = session.learner
+        return {
+            "total": learner.num_artworks,
+            "predictions": learner.get_predictions(offset, limit)
+        }
+
+# Espace en pleine précision de /api/model/compare-selection, partagé par les requêtes
+# (et avec lui la paire initiale mémorisée) jusqu'au prochain ajout d'œuvres
+_reference_space: Optional[Tuple[int, FeatureSpace]] = None
+_reference_space_lock = threading.Lock()
+
+def _get_reference_space() -> FeatureSpace:
+    """
+    Retourne l'espace de référence en pleine précision, recréé après un ajout d'œuvres
+    """
+    global _reference_space
+    with _reference_space_lock:
+        version = data_manager.version
+        if _reference_space is None or _reference_space[0] != version:
+            _reference_space = (version, FeatureSpace(data_manager.get_features(), data_manager.artwork_data))
+        return _reference_space[1]
+
+@app.get("/api/model/compare-selection")
+def compare_selection(k: int = Query(10, ge=1, le=MAX_PAGE_SIZE), campaign: str = DEFAULT_CAMPAIGN):
+    """
+    Compare la sélection du learner de la campagne (caractéristiques compressées) à
+    celle obtenue avec les caractéristiques en pleine précision
+    """
+    if compression is None:
+        raise HTTPException(status_code=400, detail="Feature compression is disabled")
+    session = _get_session(campaign)
+    reference_space = _get_reference_space()
     
-    return active_learner.get_stats()
+    with session:
+        comparison = session.learner.compare_selection(reference_space, k)
+    comparison["compression"] = compression.describe()
+    return comparison
 
 @app.get("/api/questions")
 async def get_questions():
@@ -182,7 +561,64 @@ async def delete_question(question_id: int):
     
     raise HTTPException(status_code=404, detail="Question not found")
 
-@app.post("/api/artworks/upload")
+def _process_upload_batch(uploads: List[Dict]) -> List[Dict]:
+    """
+    Traite un lot d'œuvres téléchargées (exécuté par le thread de la file de tâches) :
+    une seule passe d'extraction pour tout le lot, puis ajout en fin de stockage
+    
+    Args:
+        uploads: Liste de dictionnaires {"artwork": ..., "image_path": ...}
+    
+    Returns:
+        Liste des œuvres ajoutées (avec leur ID), dans l'ordre du lot
+    """
+    # Extraire les caractéristiques du lot en une seule passe
+    features = feature_extractor.get().batch_extract_features([upload["image_path"] for upload in uploads])
+    
+    # Enregistrer caractéristiques et métadonnées ensemble (les caractéristiques sont
+    # retirées si l'ajout des métadonnées échoue) : en cas d'erreur, rien n'est ajouté
+    added = [dict(upload["artwork"]) for upload in uploads]
+    data_manager.add_artworks_with_features(added, features)
+    
+    # Les œuvres sont enregistrées : les structures dérivées ci-dessous sont reconstruites
+    # au redémarrage, leur échec ne fait pas échouer les tâches
+    try:
+        # Étendre l'espace partagé en place ; chaque learner s'y synchronise à sa
+        # prochaine utilisation
+        learners.add_artworks(
+            data_manager.artwork_data.iloc[-len(uploads):],
+            features,
+            feature_view=data_manager.get_features(),
+            artwork_view=data_manager.artwork_data
+        )
+        
+        # Indexer les nouvelles œuvres pour la recherche d'œuvres similaires
+        global ann_index
+        if ann_index is None:
+            ann_index = IVFIndex()
+            ann_index.build(data_manager.get_features())
+            ann_index.save(ANN_INDEX_DIR)
+        elif ann_index.add(features, learners.space.num_artworks - len(uploads)):
+            ann_index.save(ANN_INDEX_DIR)
+        
+        # Étendre le graphe kNN aux nouvelles œuvres avant qu'une requête n'en ait besoin
+        _extend_knn_graph()
+        
+        # Réécrire artworks.csv et features.npy lorsque le journal des œuvres devient trop long
+        data_manager.maybe_compact_artwork_log()
+    except Exception as e:
+        print(f"Erreur lors de la prise en compte des œuvres ajoutées (reprise au redémarrage): {e}")
+    
+    return added
+
+# File des tâches d'extraction (les téléchargements sont regroupés en micro-lots)
+upload_jobs = BatchJobQueue(_process_upload_batch, max_batch_size=UPLOAD_BATCH_SIZE)
+
+def _save_upload(path: str, content: bytes) -> None:
+    with open(path, "wb") as buffer:
+        buffer.write(content)
+
+@app.post("/api/artworks/upload", status_code=202)
 async def upload_artwork(
     title: str = Form(...),
     artist: str = Form(...),
@@ -190,14 +626,15 @@ async def upload_artwork(
     image: UploadFile = File(...)
 ):
     """
-    Télécharge une nouvelle œuvre d'art et extrait ses caractéristiques
+    Télécharge une nouvelle œuvre d'art ; l'extraction de ses caractéristiques et son
+    ajout au modèle sont effectués en arrière-plan (suivi via /api/jobs/{job_id})
     """
-    # Sauvegarder l'image
+    # Sauvegarder l'image sans bloquer la boucle d'événements
     image_filename = f"{title.replace(' ', '_')}_{artist.replace(' ', '_')}.jpg"
     image_path = os.path.join(IMAGES_DIR, image_filename)
     
-    with open(image_path, "wb") as buffer:
-        shutil.copyfileobj(image.file, buffer)
+    content = await image.read()
+    await run_in_threadpool(_save_upload, image_path, content)
     
     # Créer l'entrée d'œuvre d'art
     artwork = {
@@ -207,33 +644,21 @@ async def upload_artwork(
         "imagepath": f"/images/{image_filename}"
     }
     
-    # Ajouter l'œuvre à la base de données
-    artwork_id = data_manager.add_artwork(artwork)
-    
-    # Extraire les caractéristiques
-    features = feature_extractor.extract_features(image_path)
-    
-    # Mettre à jour les caractéristiques dans le gestionnaire de données
-    if data_manager.get_features() is None:
-        # Première œuvre, initialiser le tableau de caractéristiques
-        data_manager.update_features(features.reshape(1, -1))
-    else:
-        # Ajouter les nouvelles caractéristiques
-        all_features = np.vstack([data_manager.get_features(), features.reshape(1, -1)])
-        data_manager.update_features(all_features)
-    
-    # Réinitialiser le active learner avec les données mises à jour
-    global active_learner
-    active_learner = ActiveLearner(data_manager.get_features(), data_manager.artwork_data)
-    
-    # Charger l'état du modèle s'il existe
-    if os.path.exists(MODEL_STATE_PATH):
-        active_learner.load_state(MODEL_STATE_PATH)
+    job_id = upload_jobs.submit({"artwork": artwork, "image_path": image_path})
     
     return {
-        "id": artwork_id,
-        "title": title,
-        "artist": artist,
-        "year": year,
-        "imagepath": f"/images/{image_filename}"
-    } 
\ No newline at end of file
+        "job_id": job_id,
+        "status": "pending",
+        **artwork
+    }
+
+@app.get("/api/jobs/{job_id}")
+async def get_job(job_id: str):
+    """
+    Récupère l'état d'une tâche d'arrière-plan (pending, running, done ou failed) ;
+    le résultat d'un téléchargement terminé est l'œuvre ajoutée, avec son ID
+    """
+    job = upload_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
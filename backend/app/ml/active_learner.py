@@ -1,9 +1,18 @@
 import numpy as np
-from typing import Dict, List, Tuple, Set, Optional
-from sklearn.metrics.pairwise import euclidean_distances
+import hashlib
+from typing import Dict, List, Tuple, Set, Optional, Iterable
 import pandas as pd
 import os
 import json
+import time
+from collections import deque
+
+from .question_model import MultiQuestionModel
+from .compression import blockwise_dot
+from .feature_space import FeatureSpace
+from .label_propagation import LabelPropagation
+from ..utils.label_journal import LabelJournal
+from ..utils.metrics import registry, timed
 
 class ActiveLearner:
     """
@@ -15,117 +24,441 @@ class ActiveLearner:
     3. Sélection des images proches de la frontière
     """
     
-    def __init__(self, features: np.ndarray, artwork_data: pd.DataFrame):
+    # Tranches de confiance rapportées par get_stats (borne basse incluse, en %)
+    CONFIDENCE_RANGES = [("90-100%", 90), ("80-89%", 80), ("70-79%", 70),
+                         ("60-69%", 60), ("50-59%", 50), ("<50%", 0)]
+    
+    def __init__(self, features: np.ndarray, artwork_data: pd.DataFrame,
+                 seed_mode: str = "exact", block_size: int = 2048,
+                 accuracy_window: int = 50, space: Optional[FeatureSpace] = None,
+                 knn_k: int = 10, propagation_alpha: float = 0.9, next_queue_size: int = 8):
         """
         Initialise le learner avec les caractéristiques et les données des œuvres
         
         Args:
             features: Matrice de caractéristiques (une ligne par œuvre)
             artwork_data: DataFrame contenant les métadonnées des œuvres
+            seed_mode: Recherche de la paire initiale la plus éloignée,
+                "exact" (par blocs) ou "approximate" (balayages successifs, O(N·d))
+            block_size: Nombre de lignes par bloc pour les calculs de distances
+            accuracy_window: Nombre de dernières classifications prises en compte dans
+                la précision glissante
+            space: Espace de caractéristiques partagé avec d'autres learners
+                (features et artwork_data sont alors ceux de cet espace)
+            knn_k: Nombre de voisins par œuvre du graphe de propagation des classifications
+            propagation_alpha: Poids de la propagation par rapport aux classifications connues
+            next_queue_size: Nombre d'œuvres gardées dans la file des prochaines œuvres
+                précalculée (servie par get_next_artwork sans recalculer les scores)
         """
-        self.features = features
-        self.artwork_data = artwork_data
-        self.num_artworks = features.shape[0]
+        if seed_mode not in ("exact", "approximate"):
+            raise ValueError(f"seed_mode inconnu: {seed_mode}")
+        
+        # Caractéristiques, métadonnées, index des IDs et normes partagés ; le learner
+        # n'en garde que des vues, rafraîchies lorsque l'espace s'agrandit
+        self.space = space if space is not None else FeatureSpace(features, artwork_data)
+        self.features, self.artwork_data = self.space.view()
+        self.num_artworks = self.features.shape[0]
+        self.seed_mode = seed_mode
+        self.block_size = block_size
+        
+        # Paire d'œuvres la plus éloignée (démarrage à froid), calculée une seule fois
+        self.seed_pair: Optional[Tuple[int, int]] = None
         
         # Structures de données pour suivre les classifications
         self.labeled_indices: Set[int] = set()  # Indices des œuvres classifiées
+        self._labeled_mask = np.zeros(self.num_artworks, dtype=bool)  # Masque des œuvres classifiées
         self.classifications: Dict[int, Dict[str, str]] = {}  # Classifications par œuvre et question
         
-        # Structures pour les classes
-        self.class_assignments: Dict[int, str] = {}  # Classe attribuée à chaque œuvre
-        self.class_vectors: Dict[str, np.ndarray] = {}  # Vecteur moyen par classe
+        # Modèle un-contre-tous par question, maintenu incrémentalement
+        self.model = MultiQuestionModel(self.features.shape[1])
         
-        # Historique d'apprentissage
-        self.learning_curve: List[float] = []
+        # Historique d'apprentissage : précision après chaque classification, dans un
+        # tableau dont la capacité double lorsqu'il est plein (ajout en O(1) amorti)
+        self._curve = np.zeros(64, dtype=np.float64)
+        self._curve_length = 0
         self.accuracy: float = 0.0
+        
+        # Précision glissante : chaque œuvre est prédite avant d'apprendre sa classification
+        self._recent_hits: deque = deque(maxlen=accuracy_window)
+        
+        # Version de l'état (incrémentée à chaque classification) et statistiques en cache
+        self._version = 0
+        
+        # Numéro du dernier enregistrement du journal des classifications pris en compte
+        self.journal_seq = 0
+        self._stats_cache_version = -1
+        self._confidences: Optional[np.ndarray] = None
+        self._loo_accuracy: Optional[float] = None
+        # Statistiques (hors courbe) et réponses sérialisées, par version de l'état
+        self._stats: Optional[Tuple[Tuple[int, int], Dict]] = None
+        self._serialized_stats: Dict[Optional[int], Dict] = {}
+        self._serialized_stats_key: Optional[Tuple[int, int]] = None
+        
+        # Propagation des classifications sur le graphe kNN (créée à la première
+        # demande de prédictions, puis mise à jour localement à chaque classification)
+        self.knn_k = knn_k
+        self.propagation_alpha = propagation_alpha
+        self._propagation: Optional[LabelPropagation] = None
+        
+        # File des prochaines œuvres (lignes par score décroissant et leurs métadonnées),
+        # valable tant que ni les classifications ni l'espace n'ont changé
+        self.next_queue_size = next_queue_size
+        self._next_queue: Optional[Tuple[Tuple[int, int], List[int], List[Dict]]] = None
+    
+    @property
+    def state_version(self) -> Tuple[int, int]:
+        """
+        Version des classifications et de l'espace partagé (change à chaque
+        classification, retrait, rechargement de l'état ou ajout d'œuvres)
+        """
+        return self._version, self.space.version
+    
+    @property
+    def learning_curve(self) -> np.ndarray:
+        """
+        Précision glissante après chaque classification (vue sur le tableau interne)
+        """
+        return self._curve[:self._curve_length]
+    
+    @learning_curve.setter
+    def learning_curve(self, values: Iterable[float]) -> None:
+        values = np.asarray(list(values), dtype=np.float64)
+        self._curve = np.zeros(max(64, 2 * len(values)), dtype=np.float64)
+        self._curve[:len(values)] = values
+        self._curve_length = len(values)
     
-    def _compute_distance_matrix(self) -> np.ndarray:
+    def _get_row(self, artwork_id: int) -> int:
         """
-        Calcule la matrice des distances euclidiennes entre toutes les images
+        Retourne la ligne d'une œuvre à partir de son ID en O(1)
         
+        Args:
+            artwork_id: ID de l'œuvre
+            
         Returns:
-            Matrice des distances carrées
+            Index de la ligne de l'œuvre
         """
-        return euclidean_distances(self.features, squared=True)
+        row = self.space.id_to_row.get(int(artwork_id))
+        if row is not None and row >= self.num_artworks:
+            # Œuvre ajoutée à l'espace partagé depuis la dernière synchronisation
+            self._sync_rows()
+        if row is None or row >= self.num_artworks:
+            raise ValueError(f"Œuvre inconnue: {artwork_id}")
+        return row
     
-    def get_next_artwork(self) -> Tuple[int, Dict]:
+    def knows_artwork(self, artwork_id: int) -> bool:
         """
-        Sélectionne la prochaine œuvre à classifier selon la stratégie d'active learning
+        Indique si une œuvre fait partie de l'espace du learner
+        """
+        try:
+            self._get_row(artwork_id)
+        except ValueError:
+            return False
+        return True
+    
+    def _get_squared_norms(self) -> np.ndarray:
+        """
+        Retourne les normes carrées des vecteurs de caractéristiques (partagées)
+        """
+        return self.space.squared_norms()[:self.num_artworks]
+    
+    def _find_farthest_pair(self) -> Tuple[int, int]:
+        """
+        Trouve les deux œuvres les plus éloignées sans construire la matrice N×N
+        
+        En mode "exact", les distances sont calculées par blocs de block_size × block_size
+        (mémoire bornée, O(N²·d) en temps). En mode "approximate", on alterne des
+        recherches du point le plus éloigné (heuristique de double balayage), en O(N·d)
+        par itération.
         
         Returns:
-            Tuple contenant l'index de l'œuvre et ses métadonnées
+            Indices (i, j) des deux œuvres les plus éloignées
         """
-        # Si aucune œuvre n'a été classifiée, sélectionner deux œuvres les plus éloignées
-        if len(self.labeled_indices) == 0:
-            # Calculer la matrice des distances
-            distance_matrix = self._compute_distance_matrix()
+        if self.num_artworks < 2:
+            return 0, 0
+        
+        if self.seed_mode == "approximate":
+            return self._find_farthest_pair_approximate()
+        
+        norms = self._get_squared_norms()
+        best_distance = -1.0
+        best_pair = (0, 0)
+        
+        for start_i in range(0, self.num_artworks, self.block_size):
+            end_i = min(start_i + self.block_size, self.num_artworks)
+            block_i = self.features[start_i:end_i]
             
-            # Trouver les deux œuvres les plus éloignées
-            i, j = np.unravel_index(np.argmax(distance_matrix), distance_matrix.shape)
+            # Seuls les blocs j >= i sont nécessaires (matrice symétrique)
+            for start_j in range(start_i, self.num_artworks, self.block_size):
+                end_j = min(start_j + self.block_size, self.num_artworks)
+                block_j = self.features[start_j:end_j]
+                
+                distances = (norms[start_i:end_i, None] + norms[None, start_j:end_j]
+                             - 2.0 * blockwise_dot(block_i, block_j.T))
+                
+                flat_idx = np.argmax(distances)
+                if distances.flat[flat_idx] > best_distance:
+                    i, j = np.unravel_index(flat_idx, distances.shape)
+                    best_distance = distances.flat[flat_idx]
+                    best_pair = (start_i + int(i), start_j + int(j))
+        
+        return best_pair
+    
+    def _find_farthest_pair_approximate(self, max_iterations: int = 5) -> Tuple[int, int]:
+        """
+        Approxime la paire la plus éloignée par balayages successifs
+        
+        Args:
+            max_iterations: Nombre maximal de balayages
             
-            # Retourner la première
-            return i, self.artwork_data.iloc[i].to_dict()
+        Returns:
+            Indices (i, j) d'une paire d'œuvres très éloignées
+        """
+        # Partir de l'œuvre la plus éloignée du centre de la collection
+        center = np.mean(self.features, axis=0, dtype=np.float64)
+        current = int(np.argmax(self._squared_distances_to(center)))
         
-        # Si une seule œuvre a été classifiée, retourner la plus éloignée
-        elif len(self.labeled_indices) == 1:
-            labeled_idx = list(self.labeled_indices)[0]
+        best_distance = -1.0
+        best_pair = (current, current)
+        
+        for _ in range(max_iterations):
+            distances = self._squared_distances_to(self.features[current])
+            farthest = int(np.argmax(distances))
             
-            # Calculer les distances par rapport à l'œuvre déjà classifiée
-            distances = euclidean_distances([self.features[labeled_idx]], self.features)[0]
+            # Arrêt dès que la distance n'augmente plus
+            if distances[farthest] <= best_distance:
+                break
             
-            # Ignorer les œuvres déjà classifiées
-            distances[list(self.labeled_indices)] = -1
+            best_distance = distances[farthest]
+            best_pair = (current, farthest)
+            current = farthest
+        
+        return best_pair
+    
+    def _squared_distances_to(self, point: np.ndarray) -> np.ndarray:
+        """
+        Calcule les distances euclidiennes carrées entre un point et toutes les œuvres
+        
+        Args:
+            point: Vecteur de caractéristiques
             
-            # Sélectionner l'œuvre la plus éloignée
-            next_idx = np.argmax(distances)
-            return next_idx, self.artwork_data.iloc[next_idx].to_dict()
-        
-        # Si on a des œuvres de deux classes différentes
-        elif len(set(self.class_assignments.values())) >= 2:
-            # Calculer le vecteur normal à la frontière de décision
-            classes = set(self.class_assignments.values())
-            class_vectors = {}
+        Returns:
+            Vecteur des distances carrées (une valeur par œuvre)
+        """
+        norms = self._get_squared_norms()
+        point = np.asarray(point, dtype=np.float64)
+        distances = norms - 2.0 * blockwise_dot(self.features, point) + np.dot(point, point)
+        return np.maximum(distances, 0.0)
+    
+    def _selection_scores(self) -> np.ndarray:
+        """
+        Calcule un score d'intérêt pour chaque œuvre selon la stratégie d'active learning
+        (plus le score est élevé, plus l'œuvre est informative)
+        
+        Returns:
+            Vecteur de scores (une valeur par œuvre, -inf pour les œuvres déjà classifiées)
+        """
+        self._sync_rows()
+        started = time.perf_counter()
+        
+        # Si aucune œuvre n'a été classifiée, partir des deux œuvres les plus éloignées
+        if len(self.labeled_indices) == 0:
+            # Trouver les deux œuvres les plus éloignées (calculées une seule fois,
+            # pour toutes les sessions partageant l'espace)
+            if self.seed_pair is None:
+                self.seed_pair = self.space.memoize(
+                    ("seed_pair", self.seed_mode, self.num_artworks), self._find_farthest_pair)
             
-            # Calculer le vecteur moyen pour chaque classe
-            for class_name in classes:
-                indices = [idx for idx, cls in self.class_assignments.items() if cls == class_name]
-                if indices:
-                    class_vectors[class_name] = np.mean([self.features[idx] for idx in indices], axis=0)
+            # La première œuvre de la paire passe en tête, puis les plus éloignées d'elle
+            scores = self._squared_distances_to(self.features[self.seed_pair[0]])
+            scores[self.seed_pair[0]] = np.inf
+            self._observe_selection("seed", started)
+            return scores
+        
+        # Si une seule œuvre a été classifiée, privilégier les plus éloignées
+        elif len(self.labeled_indices) == 1:
+            labeled_idx = next(iter(self.labeled_indices))
             
-            # Si on a au moins deux classes avec des vecteurs
-            if len(class_vectors) >= 2:
-                class_names = list(class_vectors.keys())
-                # Calculer le vecteur normal w (différence entre les moyennes des classes)
-                w = class_vectors[class_names[0]] - class_vectors[class_names[1]]
-                
-                # Calculer les produits scalaires avec w
-                products = np.dot(self.features, w)
-                
-                # Trouver les œuvres les plus proches de la frontière (produit scalaire proche de 0)
-                absolute_products = np.abs(products)
-                
-                # Ignorer les œuvres déjà classifiées
-                absolute_products[list(self.labeled_indices)] = float('inf')
-                
-                # Sélectionner l'œuvre la plus proche de la frontière
-                next_idx = np.argmin(absolute_products)
-                return next_idx, self.artwork_data.iloc[next_idx].to_dict()
+            # Calculer les distances par rapport à l'œuvre déjà classifiée
+            scores = self._squared_distances_to(self.features[labeled_idx])
+            branch = "single"
         
-        # Si toutes les œuvres classifiées appartiennent à la même classe
-        # Sélectionner l'œuvre la plus éloignée du centre des œuvres classifiées
-        labeled_features = self.features[list(self.labeled_indices)]
-        center = np.mean(labeled_features, axis=0)
+        # Si au moins une question a des réponses différentes, privilégier les œuvres
+        # dont l'incertitude combinée sur toutes les questions est la plus forte
+        elif self.model.active_questions():
+            scores = self.model.uncertainty(self.features)
+            branch = "uncertainty"
         
-        # Calculer les distances par rapport au centre
-        distances = euclidean_distances([center], self.features)[0]
+        # Si toutes les œuvres classifiées ont reçu les mêmes réponses,
+        # privilégier les œuvres les plus éloignées du centre des œuvres classifiées
+        else:
+            center = np.mean(self.features[self._labeled_mask], axis=0, dtype=np.float64)
+            scores = self._squared_distances_to(center)
+            branch = "center"
         
         # Ignorer les œuvres déjà classifiées
-        distances[list(self.labeled_indices)] = -1
+        scores = scores.astype(np.float64, copy=False)
+        scores[self._labeled_mask] = -np.inf
+        self._observe_selection(branch, started)
+        return scores
+    
+    @staticmethod
+    def _observe_selection(branch: str, started: float) -> None:
+        """
+        Enregistre la durée du calcul des scores de sélection, par stratégie
+        (seed, single, uncertainty ou center)
+        """
+        registry.histogram("learner_selection_seconds",
+                           "Durée du calcul des scores de sélection, par stratégie").observe(
+            time.perf_counter() - started, branch=branch)
+    
+    def _rows_for_ids(self, artwork_ids: Optional[Iterable[int]]) -> np.ndarray:
+        """
+        Convertit une liste d'IDs d'œuvres en lignes (les IDs inconnus sont ignorés)
+        """
+        if not artwork_ids:
+            return np.zeros(0, dtype=np.int64)
+        rows = [self.space.id_to_row.get(int(artwork_id)) for artwork_id in artwork_ids]
+        return np.array([row for row in rows if row is not None and row < self.num_artworks],
+                        dtype=np.int64)
+    
+    def get_next_artwork(self, exclude_ids: Optional[Iterable[int]] = None) -> Tuple[int, Dict]:
+        """
+        Sélectionne la prochaine œuvre à classifier selon la stratégie d'active learning
+        
+        L'œuvre est servie depuis la file précalculée (precompute_next ou appel précédent)
+        si elle est à jour ; sinon les scores sont recalculés et la file reconstituée.
+        
+        Args:
+            exclude_ids: IDs d'œuvres à ne pas proposer (ex: réservées par une autre session)
         
-        # Sélectionner l'œuvre la plus éloignée
-        next_idx = np.argmax(distances)
+        Returns:
+            Tuple contenant l'index de l'œuvre et ses métadonnées
+        """
+        queued = self._next_from_queue(exclude_ids)
+        registry.counter("learner_next_artwork_total", "Sélections de la prochaine œuvre, par origine").inc(
+            source="computed" if queued is None else "precomputed")
+        if queued is not None:
+            return queued
+        
+        key = self.state_version
+        scores = self._selection_scores()
+        self._fill_next_queue(scores, key)
+        scores[self._rows_for_ids(exclude_ids)] = -np.inf
+        
+        next_idx = int(np.argmax(scores))
         return next_idx, self.artwork_data.iloc[next_idx].to_dict()
     
+    def _fill_next_queue(self, scores: np.ndarray, key: Tuple[int, int]) -> None:
+        """
+        Garde les next_queue_size œuvres les mieux notées et leurs métadonnées
+        
+        Args:
+            scores: Scores de sélection (avant exclusion des œuvres réservées)
+            key: Version de l'état et de l'espace relevée avant le calcul des scores
+        """
+        size = min(self.next_queue_size, int(np.count_nonzero(scores > -np.inf)))
+        if size == 0:
+            self._next_queue = None
+            return
+        
+        rows = np.argpartition(-scores, size - 1)[:size]
+        # Score décroissant puis ligne croissante, comme np.argmax en cas d'égalité
+        rows = rows[np.lexsort((rows, -scores[rows]))].tolist()
+        self._next_queue = (key, rows, [self.artwork_data.iloc[row].to_dict() for row in rows])
+    
+    def _next_from_queue(self, exclude_ids: Optional[Iterable[int]]) -> Optional[Tuple[int, Dict]]:
+        """
+        Sert la prochaine œuvre depuis la file précalculée
+        
+        Returns:
+            Tuple (index, métadonnées) de la première œuvre non exclue de la file, ou None
+            si la file est périmée ou ne contient que des œuvres exclues
+        """
+        if self._next_queue is None or self._next_queue[0] != self.state_version:
+            return None
+        
+        excluded = set(self._rows_for_ids(exclude_ids).tolist())
+        for row, record in zip(self._next_queue[1], self._next_queue[2]):
+            if row not in excluded:
+                return row, dict(record)
+        return None
+    
+    def precompute_next(self) -> None:
+        """
+        Calcule à l'avance la file des prochaines œuvres, pour que le prochain appel à
+        get_next_artwork soit servi sans recalcul (à lancer en tâche de fond après une
+        classification)
+        """
+        key = self.state_version
+        if self._next_queue is not None and self._next_queue[0] == key:
+            return
+        self._fill_next_queue(self._selection_scores(), key)
+    
+    def discard_next_queue(self) -> None:
+        """
+        Oublie la file des prochaines œuvres précalculée (le prochain appel à
+        get_next_artwork recalcule les scores)
+        """
+        self._next_queue = None
+    
+    def get_next_artworks(self, k: int, exclude_ids: Optional[Iterable[int]] = None,
+                          diversity_threshold: float = 0.95,
+                          pool_factor: int = 10) -> List[Tuple[int, Dict]]:
+        """
+        Sélectionne un lot de k œuvres parmi les plus informatives, sans quasi-doublons
+        
+        Les candidats sont les pool_factor × k œuvres les mieux notées. La similarité
+        cosinus entre candidats est calculée en une seule passe, puis les candidats sont
+        retenus par score décroissant en écartant ceux trop similaires à une œuvre déjà
+        retenue. Le lot peut donc contenir moins de k œuvres.
+        
+        Args:
+            k: Nombre d'œuvres souhaitées
+            exclude_ids: IDs d'œuvres à ne pas proposer
+            diversity_threshold: Similarité cosinus au-delà de laquelle deux œuvres sont
+                considérées comme des quasi-doublons
+            pool_factor: Taille du pool de candidats (multiple de k)
+        
+        Returns:
+            Liste de tuples (index de l'œuvre, métadonnées), par intérêt décroissant
+        """
+        scores = self._selection_scores()
+        scores[self._rows_for_ids(exclude_ids)] = -np.inf
+        
+        available = int(np.count_nonzero(scores > -np.inf))
+        pool_size = min(max(k * pool_factor, k), available)
+        if pool_size == 0:
+            return []
+        
+        # Pool des meilleurs candidats, triés par score décroissant
+        pool = np.argpartition(-scores, pool_size - 1)[:pool_size]
+        pool = pool[np.argsort(-scores[pool], kind='stable')]
+        
+        # Similarités cosinus entre candidats (sur les caractéristiques d'origine
+        # approchées si l'espace est compressé, la projection étant centrée)
+        pool_features = self.features[pool]
+        if self.space.compression is not None:
+            pool_features = self.space.compression.uncenter(pool_features)
+        pool_features = pool_features.astype(np.float64)
+        norms = np.linalg.norm(pool_features, axis=1, keepdims=True)
+        pool_features /= np.maximum(norms, 1e-12)
+        similarities = pool_features @ pool_features.T
+        
+        # Sélection gloutonne : chaque œuvre retenue bloque ses quasi-doublons
+        selected = []
+        blocked = np.zeros(pool_size, dtype=bool)
+        for position in range(pool_size):
+            if blocked[position]:
+                continue
+            selected.append(int(pool[position]))
+            if len(selected) == k:
+                break
+            blocked |= similarities[position] >= diversity_threshold
+        
+        records = self.artwork_data.iloc[selected].to_dict(orient='records')
+        return list(zip(selected, records))
+    
+    @timed("learner_update_seconds", "Durée de la prise en compte d'une classification")
     def update(self, artwork_id: int, classification: Dict[str, str]) -> None:
         """
         Met à jour le modèle avec une nouvelle classification
@@ -135,94 +468,375 @@ class ActiveLearner:
             classification: Dictionnaire des classifications (question -> réponse)
         """
         # Trouver l'index de l'œuvre dans le DataFrame
-        artwork_idx = self.artwork_data[self.artwork_data['id'] == artwork_id].index[0]
+        artwork_idx = self._get_row(artwork_id)
+        
+        # Retirer les anciennes réponses en cas de reclassification
+        previous = self.classifications.get(artwork_idx)
+        if previous:
+            self.model.remove(self.features[artwork_idx], previous)
+        
+        # Évaluer la prédiction du modèle avant d'apprendre cette classification
+        hit = self._prediction_hit(artwork_idx, classification)
+        if hit is not None:
+            self._recent_hits.append(hit)
         
         # Enregistrer la classification
         self.labeled_indices.add(artwork_idx)
+        self._labeled_mask[artwork_idx] = True
         self.classifications[artwork_idx] = classification
         
-        # Extraire la classification principale (par simplicité, on prend la première question/réponse)
-        if classification:
-            first_key = list(classification.keys())[0]
-            class_label = classification[first_key]
-            self.class_assignments[artwork_idx] = class_label
-            
-            # Mettre à jour les vecteurs de classe
-            classes = set(self.class_assignments.values())
-            for class_name in classes:
-                indices = [idx for idx, cls in self.class_assignments.items() if cls == class_name]
-                if indices:
-                    self.class_vectors[class_name] = np.mean([self.features[idx] for idx in indices], axis=0)
-        
-        # Mettre à jour la courbe d'apprentissage (simulation)
+        # Mettre à jour les centroïdes de chaque question en O(d)
+        self.model.add(self.features[artwork_idx], classification)
+        
+        # Propager la classification au voisinage de l'œuvre
+        if self._propagation is not None and self._propagation.is_current():
+            self._propagation.update(artwork_idx, previous, classification)
+        
+        # Mettre à jour la courbe d'apprentissage
+        self._version += 1
         self._update_learning_curve()
     
+    def remove_label(self, artwork_id: int) -> None:
+        """
+        Retire la classification d'une œuvre
+        
+        Args:
+            artwork_id: ID de l'œuvre
+        """
+        artwork_idx = self._get_row(artwork_id)
+        
+        self.labeled_indices.discard(artwork_idx)
+        self._labeled_mask[artwork_idx] = False
+        
+        previous = self.classifications.pop(artwork_idx, None)
+        if previous:
+            self.model.remove(self.features[artwork_idx], previous)
+            if self._propagation is not None and self._propagation.is_current():
+                self._propagation.update(artwork_idx, previous, None)
+        self._version += 1
+    
+    def _prediction_hit(self, artwork_idx: int, classification: Dict[str, str]) -> Optional[float]:
+        """
+        Compare la prédiction du modèle actuel à la classification fournie
+        
+        Args:
+            artwork_idx: Index de l'œuvre
+            classification: Dictionnaire des classifications (question -> réponse)
+        
+        Returns:
+            Proportion des questions correctement prédites, ou None si aucune question
+            de la classification n'a encore de frontière
+        """
+        predictions = self.model.predict(self.features[artwork_idx:artwork_idx + 1])
+        answers = {str(question): str(answer) for question, answer in classification.items()}
+        
+        evaluated = [question for question in predictions if question in answers]
+        if not evaluated:
+            return None
+        return sum(predictions[q][0][0] == answers[q] for q in evaluated) / len(evaluated)
+    
     def _update_learning_curve(self) -> None:
         """
-        Met à jour la courbe d'apprentissage en fonction du nombre d'œuvres classifiées
-        Note: dans un cas réel, on calculerait la précision sur un ensemble de validation
+        Met à jour la courbe d'apprentissage avec la précision glissante : chaque œuvre
+        est prédite avant que sa classification ne soit apprise (évaluation prequential)
         """
-        progress = len(self.labeled_indices) / self.num_artworks
-        # Simulation d'une courbe d'apprentissage qui s'améliore avec plus de données
-        # La formule ci-dessous est juste une approximation pour simuler l'amélioration
-        self.accuracy = min(0.5 + 0.45 * (1 - np.exp(-5 * progress)), 0.95)
-        self.learning_curve.append(self.accuracy)
+        if self._recent_hits:
+            self.accuracy = float(np.mean(self._recent_hits))
+        if self._curve_length == len(self._curve):
+            self._curve = np.concatenate([self._curve, np.zeros_like(self._curve)])
+        self._curve[self._curve_length] = self.accuracy
+        self._curve_length += 1
     
-    def get_stats(self) -> Dict:
+    def _refresh_stats_cache(self) -> None:
+        """
+        Recalcule les confiances et la précision leave-one-out si une classification
+        a eu lieu depuis le dernier calcul
+        """
+        self._sync_rows()
+        if self._stats_cache_version == self._version:
+            return
+        
+        self._confidences = self.model.confidence(self.features)
+        
+        labeled_rows = sorted(self.classifications)
+        self._loo_accuracy = self.model.leave_one_out_accuracy(
+            self.features[labeled_rows], [self.classifications[row] for row in labeled_rows])
+        
+        self._stats_cache_version = self._version
+    
+    def _confidence_distribution(self) -> Dict[str, int]:
+        """
+        Répartit les œuvres non classifiées par tranche de confiance
+        
+        Returns:
+            Dictionnaire tranche -> nombre d'œuvres
+        """
+        distribution = {label: 0 for label, _ in self.CONFIDENCE_RANGES}
+        if self._confidences is None:
+            return distribution
+        
+        confidences = self._confidences[~self._labeled_mask] * 100
+        for label, lower_bound in self.CONFIDENCE_RANGES:
+            in_range = confidences >= lower_bound
+            distribution[label] = int(np.count_nonzero(in_range))
+            confidences = confidences[~in_range]
+        return distribution
+    
+    def _downsample_curve(self, points: Optional[int]) -> Tuple[List[int], List[float]]:
+        """
+        Échantillonne la courbe d'apprentissage en au plus points valeurs régulièrement
+        espacées (la première et la dernière sont toujours conservées)
+        
+        Args:
+            points: Nombre maximal de valeurs (None: courbe complète)
+        
+        Returns:
+            Tuple (numéros des classifications, à partir de 1 ; précisions correspondantes)
+        """
+        length = self._curve_length
+        if points is None or length <= points:
+            indices = np.arange(length)
+        else:
+            indices = np.unique(np.linspace(0, length - 1, points).round().astype(np.int64))
+        return (indices + 1).tolist(), self._curve[indices].tolist()
+    
+    @timed("learner_get_stats_seconds", "Durée du calcul des statistiques du modèle")
+    def get_stats(self, points: Optional[int] = None) -> Dict:
         """
         Retourne les statistiques actuelles du modèle
         
+        Args:
+            points: Nombre maximal de valeurs de la courbe d'apprentissage (None: toutes)
+        
         Returns:
             Dictionnaire contenant les statistiques
         """
-        # Distribution de confiance (simulée)
-        confidence_ranges = ["90-100%", "80-89%", "70-79%", "60-69%", "50-59%", "<50%"]
-        
-        # Simuler une distribution basée sur l'accuracy actuelle
-        confidence_distribution = {}
-        unlabeled_count = self.num_artworks - len(self.labeled_indices)
-        
-        if self.accuracy > 0.9:
-            confidence_distribution = {
-                "90-100%": int(unlabeled_count * 0.4),
-                "80-89%": int(unlabeled_count * 0.3),
-                "70-79%": int(unlabeled_count * 0.2),
-                "60-69%": int(unlabeled_count * 0.05),
-                "50-59%": int(unlabeled_count * 0.03),
-                "<50%": int(unlabeled_count * 0.02)
-            }
-        elif self.accuracy > 0.8:
-            confidence_distribution = {
-                "90-100%": int(unlabeled_count * 0.2),
-                "80-89%": int(unlabeled_count * 0.4),
-                "70-79%": int(unlabeled_count * 0.2),
-                "60-69%": int(unlabeled_count * 0.1),
-                "50-59%": int(unlabeled_count * 0.05),
-                "<50%": int(unlabeled_count * 0.05)
-            }
-        else:
-            confidence_distribution = {
-                "90-100%": int(unlabeled_count * 0.05),
-                "80-89%": int(unlabeled_count * 0.15),
-                "70-79%": int(unlabeled_count * 0.2),
-                "60-69%": int(unlabeled_count * 0.3),
-                "50-59%": int(unlabeled_count * 0.2),
-                "<50%": int(unlabeled_count * 0.1)
+        # Statistiques coûteuses recalculées au plus une fois par version de l'état ;
+        # la version est lue avant le calcul, qui au pire sera refait
+        key = self.state_version
+        if self._stats is None or self._stats[0] != key:
+            self._refresh_stats_cache()
+            self._stats = (key, {
+                "accuracy": float(self.accuracy),
+                "loo_accuracy": self._loo_accuracy,
+                "classified_count": len(self.labeled_indices),
+                "total_count": self.num_artworks,
+                "confidence_distribution": self._confidence_distribution(),
+                "class_distribution": self.model.class_counts(self.model.questions[0]) if self.model.questions else {},
+                "question_distributions": {question: self.model.class_counts(question)
+                                           for question in self.model.questions}
+            })
+        
+        stats = dict(self._stats[1])
+        stats["learning_curve_steps"], stats["learning_curve"] = self._downsample_curve(points)
+        return stats
+    
+    def serialize_stats(self, points: Optional[int] = None) -> Dict:
+        """
+        Retourne les statistiques sérialisées en JSON, mises en cache jusqu'au prochain
+        changement de version de l'état
+        
+        Args:
+            points: Nombre maximal de valeurs de la courbe d'apprentissage (None: toutes)
+        
+        Returns:
+            Dictionnaire avec le corps JSON ("body") et son empreinte ("etag")
+        """
+        key = self.state_version
+        # Réponses des versions précédentes périmées ; quelques valeurs de points au plus
+        if self._serialized_stats_key != key or len(self._serialized_stats) >= 16:
+            self._serialized_stats = {}
+            self._serialized_stats_key = key
+        
+        cached = self._serialized_stats.get(points)
+        if cached is None:
+            body = json.dumps(self.get_stats(points), ensure_ascii=False, allow_nan=False,
+                              separators=(",", ":")).encode("utf-8")
+            cached = self._serialized_stats[points] = {
+                "body": body,
+                "etag": '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
             }
+        return cached
+    
+    def compare_selection(self, reference_space: FeatureSpace, k: int = 10) -> Dict:
+        """
+        Compare la sélection de ce learner à celle qu'obtiendrait un learner ayant les
+        mêmes classifications sur un autre espace (ex: caractéristiques en pleine
+        précision, pour mesurer l'effet d'une compression)
+        
+        Args:
+            reference_space: Espace de caractéristiques de référence (mêmes œuvres)
+            k: Nombre d'œuvres les mieux notées comparées
+        
+        Returns:
+            Dictionnaire contenant les k meilleures œuvres de chaque côté, leur
+            recouvrement, la corrélation de rang des scores et les temps de calcul
+        """
+        self._sync_rows()
+        reference = ActiveLearner(reference_space.features, reference_space.artwork_data,
+                                  seed_mode=self.seed_mode, block_size=self.block_size,
+                                  space=reference_space)
+        reference.labeled_indices = set(self.labeled_indices)
+        reference._labeled_mask = self._labeled_mask.copy()
+        reference.classifications = dict(self.classifications)
+        reference.model.rebuild(reference.features, reference.classifications)
         
+        started = time.perf_counter()
+        scores = self._selection_scores()
+        seconds = time.perf_counter() - started
+        started = time.perf_counter()
+        reference_scores = reference._selection_scores()[:self.num_artworks]
+        reference_seconds = time.perf_counter() - started
+        
+        available = np.flatnonzero(np.isfinite(scores) & np.isfinite(reference_scores))
+        k = min(k, len(available))
+        top = available[np.argsort(-scores[available], kind='stable')[:k]]
+        reference_top = available[np.argsort(-reference_scores[available], kind='stable')[:k]]
+        
+        # Corrélation de Spearman entre les deux notations
+        rank_correlation = None
+        if len(available) > 1:
+            ranks = np.argsort(np.argsort(scores[available]))
+            reference_ranks = np.argsort(np.argsort(reference_scores[available]))
+            if ranks.std() > 0 and reference_ranks.std() > 0:
+                rank_correlation = float(np.corrcoef(ranks, reference_ranks)[0, 1])
+        
+        ids = self.artwork_data['id']
         return {
-            "accuracy": float(self.accuracy),
-            "classified_count": len(self.labeled_indices),
-            "total_count": self.num_artworks,
-            "confidence_distribution": confidence_distribution,
-            "learning_curve": self.learning_curve,
-            "class_distribution": {cls: len([idx for idx, c in self.class_assignments.items() if c == cls]) 
-                                  for cls in set(self.class_assignments.values())} if self.class_assignments else {}
+            "k": k,
+            "top_ids": ids.iloc[top].astype(int).tolist(),
+            "reference_top_ids": ids.iloc[reference_top].astype(int).tolist(),
+            "overlap": len(set(top.tolist()) & set(reference_top.tolist())) / k if k else None,
+            "same_next": bool(k and top[0] == reference_top[0]),
+            "rank_correlation": rank_correlation,
+            "seconds": seconds,
+            "reference_seconds": reference_seconds
         }
+    
+    def _get_propagation(self) -> LabelPropagation:
+        """
+        Retourne la propagation des classifications, résolue entièrement à la première
+        utilisation et après l'ajout d'œuvres
+        
+        Le graphe kNN est partagé par l'espace, qui le construit normalement hors des
+        requêtes (FeatureSpace.extend_knn_graph) ; à défaut, il est construit ici par
+        recherche exacte.
+        """
+        self._sync_rows()
+        graph = self.space.knn_graph(self.knn_k)
+        if graph is None:
+            graph = self.space.extend_knn_graph(self.knn_k, block_size=self.block_size)
+        
+        if self._propagation is None or not self._propagation.is_current():
+            self._propagation = LabelPropagation(graph, alpha=self.propagation_alpha)
+            self._propagation.solve(self.classifications)
+        return self._propagation
+    
+    def get_predictions(self, offset: int = 0, limit: Optional[int] = None) -> List[Dict]:
+        """
+        Retourne, pour une page d'œuvres, la réponse prédite à chaque question par
+        propagation des classifications sur le graphe kNN, avec sa confiance
+        
+        Args:
+            offset: Ligne de la première œuvre
+            limit: Nombre maximal d'œuvres (None: toutes les suivantes)
+        
+        Returns:
+            Liste de dictionnaires {"id", "classified", "predictions": {question:
+            {"answer", "confidence"}}} ; une œuvre classifiée a ses propres réponses
+            (confiance 1), une œuvre qu'aucune classification n'atteint n'a pas de réponse
+        """
+        propagation = self._get_propagation()
+        end = self.num_artworks if limit is None else min(offset + limit, self.num_artworks)
+        rows = np.arange(min(offset, end), end)
+        predictions = propagation.predict(rows)
+        ids = self.artwork_data['id'].iloc[rows].astype(int).tolist()
+        
+        results = []
+        for position, row in enumerate(rows.tolist()):
+            classification = self.classifications.get(row, {})
+            answers = {}
+            for question, (labels, confidences) in predictions.items():
+                if question in classification:
+                    answers[question] = {"answer": str(classification[question]), "confidence": 1.0}
+                elif labels[position] is not None:
+                    answers[question] = {"answer": labels[position],
+                                         "confidence": float(confidences[position])}
+            results.append({"id": ids[position], "classified": row in self.classifications,
+                            "predictions": answers})
+        return results
 
+    def add_artworks(self, rows: pd.DataFrame, features: np.ndarray,
+                     feature_view: Optional[np.ndarray] = None,
+                     artwork_view: Optional[pd.DataFrame] = None) -> None:
+        """
+        Ajoute de nouvelles œuvres au learner sans le reconstruire : les tableaux et
+        caches internes sont étendus, et seules les nouvelles lignes sont évaluées
+        
+        Args:
+            rows: Métadonnées des nouvelles œuvres
+            features: Caractéristiques des nouvelles œuvres (une ligne par œuvre)
+            feature_view: Matrice complète déjà étendue (ex: stockage du DataManager),
+                utilisée telle quelle pour éviter une copie
+            artwork_view: DataFrame complet déjà étendu, utilisé tel quel
+        """
+        self.space.add_artworks(rows, features, feature_view=feature_view, artwork_view=artwork_view)
+        self._sync_rows()
+    
+    def _sync_rows(self) -> None:
+        """
+        Étend l'état propre au learner aux œuvres ajoutées à l'espace partagé
+        depuis la dernière synchronisation
+        """
+        features, artwork_data = self.space.view()
+        start = self.num_artworks
+        end = features.shape[0]
+        if end == start:
+            return
+        
+        self.features, self.artwork_data = features, artwork_data
+        self.num_artworks = end
+        self._labeled_mask = np.concatenate([self._labeled_mask, np.zeros(end - start, dtype=bool)])
+        
+        # Confiances des nouvelles lignes uniquement (si le cache est à jour)
+        if self._stats_cache_version == self._version and self._confidences is not None:
+            self._confidences = np.concatenate([self._confidences, self.model.confidence(features[start:end])])
+        
+        # La paire initiale n'est utile qu'avant la première classification
+        if self.seed_pair is not None and not self.labeled_indices:
+            self._extend_seed_pair(start)
+    
+    def _extend_seed_pair(self, start: int) -> None:
+        """
+        Met à jour la paire la plus éloignée en ne comparant que les nouvelles lignes
+        (à partir de start) à l'ensemble des œuvres
+        
+        Args:
+            start: Index de la première nouvelle ligne
+        """
+        norms = self._get_squared_norms()
+        i, j = self.seed_pair
+        best_distance = norms[i] + norms[j] - 2.0 * float(blockwise_dot(self.features[i], self.features[j]))
+        
+        for block_start in range(start, self.num_artworks, self.block_size):
+            block_end = min(block_start + self.block_size, self.num_artworks)
+            block = self.features[block_start:block_end]
+            
+            for other_start in range(0, self.num_artworks, self.block_size):
+                other_end = min(other_start + self.block_size, self.num_artworks)
+                distances = (norms[block_start:block_end, None] + norms[None, other_start:other_end]
+                             - 2.0 * blockwise_dot(block, self.features[other_start:other_end].T))
+                
+                flat_idx = np.argmax(distances)
+                if distances.flat[flat_idx] > best_distance:
+                    a, b = np.unravel_index(flat_idx, distances.shape)
+                    best_distance = distances.flat[flat_idx]
+                    self.seed_pair = (block_start + int(a), other_start + int(b))
+    
+    @timed("learner_save_state_seconds", "Durée de la sauvegarde de l'état du modèle")
     def save_state(self, filepath: str) -> None:
         """
-        Sauvegarde l'état du modèle
+        Sauvegarde un instantané complet de l'état du modèle (écriture atomique)
         
         Args:
             filepath: Chemin du fichier de sauvegarde
@@ -230,36 +844,79 @@ class ActiveLearner:
         state = {
             "labeled_indices": list(self.labeled_indices),
             "classifications": {str(k): v for k, v in self.classifications.items()},
-            "class_assignments": {str(k): v for k, v in self.class_assignments.items()},
-            "learning_curve": self.learning_curve,
-            "accuracy": self.accuracy
+            "learning_curve": self.learning_curve.tolist(),
+            "accuracy": self.accuracy,
+            "recent_hits": list(self._recent_hits),
+            "seed_pair": list(self.seed_pair) if self.seed_pair is not None else None,
+            "journal_seq": self.journal_seq
         }
         
-        with open(filepath, 'w') as f:
+        # Écrire dans un fichier temporaire puis le renommer : une interruption
+        # pendant l'écriture laisse l'instantané précédent intact
+        tmp_path = filepath + ".tmp"
+        with open(tmp_path, 'w') as f:
             json.dump(state, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, filepath)
     
-    def load_state(self, filepath: str) -> None:
+    @timed("learner_load_state_seconds", "Durée du chargement de l'état du modèle")
+    def load_state(self, filepath: str, journal: Optional[LabelJournal] = None) -> None:
         """
-        Charge l'état du modèle
+        Charge l'état du modèle : dernier instantané puis classifications du journal
+        postérieures à celui-ci
         
         Args:
             filepath: Chemin du fichier de sauvegarde
+            journal: Journal des classifications à rejouer
         """
-        if not os.path.exists(filepath):
+        state = None
+        if os.path.exists(filepath):
+            try:
+                with open(filepath, 'r') as f:
+                    state = json.load(f)
+            except (json.JSONDecodeError, UnicodeDecodeError) as e:
+                print(f"Instantané de l'état illisible, ignoré: {filepath} ({e})")
+        
+        self._sync_rows()
+        if state is not None:
+            self.labeled_indices = set(state["labeled_indices"])
+            self._labeled_mask = np.zeros(self.num_artworks, dtype=bool)
+            self._labeled_mask[list(self.labeled_indices)] = True
+            self.classifications = {int(k): v for k, v in state["classifications"].items()}
+            self.learning_curve = state["learning_curve"]
+            self.accuracy = state["accuracy"]
+            self._recent_hits.clear()
+            self._recent_hits.extend(state.get("recent_hits", []))
+            self.journal_seq = int(state.get("journal_seq", 0))
+            
+            # Paire initiale persistée (ignorée si elle ne correspond plus aux données)
+            seed_pair = state.get("seed_pair")
+            if seed_pair is not None and max(seed_pair) < self.num_artworks:
+                self.seed_pair = (int(seed_pair[0]), int(seed_pair[1]))
+            
+            # Recalculer les centroïdes de toutes les questions en une seule passe
+            self.model = MultiQuestionModel(self.features.shape[1])
+            self.model.rebuild(self.features, self.classifications)
+            self._propagation = None
+            self._version += 1
+        
+        if journal is None:
             return
         
-        with open(filepath, 'r') as f:
-            state = json.load(f)
-        
-        self.labeled_indices = set(state["labeled_indices"])
-        self.classifications = {int(k): v for k, v in state["classifications"].items()}
-        self.class_assignments = {int(k): v for k, v in state["class_assignments"].items()}
-        self.learning_curve = state["learning_curve"]
-        self.accuracy = state["accuracy"]
-        
-        # Recalculer les vecteurs de classe
-        classes = set(self.class_assignments.values())
-        for class_name in classes:
-            indices = [idx for idx, cls in self.class_assignments.items() if cls == class_name]
-            if indices:
-                self.class_vectors[class_name] = np.mean([self.features[idx] for idx in indices], axis=0) 
\ No newline at end of file
+        # Rejouer les classifications enregistrées après l'instantané
+        snapshot_seq = self.journal_seq
+        records = journal.read_after(snapshot_seq)
+        for record in records:
+            try:
+                if record["classification"] is None:
+                    self.remove_label(record["artwork_id"])
+                else:
+                    self.update(record["artwork_id"], record["classification"])
+            except ValueError as e:
+                print(f"Classification du journal ignorée: {e}")
+            self.journal_seq = record["seq"]
+        journal.advance_to(snapshot_seq)
+        
+        if records:
+            print(f"{len(records)} classifications rejouées depuis le journal")
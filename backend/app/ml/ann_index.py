@@ -0,0 +1,407 @@
+import hashlib
+import json
+import os
+import threading
+import uuid
+import numpy as np
+from typing import Iterable, List, Optional, Tuple
+
+# Taille maximale de la file des œuvres ajoutées (parcourue entièrement par chaque
+# requête) : au-delà, elles sont rangées dans les listes d'ajout
+TAIL_SIZE = 2048
+
+# Les listes d'ajout sont fusionnées dans les listes principales lorsqu'elles
+# dépassent cette fraction de l'index (coût amorti constant par ajout)
+DELTA_MERGE_RATIO = 0.05
+
+# Tableaux enregistrés par save (un fichier par tableau et par génération)
+SAVED_ARRAYS = ("centroids", "offsets", "rows", "vectors")
+
+class IVFIndex:
+    """
+    Index de plus proches voisins approché (IVF) sur les vecteurs de caractéristiques
+    normalisés (similarité cosinus), construit avec NumPy
+    
+    Un k-means sphérique partitionne les vecteurs en nlist listes ; une requête ne
+    parcourt que les nprobe listes dont le centroïde est le plus proche. Les vecteurs
+    sont rangés par liste (chaque liste est une tranche contiguë), ce qui permet de les
+    projeter en mémoire depuis le disque. Les œuvres ajoutées après la construction
+    sont gardées dans une courte file parcourue entièrement, puis rangées dans des
+    listes d'ajout (même partition, sondées avec les listes principales), elles-mêmes
+    fusionnées dans les listes principales lorsqu'elles deviennent trop grandes (sans
+    recalculer les centroïdes).
+    """
+    def __init__(self, nprobe: int = 8, nlist: Optional[int] = None, seed: int = 0,
+                 kmeans_iterations: int = 10, train_size_factor: int = 40):
+        """
+        Initialise un index vide
+        
+        Args:
+            nprobe: Nombre de listes parcourues par requête
+            nlist: Nombre de listes (par défaut √N, entre 1 et 4096)
+            seed: Graine du générateur aléatoire (échantillonnage du k-means)
+            kmeans_iterations: Nombre d'itérations du k-means
+            train_size_factor: Taille de l'échantillon d'entraînement, en multiple de nlist
+        """
+        self.nprobe = nprobe
+        self.nlist = nlist
+        self.seed = seed
+        self.kmeans_iterations = kmeans_iterations
+        self.train_size_factor = train_size_factor
+        
+        self.centroids: Optional[np.ndarray] = None  # nlist × d, normalisés
+        self.fingerprint: Optional[str] = None
+        
+        # Listes principales, listes d'ajout et file, publiées ensemble pour qu'une
+        # requête concurrente n'en voie jamais un état intermédiaire : (lignes d'origine
+        # et vecteurs normalisés rangés par liste, début de chaque liste) pour les listes
+        # principales puis pour les listes d'ajout, et (lignes, vecteurs) de la file
+        self._state: Optional[Tuple[np.ndarray, ...]] = None
+        self._lock = threading.Lock()
+    
+    def __len__(self) -> int:
+        if self._state is None:
+            return 0
+        return len(self._state[0]) + len(self._state[3]) + len(self._state[6])
+    
+    @staticmethod
+    def _normalize(features: np.ndarray) -> np.ndarray:
+        """
+        Normalise les lignes (les vecteurs nuls restent nuls)
+        """
+        features = np.asarray(features, dtype=np.float32)
+        norms = np.linalg.norm(features, axis=1, keepdims=True)
+        return features / np.maximum(norms, 1e-12)
+    
+    @staticmethod
+    def _fingerprint(features: np.ndarray) -> str:
+        """
+        Empreinte des premières lignes, pour détecter un index construit sur
+        d'autres caractéristiques
+        """
+        head = np.ascontiguousarray(features[:64], dtype=np.float32)
+        return hashlib.blake2b(head.tobytes(), digest_size=16).hexdigest()
+    
+    def _assign(self, vectors: np.ndarray, block_size: int = 16384) -> np.ndarray:
+        """
+        Retourne la liste (centroïde le plus proche) de chaque vecteur normalisé
+        """
+        labels = np.empty(len(vectors), dtype=np.int32)
+        for start in range(0, len(vectors), block_size):
+            block = vectors[start:start + block_size]
+            labels[start:start + block_size] = np.argmax(block @ self.centroids.T, axis=1)
+        return labels
+    
+    def _train(self, vectors: np.ndarray, nlist: int) -> None:
+        """
+        Calcule les centroïdes par k-means sphérique sur un échantillon
+        """
+        rng = np.random.default_rng(self.seed)
+        train_size = min(len(vectors), max(nlist * self.train_size_factor, 10000))
+        sample = vectors[np.sort(rng.choice(len(vectors), size=train_size, replace=False))]
+        
+        self.centroids = sample[rng.choice(train_size, size=nlist, replace=False)].copy()
+        for _ in range(self.kmeans_iterations):
+            labels = self._assign(sample)
+            order = np.argsort(labels, kind='stable')
+            counts = np.bincount(labels, minlength=nlist)
+            non_empty = np.flatnonzero(counts)
+            starts = np.concatenate([[0], np.cumsum(counts)[:-1]])[non_empty]
+            
+            sums = np.add.reduceat(sample[order], starts, axis=0)
+            self.centroids[non_empty] = self._normalize(sums)
+            
+            # Réinitialiser les listes vides sur des points de l'échantillon
+            empty = np.flatnonzero(counts == 0)
+            if len(empty):
+                self.centroids[empty] = sample[rng.choice(train_size, size=len(empty), replace=False)]
+    
+    def build(self, features: np.ndarray) -> None:
+        """
+        Construit l'index sur toutes les lignes de la matrice de caractéristiques
+        
+        Args:
+            features: Matrice de caractéristiques (une ligne par œuvre)
+        """
+        vectors = self._normalize(features)
+        n = len(vectors)
+        nlist = self.nlist or int(np.clip(round(np.sqrt(n)), 1, 4096))
+        nlist = max(1, min(nlist, n))
+        
+        self._train(vectors, nlist)
+        self._state = (self._pack(np.arange(n, dtype=np.int64), vectors, self._assign(vectors))
+                       + self._empty_lists() + self._empty_tail())
+        self.fingerprint = self._fingerprint(features)
+    
+    def _pack(self, rows: np.ndarray, vectors: np.ndarray, labels: np.ndarray) -> Tuple:
+        """
+        Range les vecteurs par liste : (lignes, vecteurs, début de chaque liste)
+        """
+        order = np.argsort(labels, kind='stable')
+        counts = np.bincount(labels, minlength=len(self.centroids))
+        offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+        return rows[order], vectors[order], offsets
+    
+    def _empty_lists(self) -> Tuple:
+        """
+        Listes vides (lignes, vecteurs, début de chaque liste)
+        """
+        return (np.zeros(0, dtype=np.int64), np.zeros((0, self.centroids.shape[1]), dtype=np.float32),
+                np.zeros(len(self.centroids) + 1, dtype=np.int64))
+    
+    def _empty_tail(self) -> Tuple:
+        """
+        File vide (lignes, vecteurs)
+        """
+        return np.zeros(0, dtype=np.int64), np.zeros((0, self.centroids.shape[1]), dtype=np.float32)
+    
+    def _labels(self, offsets: np.ndarray) -> np.ndarray:
+        """
+        Retourne la liste de chaque vecteur de listes rangées
+        """
+        return np.repeat(np.arange(len(self.centroids), dtype=np.int32), np.diff(offsets))
+    
+    @staticmethod
+    def _probed_lists(state: Tuple, probe: int) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Retourne les (lignes, vecteurs) non vides d'une liste, dans les listes
+        principales puis dans les listes d'ajout d'un état de l'index
+        """
+        lists = []
+        for rows, vectors, offsets in (state[0:3], state[3:6]):
+            start, end = offsets[probe], offsets[probe + 1]
+            if end > start:
+                lists.append((rows[start:end], vectors[start:end]))
+        return lists
+    
+    def add(self, features: np.ndarray, start_row: int) -> bool:
+        """
+        Ajoute de nouvelles œuvres à l'index
+        
+        Args:
+            features: Caractéristiques des nouvelles œuvres (une ligne par œuvre)
+            start_row: Ligne de la première nouvelle œuvre
+        
+        Returns:
+            True si les listes d'ajout ont été fusionnées dans les listes principales
+            (l'index mérite d'être réenregistré)
+        """
+        vectors = self._normalize(np.asarray(features).reshape(-1, self.centroids.shape[1]))
+        rows = np.arange(start_row, start_row + len(vectors), dtype=np.int64)
+        
+        with self._lock:
+            main = self._state[0:3]
+            delta_rows, delta_vectors, delta_offsets, tail_rows, tail_vectors = self._state[3:]
+            tail_rows = np.concatenate([tail_rows, rows])
+            tail_vectors = np.concatenate([tail_vectors, vectors])
+            
+            if len(tail_rows) <= TAIL_SIZE:
+                self._state = main + (delta_rows, delta_vectors, delta_offsets, tail_rows, tail_vectors)
+                return False
+            
+            # Ranger la file dans les listes d'ajout (centroïdes inchangés)
+            rows = np.concatenate([delta_rows, tail_rows])
+            vectors = np.concatenate([delta_vectors, tail_vectors])
+            labels = np.concatenate([self._labels(delta_offsets), self._assign(tail_vectors)])
+            if len(rows) <= max(TAIL_SIZE, DELTA_MERGE_RATIO * len(main[0])):
+                self._state = main + self._pack(rows, vectors, labels) + self._empty_tail()
+                return False
+            
+            # Fusionner les listes d'ajout dans les listes principales
+            list_rows, list_vectors, offsets = main
+            self._state = (self._pack(np.concatenate([np.asarray(list_rows), rows]),
+                                      np.concatenate([np.asarray(list_vectors), vectors]),
+                                      np.concatenate([self._labels(offsets), labels]))
+                           + self._empty_lists() + self._empty_tail())
+            return True
+    
+    def search(self, query: np.ndarray, k: int = 10, nprobe: Optional[int] = None,
+               exclude: Iterable[int] = ()) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Recherche les œuvres les plus similaires à un vecteur
+        
+        Args:
+            query: Vecteur de caractéristiques
+            k: Nombre de voisins
+            nprobe: Nombre de listes parcourues (par défaut celui de l'index)
+            exclude: Lignes à ne pas retourner (ex: l'œuvre de la requête)
+        
+        Returns:
+            Tuple (lignes, similarités cosinus), par similarité décroissante
+        """
+        if self.centroids is None:
+            raise ValueError("Index non construit")
+        
+        query = self._normalize(np.asarray(query).reshape(1, -1))[0]
+        nprobe = min(nprobe or self.nprobe, len(self.centroids))
+        state = self._state
+        tail_rows, tail_vectors = state[6:]
+        
+        # Listes dont le centroïde est le plus proche de la requête
+        probes = np.argpartition(-(self.centroids @ query), nprobe - 1)[:nprobe]
+        
+        candidate_rows = [tail_rows]
+        candidate_scores = [tail_vectors @ query if len(tail_rows) else np.zeros(0, dtype=np.float32)]
+        for probe in probes:
+            for rows, vectors in self._probed_lists(state, probe):
+                candidate_rows.append(rows)
+                candidate_scores.append(vectors @ query)
+        
+        candidate_rows = np.concatenate(candidate_rows)
+        candidate_scores = np.concatenate(candidate_scores)
+        
+        exclude = list(exclude)
+        if exclude:
+            keep = ~np.isin(candidate_rows, exclude)
+            candidate_rows, candidate_scores = candidate_rows[keep], candidate_scores[keep]
+        
+        k = min(k, len(candidate_rows))
+        if k == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        top = np.argpartition(-candidate_scores, k - 1)[:k]
+        top = top[np.argsort(-candidate_scores[top], kind='stable')]
+        return candidate_rows[top], candidate_scores[top]
+    
+    def search_many(self, queries: np.ndarray, k: int = 10, nprobe: Optional[int] = None,
+                    exclude_rows: Optional[np.ndarray] = None,
+                    block_size: int = 4096) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Recherche les voisins de plusieurs vecteurs à la fois : chaque liste parcourue
+        est comparée en un seul produit matriciel à toutes les requêtes qui la sondent
+        
+        Args:
+            queries: Matrice des vecteurs de requête (une ligne par requête)
+            k: Nombre de voisins par requête
+            nprobe: Nombre de listes parcourues (par défaut celui de l'index)
+            exclude_rows: Ligne à ne pas retourner pour chaque requête (ex: sa propre ligne)
+            block_size: Nombre de requêtes traitées à la fois
+        
+        Returns:
+            Tuple (lignes, similarités cosinus), deux matrices Q×k par similarité
+            décroissante ; les colonnes sans voisin ont la ligne -1 et la similarité -inf
+        """
+        if self.centroids is None:
+            raise ValueError("Index non construit")
+        
+        queries = self._normalize(np.asarray(queries).reshape(-1, self.centroids.shape[1]))
+        nprobe = min(nprobe or self.nprobe, len(self.centroids))
+        state = self._state
+        tail_rows, tail_vectors = state[6:]
+        
+        result_rows = np.full((len(queries), k), -1, dtype=np.int64)
+        result_scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        
+        def merge(members: np.ndarray, candidate_rows: np.ndarray, scores: np.ndarray) -> None:
+            # Meilleurs voisins parmi les k actuels et les nouveaux candidats
+            candidate_rows = np.broadcast_to(candidate_rows, scores.shape)
+            if exclude_rows is not None:
+                scores = np.where(candidate_rows == exclude_rows[members, None], -np.inf, scores)
+            all_rows = np.concatenate([result_rows[members], candidate_rows], axis=1)
+            all_scores = np.concatenate([result_scores[members], scores], axis=1)
+            top = np.argpartition(-all_scores, k - 1, axis=1)[:, :k]
+            result_rows[members] = np.take_along_axis(all_rows, top, axis=1)
+            result_scores[members] = np.take_along_axis(all_scores, top, axis=1)
+        
+        for block_start in range(0, len(queries), block_size):
+            block = queries[block_start:block_start + block_size]
+            members = np.arange(block_start, block_start + len(block))
+            if len(tail_rows):
+                merge(members, tail_rows, block @ tail_vectors.T)
+            
+            probes = np.argpartition(-(block @ self.centroids.T), nprobe - 1, axis=1)[:, :nprobe]
+            for probe in np.unique(probes):
+                lists = self._probed_lists(state, probe)
+                if not lists:
+                    continue
+                probing = np.flatnonzero((probes == probe).any(axis=1))
+                for rows, vectors in lists:
+                    merge(members[probing], rows, block[probing] @ vectors.T)
+        
+        order = np.argsort(-result_scores, axis=1, kind='stable')
+        return np.take_along_axis(result_rows, order, axis=1), np.take_along_axis(result_scores, order, axis=1)
+    
+    def save(self, directory: str) -> None:
+        """
+        Enregistre les listes principales (les œuvres des listes d'ajout et de la file,
+        toutes postérieures, sont réindexées au chargement)
+        
+        Les tableaux sont écrits sous un nouveau nom de génération, puis meta.json, qui
+        désigne la génération à charger, est remplacé en dernier : une interruption
+        laisse l'index précédent intact.
+        
+        Args:
+            directory: Répertoire de l'index
+        """
+        rows, vectors, offsets = self._state[0:3]
+        arrays = {"centroids": self.centroids, "offsets": offsets, "rows": rows, "vectors": vectors}
+        generation = uuid.uuid4().hex
+        
+        os.makedirs(directory, exist_ok=True)
+        for name, array in arrays.items():
+            tmp_path = os.path.join(directory, f"{name}.{generation}.tmp.npy")
+            np.save(tmp_path, np.asarray(array))
+            os.replace(tmp_path, os.path.join(directory, f"{name}.{generation}.npy"))
+        
+        # Les listes principales ne contiennent que les lignes 0..count-1
+        meta = {"count": len(rows), "nprobe": self.nprobe, "fingerprint": self.fingerprint,
+                "generation": generation}
+        tmp_path = os.path.join(directory, "meta.json.tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, os.path.join(directory, "meta.json"))
+        
+        # Supprimer les générations précédentes (un index déjà chargé garde ses
+        # fichiers ouverts)
+        current = {f"{name}.{generation}.npy" for name in SAVED_ARRAYS}
+        for filename in os.listdir(directory):
+            if (filename.endswith(".npy") and filename not in current
+                    and filename.split(".", 1)[0] in SAVED_ARRAYS):
+                try:
+                    os.remove(os.path.join(directory, filename))
+                except OSError:
+                    pass
+    
+    @classmethod
+    def load(cls, directory: str, features: np.ndarray) -> Optional["IVFIndex"]:
+        """
+        Charge un index enregistré (vecteurs projetés en mémoire) et y ajoute les
+        œuvres arrivées depuis son enregistrement
+        
+        Args:
+            directory: Répertoire de l'index
+            features: Matrice de caractéristiques courante
+        
+        Returns:
+            Index chargé, ou None s'il n'existe pas ou ne correspond plus aux caractéristiques
+        """
+        meta_path = os.path.join(directory, "meta.json")
+        if not os.path.exists(meta_path):
+            return None
+        
+        try:
+            with open(meta_path, 'r') as f:
+                meta = json.load(f)
+            generation = meta["generation"]
+            index = cls(nprobe=meta.get("nprobe", 8))
+            index.centroids = np.load(os.path.join(directory, f"centroids.{generation}.npy"))
+            offsets = np.load(os.path.join(directory, f"offsets.{generation}.npy"))
+            rows = np.load(os.path.join(directory, f"rows.{generation}.npy"), mmap_mode='r')
+            vectors = np.load(os.path.join(directory, f"vectors.{generation}.npy"), mmap_mode='r')
+            index.fingerprint = meta.get("fingerprint")
+        except Exception as e:
+            print(f"Erreur lors du chargement de l'index des voisins: {e}")
+            return None
+        
+        # Les tableaux doivent être cohérents entre eux et avec meta.json
+        count = int(meta["count"])
+        if (count != len(rows) or count != len(vectors) or len(offsets) != len(index.centroids) + 1
+                or offsets[-1] != count or count > len(features)
+                or index.centroids.shape[1] != features.shape[1]
+                or index.fingerprint != cls._fingerprint(features)):
+            print("Index des voisins obsolète, il sera reconstruit")
+            return None
+        
+        index._state = (rows, vectors, offsets) + index._empty_lists() + index._empty_tail()
+        if count < len(features):
+            index.add(features[count:], count)
+        return index
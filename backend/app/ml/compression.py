@@ -0,0 +1,163 @@
+import numpy as np
+from typing import Dict, Optional
+
+# Types de stockage possibles des caractéristiques compressées
+COMPRESSION_DTYPES = ("float16", "float32")
+
+def blockwise_dot(features: np.ndarray, matrix: np.ndarray, block_size: int = 16384) -> np.ndarray:
+    """
+    Calcule features @ matrix ; des caractéristiques en float16 sont converties en
+    float32 par blocs (le produit en float16 est lent et peu précis), sans copie
+    complète de la matrice
+    
+    Args:
+        features: Matrice de caractéristiques (N×d) ou vecteur (d,)
+        matrix: Matrice (d×C) ou vecteur (d,)
+        block_size: Nombre de lignes converties à la fois
+    
+    Returns:
+        Produit (N×C ou N,), en float32 pour des caractéristiques en float16
+    """
+    if features.dtype != np.float16:
+        return np.dot(features, matrix.astype(features.dtype, copy=False))
+    
+    matrix = matrix.astype(np.float32, copy=False)
+    if features.ndim == 1:
+        return np.dot(features.astype(np.float32), matrix)
+    
+    result = np.empty((features.shape[0],) + matrix.shape[1:], dtype=np.float32)
+    for start in range(0, features.shape[0], block_size):
+        block = features[start:start + block_size].astype(np.float32)
+        result[start:start + block_size] = np.dot(block, matrix)
+    return result
+
+class PCACompressor:
+    """
+    Projection des caractéristiques sur leurs k premières composantes principales,
+    stockée en précision réduite
+    
+    Les distances et produits scalaires utilisés par la sélection sont calculés sur
+    k dimensions au lieu de d, ce qui réduit d'autant la mémoire et le temps de
+    chaque requête. La part de variance conservée indique la perte d'information.
+    
+    La projection est centrée : les distances euclidiennes sont préservées (à la perte
+    d'information près), mais pas les similarités cosinus, qui dépendent de l'origine.
+    Les calculs cosinus (seuil de diversité des lots, poids du graphe kNN) doivent
+    porter sur uncenter(caractéristiques compressées).
+    """
+    def __init__(self, n_components: int = 64, dtype: str = "float32", block_size: int = 16384):
+        """
+        Initialise la projection (à ajuster avec fit)
+        
+        Args:
+            n_components: Nombre de composantes conservées
+            dtype: Type de stockage des caractéristiques compressées (float16 ou float32)
+            block_size: Nombre de lignes traitées à la fois
+        """
+        if n_components < 1:
+            raise ValueError("n_components doit être supérieur ou égal à 1")
+        if dtype not in COMPRESSION_DTYPES:
+            raise ValueError(f"Type inconnu: {dtype} (attendu: {', '.join(COMPRESSION_DTYPES)})")
+        
+        self.n_components = n_components
+        self.dtype = np.dtype(dtype)
+        self.block_size = block_size
+        
+        self.mean: Optional[np.ndarray] = None
+        self.components: Optional[np.ndarray] = None  # k × d
+        self.explained_variance: Optional[float] = None
+        self.input_dim: Optional[int] = None
+    
+    @property
+    def fitted(self) -> bool:
+        return self.components is not None
+    
+    def fit(self, features: np.ndarray) -> "PCACompressor":
+        """
+        Calcule les composantes principales (matrice de covariance d×d accumulée par
+        blocs, puis décomposition en valeurs propres)
+        
+        Args:
+            features: Matrice de caractéristiques (une ligne par œuvre)
+        
+        Returns:
+            La projection ajustée
+        """
+        num_rows, dim = features.shape
+        if num_rows == 0:
+            raise ValueError("Impossible d'ajuster la projection sans caractéristiques")
+        
+        mean = np.zeros(dim, dtype=np.float64)
+        for start in range(0, num_rows, self.block_size):
+            mean += features[start:start + self.block_size].sum(axis=0, dtype=np.float64)
+        mean /= num_rows
+        
+        covariance = np.zeros((dim, dim), dtype=np.float64)
+        for start in range(0, num_rows, self.block_size):
+            block = features[start:start + self.block_size].astype(np.float64) - mean
+            covariance += block.T @ block
+        
+        eigenvalues, eigenvectors = np.linalg.eigh(covariance)
+        order = np.argsort(eigenvalues)[::-1]
+        eigenvalues = np.maximum(eigenvalues[order], 0.0)
+        n_components = min(self.n_components, dim)
+        
+        self.mean = mean.astype(np.float32)
+        self.components = eigenvectors[:, order[:n_components]].T.astype(np.float32)
+        total = eigenvalues.sum()
+        self.explained_variance = float(eigenvalues[:n_components].sum() / total) if total > 0 else 1.0
+        self.input_dim = dim
+        return self
+    
+    def transform(self, features: np.ndarray) -> np.ndarray:
+        """
+        Projette des caractéristiques sur les composantes principales
+        
+        Args:
+            features: Matrice de caractéristiques (une ligne par œuvre)
+        
+        Returns:
+            Matrice compressée (N×k) dans le type de stockage
+        """
+        if not self.fitted:
+            raise ValueError("La projection doit être ajustée avant utilisation")
+        
+        features = np.asarray(features).reshape(-1, self.input_dim)
+        result = np.empty((features.shape[0], self.components.shape[0]), dtype=self.dtype)
+        for start in range(0, features.shape[0], self.block_size):
+            block = features[start:start + self.block_size].astype(np.float32) - self.mean
+            result[start:start + self.block_size] = block @ self.components.T
+        return result
+    
+    def uncenter(self, features: np.ndarray) -> np.ndarray:
+        """
+        Retourne des vecteurs dont les produits scalaires approchent ceux des
+        caractéristiques d'origine (non centrées) : moyenne projetée rajoutée, plus une
+        colonne constante pour la part de la moyenne hors des composantes conservées
+        
+        Args:
+            features: Caractéristiques compressées (N×k)
+        
+        Returns:
+            Matrice N×(k+1) en float32, utilisable pour des similarités cosinus
+        """
+        if not self.fitted:
+            raise ValueError("La projection doit être ajustée avant utilisation")
+        
+        projected_mean = self.components @ self.mean
+        residual = max(float(self.mean @ self.mean - projected_mean @ projected_mean), 0.0)
+        features = np.asarray(features, dtype=np.float32).reshape(-1, self.components.shape[0])
+        return np.hstack([features + projected_mean,
+                          np.full((features.shape[0], 1), np.sqrt(residual), dtype=np.float32)])
+    
+    def describe(self) -> Dict:
+        """
+        Décrit la projection (dimensions, type, variance conservée)
+        """
+        return {
+            "n_components": int(self.components.shape[0]) if self.fitted else self.n_components,
+            "input_dim": self.input_dim,
+            "dtype": self.dtype.name,
+            "explained_variance": self.explained_variance,
+            "bytes_per_row": int(self.components.shape[0] * self.dtype.itemsize) if self.fitted else None
+        }
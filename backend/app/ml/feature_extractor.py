@@ -3,14 +3,53 @@ import timm
 import numpy as np
 from torchvision import transforms
 from PIL import Image
+import hashlib
+import inspect
 import os
-from typing import List, Optional
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from ..utils.metrics import timer
+
+# Backends d'inférence disponibles
+BACKENDS = ("eager", "torchscript", "onnx", "onnx-int8")
+
+# Version de l'opset des graphes ONNX exportés
+ONNX_OPSET = 17
+
+# Répertoire par défaut des graphes ONNX exportés (dans les données du backend)
+DEFAULT_EXPORT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+                                  'data', 'onnx')
 
 class FeatureExtractor:
     """
     Extracteur de caractéristiques utilisant un modèle ResNet18 préentraîné
+    
+    L'inférence peut être faite par le modèle PyTorch en mode eager (par défaut), par
+    un modèle TorchScript figé, ou par un graphe ONNX exécuté par onnxruntime, en
+    float32 ou quantifié dynamiquement en int8 (poids int8, activations quantifiées à
+    la volée). Les backends ONNX nécessitent onnxruntime.
     """
-    def __init__(self, model_name: str = 'resnet18', device: Optional[str] = None):
+    def __init__(self, model_name: str = 'resnet18', device: Optional[str] = None,
+                 num_workers: Optional[int] = None, backend: str = 'eager',
+                 export_dir: Optional[str] = None):
+        """
+        Charge le modèle et prépare le backend d'inférence
+        
+        Args:
+            model_name: Nom du modèle timm
+            device: Device PyTorch (par défaut cuda si disponible, sinon cpu) ;
+                les backends ONNX s'exécutent sur CPU
+            num_workers: Nombre de threads de décodage / prétraitement des images
+            backend: Backend d'inférence parmi BACKENDS
+            export_dir: Répertoire des graphes ONNX exportés (réutilisés d'une exécution
+                à l'autre tant que les poids, l'opset et la quantification sont les
+                mêmes), par défaut DEFAULT_EXPORT_DIR
+        """
+        if backend not in BACKENDS:
+            raise ValueError(f"Backend inconnu: {backend} (disponibles: {', '.join(BACKENDS)})")
+        
         # Déterminer le device (CPU ou GPU)
         if device is None:
             self.device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
@@ -18,18 +57,176 @@ class FeatureExtractor:
             self.device = torch.device(device)
         
         # Charger le modèle préentraîné sans la couche de classification
+        # (conservé quel que soit le backend : référence pour le contrôle de parité)
+        self.model_name = model_name
         self.model = timm.create_model(model_name, pretrained=True, num_classes=0)
         self.model.eval()
         self.model.to(self.device)
+        self.num_features = self.model.num_features
+        
+        self.backend = backend
+        self.export_dir = export_dir or DEFAULT_EXPORT_DIR
+        self._scripted = None
+        self._session = None
+        if backend == 'torchscript':
+            self._scripted = self._build_torchscript()
+        elif backend in ('onnx', 'onnx-int8'):
+            self._session = self._build_onnx_session(quantized=backend == 'onnx-int8')
+        
+        # Nombre de threads de décodage / prétraitement des images
+        self.num_workers = num_workers if num_workers is not None else min(8, os.cpu_count() or 1)
+        
+        # Débit (images/s) de la dernière extraction par lot
+        self.last_throughput: Optional[float] = None
         
         # Définir les transformations pour les images
+        self.resize_size = 256
         self.transform = transforms.Compose([
-            transforms.Resize(256),
+            transforms.Resize(self.resize_size),
             transforms.CenterCrop(224),
             transforms.ToTensor(),
             transforms.Normalize(mean=[0.485, 0.456, 0.406], std=[0.229, 0.224, 0.225]),
         ])
     
+    def _build_torchscript(self):
+        """
+        Trace le modèle puis le fige (poids constants, fusion convolution + batchnorm)
+        """
+        example = torch.zeros(1, 3, 224, 224, device=self.device)
+        with torch.no_grad():
+            traced = torch.jit.trace(self.model, example)
+            return torch.jit.optimize_for_inference(torch.jit.freeze(traced))
+    
+    def _weights_digest(self) -> str:
+        """
+        Empreinte des poids du modèle (noms, formes et valeurs des paramètres)
+        """
+        digest = hashlib.blake2b(digest_size=8)
+        for name, tensor in sorted(self.model.state_dict().items()):
+            digest.update(name.encode())
+            digest.update(str(tuple(tensor.shape)).encode())
+            digest.update(tensor.detach().cpu().contiguous().numpy().tobytes())
+        return digest.hexdigest()
+    
+    @staticmethod
+    def _tmp_path(path: str) -> str:
+        """
+        Chemin temporaire propre au processus, renommé ensuite en path (écriture atomique)
+        """
+        root, extension = os.path.splitext(path)
+        return f"{root}.{os.getpid()}.tmp{extension}"
+    
+    def _build_onnx_session(self, quantized: bool):
+        """
+        Exporte le modèle en ONNX (axe de lot dynamique), le quantifie en int8 si
+        demandé, puis ouvre une session onnxruntime sur CPU
+        """
+        try:
+            import onnxruntime as ort
+        except ImportError:
+            raise ImportError("onnxruntime est requis pour les backends onnx (pip install onnxruntime)")
+        
+        os.makedirs(self.export_dir, exist_ok=True)
+        # Clé du cache : un graphe exporté d'autres poids ou avec un autre opset n'est
+        # jamais réutilisé
+        cache_key = f"{self.model_name}-{self._weights_digest()}-opset{ONNX_OPSET}"
+        onnx_path = os.path.join(self.export_dir, f"{cache_key}.onnx")
+        if not os.path.exists(onnx_path):
+            tmp_path = self._tmp_path(onnx_path)
+            # Exporteur par traçage (l'exporteur dynamo, par défaut dans les versions
+            # récentes de PyTorch, gère moins bien l'axe de lot dynamique)
+            export_options = {'dynamo': False} if 'dynamo' in inspect.signature(torch.onnx.export).parameters else {}
+            try:
+                torch.onnx.export(
+                    self.model.cpu(), torch.zeros(1, 3, 224, 224), tmp_path,
+                    input_names=['input'], output_names=['features'],
+                    dynamic_axes={'input': {0: 'batch'}, 'features': {0: 'batch'}},
+                    opset_version=ONNX_OPSET, **export_options
+                )
+                os.replace(tmp_path, onnx_path)
+            finally:
+                self.model.to(self.device)
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+        
+        if quantized:
+            from onnxruntime.quantization import QuantType, quantize_dynamic
+            from onnxruntime.quantization.shape_inference import quant_pre_process
+            int8_path = os.path.join(self.export_dir, f"{cache_key}.int8-quint8.onnx")
+            if not os.path.exists(int8_path):
+                # Optimisation préalable du graphe (poids constants repliés en initializers),
+                # dans des fichiers temporaires propres à ce processus
+                prepared_path = self._tmp_path(os.path.join(self.export_dir, f"{cache_key}.prepared.onnx"))
+                tmp_path = self._tmp_path(int8_path)
+                try:
+                    quant_pre_process(onnx_path, prepared_path)
+                    quantize_dynamic(prepared_path, tmp_path, weight_type=QuantType.QUInt8)
+                    os.replace(tmp_path, int8_path)
+                finally:
+                    for path in (prepared_path, tmp_path):
+                        if os.path.exists(path):
+                            os.remove(path)
+            onnx_path = int8_path
+        
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        return ort.InferenceSession(onnx_path, options, providers=['CPUExecutionProvider'])
+    
+    def _infer(self, batch: torch.Tensor) -> np.ndarray:
+        """
+        Calcule les caractéristiques d'un lot de tenseurs avec le backend choisi
+        
+        Args:
+            batch: Tenseur N×3×224×224 normalisé
+        
+        Returns:
+            Matrice N×num_features en float32
+        """
+        with timer("feature_extractor_seconds", "Durée du décodage d'une image ou de l'inférence d'un lot",
+                   stage="forward", backend=self.backend):
+            if self._session is not None:
+                inputs = {self._session.get_inputs()[0].name: batch.cpu().numpy()}
+                return self._session.run(None, inputs)[0].astype(np.float32, copy=False)
+            
+            model = self._scripted if self._scripted is not None else self.model
+            with torch.no_grad():
+                return model(batch.to(self.device)).cpu().numpy()
+    
+    def _open_image(self, image_path: str) -> Image.Image:
+        """
+        Ouvre une image en RGB, en laissant le décodeur JPEG réduire l'image
+        (mode draft) à la plus petite échelle restant au moins aussi grande que la
+        taille de redimensionnement
+        
+        Args:
+            image_path: Chemin vers l'image
+        
+        Returns:
+            Image RGB
+        """
+        image = Image.open(image_path)
+        if image.format == 'JPEG':
+            image.draft('RGB', (self.resize_size, self.resize_size))
+        return image.convert('RGB')
+    
+    def _load_tensor(self, image_path: str) -> torch.Tensor:
+        """
+        Décode et prétraite une image (tenseur de zéros en cas d'erreur)
+        
+        Args:
+            image_path: Chemin vers l'image
+        
+        Returns:
+            Tenseur 3×224×224 normalisé
+        """
+        try:
+            with timer("feature_extractor_seconds", "Durée du décodage d'une image ou de l'inférence d'un lot",
+                       stage="decode", backend=self.backend):
+                return self.transform(self._open_image(image_path))
+        except Exception as e:
+            print(f"Erreur lors du chargement de {image_path}: {e}")
+            return torch.zeros(3, 224, 224)
+    
     def extract_features(self, image_path: str) -> np.ndarray:
         """
         Extrait les caractéristiques d'une image
@@ -42,24 +239,24 @@ class FeatureExtractor:
         """
         try:
             # Charger et transformer l'image
-            image = Image.open(image_path).convert('RGB')
-            image_tensor = self.transform(image).unsqueeze(0).to(self.device)
+            image = self._open_image(image_path)
+            image_tensor = self.transform(image).unsqueeze(0)
             
             # Extraire les caractéristiques
-            with torch.no_grad():
-                features = self.model(image_tensor)
-            
-            return features.cpu().numpy().flatten()
+            return self._infer(image_tensor).flatten()
         
         except Exception as e:
             print(f"Erreur lors de l'extraction des caractéristiques de {image_path}: {e}")
             # Retourner un vecteur de zéros en cas d'erreur
-            return np.zeros(512)  # ResNet18 produit un vecteur de 512 dimensions
+            return np.zeros(self.num_features)  # 512 dimensions pour ResNet18
     
     def batch_extract_features(self, image_paths: List[str], batch_size: int = 32) -> np.ndarray:
         """
         Extrait les caractéristiques d'un lot d'images
         
+        Le décodage et le prétraitement du lot suivant sont effectués par un pool de
+        threads pendant que le modèle traite le lot courant.
+        
         Args:
             image_paths: Liste des chemins d'images
             batch_size: Taille du lot pour le traitement
@@ -67,30 +264,78 @@ class FeatureExtractor:
         Returns:
             Matrice de caractéristiques (une ligne par image)
         """
+        batches = [image_paths[i:i+batch_size] for i in range(0, len(image_paths), batch_size)]
+        if not batches:
+            return np.zeros((0, self.num_features), dtype=np.float32)
+        
         all_features = []
+        start_time = time.perf_counter()
         
-        for i in range(0, len(image_paths), batch_size):
-            batch_paths = image_paths[i:i+batch_size]
-            batch_tensors = []
-            
-            for path in batch_paths:
-                try:
-                    image = Image.open(path).convert('RGB')
-                    tensor = self.transform(image)
-                    batch_tensors.append(tensor)
-                except Exception as e:
-                    print(f"Erreur lors du chargement de {path}: {e}")
-                    # Ajouter un tenseur de zéros en cas d'erreur
-                    batch_tensors.append(torch.zeros(3, 224, 224))
+        with ThreadPoolExecutor(max_workers=self.num_workers) as pool:
+            # Lancer le prétraitement du premier lot
+            pending = [pool.submit(self._load_tensor, path) for path in batches[0]]
             
-            # Combiner les tensors en un seul batch
-            batch = torch.stack(batch_tensors).to(self.device)
-            
-            # Extraire les caractéristiques
-            with torch.no_grad():
-                features = self.model(batch)
-            
-            all_features.append(features.cpu().numpy())
+            for batch_index in range(len(batches)):
+                batch_tensors = [future.result() for future in pending]
+                
+                # Prétraiter le lot suivant pendant l'inférence du lot courant
+                if batch_index + 1 < len(batches):
+                    pending = [pool.submit(self._load_tensor, path) for path in batches[batch_index + 1]]
+                
+                # Combiner les tensors en un seul batch et extraire les caractéristiques
+                all_features.append(self._infer(torch.stack(batch_tensors)))
+        
+        elapsed = time.perf_counter() - start_time
+        self.last_throughput = len(image_paths) / elapsed if elapsed > 0 else None
+        print(f"Caractéristiques extraites pour {len(image_paths)} images en {elapsed:.1f}s "
+              f"({self.last_throughput or 0:.1f} images/s, backend {self.backend})")
         
         # Concaténer tous les lots
-        return np.vstack(all_features) 
\ No newline at end of file
+        return np.vstack(all_features)
+    
+    def parity_check(self, image_paths: List[str], batch_size: int = 32) -> Dict:
+        """
+        Compare les caractéristiques du backend choisi à celles du modèle eager
+        
+        Args:
+            image_paths: Images de l'échantillon de contrôle
+            batch_size: Taille du lot pour le traitement
+        
+        Returns:
+            Dictionnaire avec la similarité cosinus (moyenne, minimale) entre les deux
+            extractions et leurs débits respectifs (images/s)
+        """
+        if not image_paths:
+            raise ValueError("Aucune image pour le contrôle de parité")
+        
+        tensors = [self._load_tensor(path) for path in image_paths]
+        batches = [torch.stack(tensors[i:i + batch_size]) for i in range(0, len(tensors), batch_size)]
+        
+        def run(infer) -> Tuple[np.ndarray, float]:
+            start = time.perf_counter()
+            features = np.vstack([infer(batch) for batch in batches])
+            return features, len(tensors) / max(time.perf_counter() - start, 1e-9)
+        
+        def infer_eager(batch: torch.Tensor) -> np.ndarray:
+            with torch.no_grad():
+                return self.model(batch.to(self.device)).cpu().numpy()
+        
+        reference, eager_throughput = run(infer_eager)
+        features, backend_throughput = run(self._infer)
+        
+        norms = np.linalg.norm(reference, axis=1) * np.linalg.norm(features, axis=1)
+        cosine = np.einsum('ij,ij->i', reference, features) / np.maximum(norms, 1e-12)
+        
+        report = {
+            "backend": self.backend,
+            "images": len(tensors),
+            "cosine_mean": float(np.mean(cosine)),
+            "cosine_min": float(np.min(cosine)),
+            "eager_images_per_s": eager_throughput,
+            "backend_images_per_s": backend_throughput,
+            "speedup": backend_throughput / eager_throughput
+        }
+        print(f"Contrôle de parité ({self.backend}, {len(tensors)} images): similarité cosinus "
+              f"moyenne {report['cosine_mean']:.4f}, minimale {report['cosine_min']:.4f}, "
+              f"accélération x{report['speedup']:.2f}")
+        return report
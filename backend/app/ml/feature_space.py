@@ -0,0 +1,191 @@
+import threading
+import numpy as np
+import pandas as pd
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from .ann_index import IVFIndex
+from .compression import PCACompressor
+from .label_propagation import KNNGraph
+
+class FeatureSpace:
+    """
+    Caractéristiques et métadonnées des œuvres, partagées en lecture seule par
+    plusieurs learners (une session de classification n'en garde que des vues)
+    
+    L'index ID -> ligne, les normes carrées et les résultats dérivés des seules
+    caractéristiques (ex: paire initiale la plus éloignée) sont calculés une fois
+    pour toutes les sessions.
+    
+    Avec une projection PCA, l'espace ne garde que les caractéristiques compressées :
+    tous les calculs des learners portent alors sur celles-ci.
+    """
+    def __init__(self, features: np.ndarray, artwork_data: pd.DataFrame,
+                 compression: Optional[PCACompressor] = None):
+        """
+        Initialise l'espace partagé
+        
+        Args:
+            features: Matrice de caractéristiques (une ligne par œuvre)
+            artwork_data: DataFrame contenant les métadonnées des œuvres
+            compression: Projection appliquée aux caractéristiques (ajustée sur
+                features si elle ne l'est pas encore)
+        """
+        self.compression = compression
+        if compression is not None:
+            if not compression.fitted:
+                compression.fit(features)
+            features = compression.transform(features)
+        
+        # Caractéristiques et métadonnées publiées ensemble, pour qu'un lecteur
+        # concurrent n'en voie jamais des versions de tailles différentes
+        self._view: Tuple[np.ndarray, pd.DataFrame] = (features, artwork_data)
+        
+        # Index ID d'œuvre -> ligne (position dans features et artwork_data)
+        self.id_to_row: Dict[int, int] = dict(zip(artwork_data['id'].astype(int).tolist(),
+                                                  range(len(artwork_data))))
+        self._squared_norms: Optional[np.ndarray] = None
+        self._memo: Dict[Hashable, Any] = {}
+        self._lock = threading.Lock()
+        # Calculs partagés (mémorisation, graphe kNN), un seul à la fois
+        self._memo_lock = threading.RLock()
+        
+        # Incrémentée à chaque ajout d'œuvres
+        self.version = 0
+    
+    @property
+    def features(self) -> np.ndarray:
+        return self._view[0]
+    
+    @property
+    def artwork_data(self) -> pd.DataFrame:
+        return self._view[1]
+    
+    @property
+    def num_artworks(self) -> int:
+        return self._view[0].shape[0]
+    
+    def view(self) -> Tuple[np.ndarray, pd.DataFrame]:
+        """
+        Retourne les caractéristiques et les métadonnées courantes (cohérentes entre elles)
+        """
+        return self._view
+    
+    def squared_norms(self) -> np.ndarray:
+        """
+        Retourne (et met en cache) les normes carrées des vecteurs de caractéristiques
+        """
+        norms = self._squared_norms
+        if norms is None:
+            with self._lock:
+                if self._squared_norms is None:
+                    features = self.features
+                    self._squared_norms = np.einsum('ij,ij->i', features, features, dtype=np.float64)
+                norms = self._squared_norms
+        return norms
+    
+    def memoize(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """
+        Retourne un résultat partagé entre les sessions, calculé au premier appel
+        
+        Args:
+            key: Clé du résultat (doit inclure le nombre d'œuvres si le résultat en dépend)
+            compute: Fonction calculant le résultat
+        
+        Returns:
+            Résultat mis en cache
+        """
+        if key not in self._memo:
+            with self._memo_lock:
+                if key not in self._memo:
+                    self._memo[key] = compute()
+        return self._memo[key]
+    
+    def extend_knn_graph(self, k: int, features: Optional[np.ndarray] = None,
+                         index: Optional[IVFIndex] = None, block_size: int = 2048) -> KNNGraph:
+        """
+        Construit ou étend le graphe kNN partagé jusqu'à la dernière œuvre, un seul
+        appel à la fois (à lancer hors des requêtes : au chargement et après un ajout)
+        
+        Args:
+            k: Nombre de voisins par œuvre
+            features: Caractéristiques utilisées pour la recherche des voisins (par défaut
+                celles de l'espace, décentrées si elles sont compressées ; ex:
+                caractéristiques en pleine précision de l'index)
+            index: Index des plus proches voisins couvrant features (sans index, recherche
+                exacte par blocs)
+            block_size: Nombre de lignes par bloc de la recherche exacte
+        
+        Returns:
+            Graphe couvrant toutes les œuvres de features
+        """
+        with self._memo_lock:
+            graph = self.memoize(("knn_graph", k), lambda: KNNGraph(k, block_size=block_size))
+            if features is None:
+                features = self.features
+                if self.compression is not None:
+                    features = self.compression.uncenter(features)
+            graph.extend(features, index=index)
+        return graph
+    
+    def knn_graph(self, k: int) -> Optional[KNNGraph]:
+        """
+        Retourne le graphe kNN partagé s'il couvre toutes les œuvres de l'espace (None
+        s'il n'est pas encore construit ou pas encore étendu aux dernières œuvres)
+        """
+        graph = self._memo.get(("knn_graph", k))
+        if graph is None or graph.num_nodes < self.num_artworks:
+            return None
+        return graph
+    
+    def add_artworks(self, rows: pd.DataFrame, features: np.ndarray,
+                     feature_view: Optional[np.ndarray] = None,
+                     artwork_view: Optional[pd.DataFrame] = None) -> int:
+        """
+        Ajoute de nouvelles œuvres à l'espace partagé
+        
+        Args:
+            rows: Métadonnées des nouvelles œuvres
+            features: Caractéristiques des nouvelles œuvres (une ligne par œuvre)
+            feature_view: Matrice complète déjà étendue (ex: stockage du DataManager),
+                utilisée telle quelle pour éviter une copie (ignorée avec une projection)
+            artwork_view: DataFrame complet déjà étendu, utilisé tel quel
+        
+        Returns:
+            Index de la première ligne ajoutée
+        """
+        features = np.asarray(features).reshape(len(rows), -1)
+        num_new = len(rows)
+        if self.compression is not None:
+            features = self.compression.transform(features)
+            feature_view = None
+        
+        with self._lock:
+            current_features, current_data = self._view
+            start = current_features.shape[0]
+            end = start + num_new
+            if num_new == 0:
+                return start
+            
+            if feature_view is not None:
+                if feature_view.shape[0] != end:
+                    raise ValueError(f"feature_view doit contenir {end} lignes ({feature_view.shape[0]} reçues)")
+                new_features = feature_view
+            else:
+                new_features = np.concatenate([current_features, features.astype(current_features.dtype)])
+            
+            if artwork_view is not None:
+                new_data = artwork_view
+            else:
+                new_data = pd.concat([current_data, rows], ignore_index=True)
+            
+            # Normes des nouvelles lignes uniquement
+            if self._squared_norms is not None:
+                new_norms = np.einsum('ij,ij->i', features, features, dtype=np.float64)
+                self._squared_norms = np.concatenate([self._squared_norms, new_norms])
+            
+            # L'index est complété avant la publication de la nouvelle vue : les lignes
+            # au-delà de la vue d'un learner sont ignorées par celui-ci
+            self.id_to_row.update(zip(rows['id'].astype(int).tolist(), range(start, end)))
+            self._view = (new_features, new_data)
+            self.version += 1
+            return start
@@ -0,0 +1,349 @@
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .ann_index import IVFIndex
+
+class KNNGraph:
+    """
+    Graphe des k plus proches voisins (similarité cosinus), symétrisé et stocké au
+    format CSR (indptr, indices, poids)
+    
+    Le graphe ne dépend que des caractéristiques : il est partagé par toutes les
+    campagnes et étendu, sans être reconstruit, lorsque des œuvres sont ajoutées
+    (seuls les voisins des nouvelles œuvres sont calculés).
+    """
+    def __init__(self, k: int = 10, block_size: int = 2048):
+        """
+        Initialise un graphe vide
+        
+        Args:
+            k: Nombre de voisins calculés par œuvre
+            block_size: Nombre de lignes par bloc pour le calcul des similarités
+        """
+        if k < 1:
+            raise ValueError("k doit être supérieur ou égal à 1")
+        
+        self.k = k
+        self.block_size = block_size
+        
+        # Voisins sortants de chaque œuvre et similarités correspondantes
+        self._neighbors = np.zeros((0, k), dtype=np.int64)
+        self._similarities = np.zeros((0, k), dtype=np.float32)
+        
+        # (indptr, indices, poids, degrés) publiés ensemble
+        self._csr: Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray] = (
+            np.zeros(1, dtype=np.int64), np.zeros(0, dtype=np.int64),
+            np.zeros(0, dtype=np.float32), np.zeros(0, dtype=np.float64))
+        self._lock = threading.Lock()
+        
+        # Incrémentée à chaque extension du graphe
+        self.version = 0
+    
+    @property
+    def num_nodes(self) -> int:
+        return len(self._csr[0]) - 1
+    
+    def csr(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Retourne (indptr, indices, poids, degrés) du graphe symétrisé
+        """
+        return self._csr
+    
+    def extend(self, features: np.ndarray, index: Optional[IVFIndex] = None) -> None:
+        """
+        Calcule les voisins des lignes de features absentes du graphe
+        
+        Args:
+            features: Matrice de caractéristiques complète (une ligne par œuvre)
+            index: Index des plus proches voisins couvrant ces lignes ; sans index, les
+                similarités avec toutes les œuvres sont calculées par blocs (O(N²·d)
+                à la construction)
+        """
+        with self._lock:
+            start = len(self._neighbors)
+            end = features.shape[0]
+            if end <= start:
+                return
+            
+            if index is not None:
+                neighbors, similarities = self._search_index(features, start, end, index)
+            else:
+                neighbors, similarities = self._search_exact(features, start, end)
+            
+            self._neighbors = np.concatenate([self._neighbors, neighbors])
+            self._similarities = np.concatenate([self._similarities, similarities])
+            self._csr = self._symmetrize(end)
+            self.version += 1
+    
+    def _search_index(self, features: np.ndarray, start: int, end: int,
+                      index: IVFIndex) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Voisins approchés des lignes start à end, recherchés dans l'index
+        """
+        own_rows = np.arange(start, end, dtype=np.int64)
+        neighbors, similarities = index.search_many(features[start:end], self.k, exclude_rows=own_rows)
+        
+        # Colonnes sans voisin (ou voisin hors du graphe) : boucle de poids nul
+        missing = (neighbors < 0) | (neighbors >= end)
+        neighbors = np.where(missing, own_rows[:, None], neighbors)
+        similarities = np.where(missing, 0.0, similarities).astype(np.float32)
+        return neighbors, similarities
+    
+    def _search_exact(self, features: np.ndarray, start: int, end: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Voisins exacts des lignes start à end, par blocs de similarités avec toutes les œuvres
+        """
+        vectors = np.asarray(features, dtype=np.float32)
+        vectors = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        k = min(self.k, end - 1)
+        
+        # Blocs de lignes dont les similarités avec toutes les œuvres tiennent
+        # dans block_size² valeurs
+        rows_per_block = max(1, self.block_size * self.block_size // end)
+        
+        neighbors = np.zeros((end - start, self.k), dtype=np.int64)
+        similarities = np.zeros((end - start, self.k), dtype=np.float32)
+        for block_start in range(start, end, rows_per_block):
+            block_end = min(block_start + rows_per_block, end)
+            scores = vectors[block_start:block_end] @ vectors.T
+            scores[np.arange(block_end - block_start), np.arange(block_start, block_end)] = -np.inf
+            
+            if k > 0:
+                top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+                rows = slice(block_start - start, block_end - start)
+                neighbors[rows, :k] = top
+                similarities[rows, :k] = np.take_along_axis(scores, top, axis=1)
+            # Colonnes inutilisées (moins de k autres œuvres) : boucle de poids nul
+            neighbors[block_start - start:block_end - start, k:] = \
+                np.arange(block_start, block_end)[:, None]
+        return neighbors, similarities
+    
+    def _symmetrize(self, num_nodes: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Construit la matrice d'adjacence symétrique (i voisin de j ou j voisin de i)
+        """
+        sources = np.repeat(np.arange(num_nodes, dtype=np.int64), self.k)
+        targets = self._neighbors.ravel()
+        # Seules les similarités positives forment des arêtes
+        weights = np.maximum(self._similarities.ravel(), 0.0)
+        keep = (weights > 0) & (sources != targets)
+        sources, targets, weights = sources[keep], targets[keep], weights[keep]
+        
+        rows = np.concatenate([sources, targets])
+        cols = np.concatenate([targets, sources])
+        weights = np.concatenate([weights, weights])
+        
+        # Une arête présente dans les deux sens n'est gardée qu'une fois
+        keys, first = np.unique(rows * num_nodes + cols, return_index=True)
+        rows, cols, weights = keys // num_nodes, keys % num_nodes, weights[first]
+        
+        indptr = np.concatenate([[0], np.cumsum(np.bincount(rows, minlength=num_nodes))]).astype(np.int64)
+        degrees = np.bincount(rows, weights=weights, minlength=num_nodes)
+        return indptr, cols, weights.astype(np.float32), degrees
+
+class LabelPropagation:
+    """
+    Propagation des classifications sur un graphe kNN (Zhou et al.) : pour chaque
+    question, les scores F résolvent F = α·W·F + (1 - α)·Y, où W = D⁻¹A est la
+    matrice de transition du graphe et Y les réponses connues (une colonne par réponse)
+    
+    Le système étant linéaire, une nouvelle classification ne modifie Y que sur une
+    ligne : la correction est ajoutée au résidu R = (1 - α)·Y + α·W·F - F de l'œuvre
+    classifiée, puis propagée par poussées locales tant qu'un résidu dépasse la
+    tolérance. Seul le voisinage affecté est visité, et les résidus trop
+    faibles pour être poussés sont conservés (ils le seront une fois cumulés). Une
+    résolution complète n'a lieu qu'à la création et après une extension du graphe.
+    """
+    def __init__(self, graph: KNNGraph, alpha: float = 0.9, tolerance: float = 1e-4,
+                 max_iterations: int = 200):
+        """
+        Initialise la propagation (sans réponses)
+        
+        Args:
+            graph: Graphe kNN des œuvres
+            alpha: Poids de la propagation par rapport aux réponses connues (0 < alpha < 1)
+            tolerance: Résidu en dessous duquel une correction n'est plus propagée
+            max_iterations: Nombre maximal d'itérations d'une résolution complète
+        """
+        if not 0 < alpha < 1:
+            raise ValueError("alpha doit être compris entre 0 et 1 (exclus)")
+        
+        self.graph = graph
+        self.alpha = alpha
+        self.tolerance = tolerance
+        self.max_iterations = max_iterations
+        
+        # Graphe sur lequel les scores ont été calculés
+        self.graph_version = -1
+        self._csr = graph.csr()
+        
+        # Question -> (réponses, scores N × nombre de réponses), et résidus correspondants
+        self.scores: Dict[str, Tuple[List[str], np.ndarray]] = {}
+        self._residuals: Dict[str, np.ndarray] = {}
+    
+    @property
+    def num_nodes(self) -> int:
+        return len(self._csr[0]) - 1
+    
+    def is_current(self) -> bool:
+        """
+        Indique si les scores ont été calculés sur la version courante du graphe
+        """
+        return self.graph_version == self.graph.version
+    
+    def _column(self, question: str, answer: str) -> int:
+        """
+        Retourne la colonne d'une réponse dans les scores de sa question (créée si nécessaire)
+        """
+        answers, scores = self.scores.get(question, ([], np.zeros((self.num_nodes, 0))))
+        residuals = self._residuals.get(question, np.zeros((self.num_nodes, 0)))
+        if answer not in answers:
+            answers = answers + [answer]
+            scores = np.hstack([scores, np.zeros((self.num_nodes, 1))])
+            residuals = np.hstack([residuals, np.zeros((self.num_nodes, 1))])
+        self.scores[question] = (answers, scores)
+        self._residuals[question] = residuals
+        return answers.index(answer)
+    
+    def _propagate(self, scores: np.ndarray) -> np.ndarray:
+        """
+        Calcule W·F (une colonne à la fois)
+        """
+        indptr, indices, weights, degrees = self._csr
+        sources = np.repeat(np.arange(self.num_nodes), np.diff(indptr))
+        transitions = weights / np.maximum(degrees[sources], 1e-12)
+        return np.stack([np.bincount(sources, weights=transitions * scores[indices, column],
+                                     minlength=self.num_nodes)
+                         for column in range(scores.shape[1])], axis=1)
+    
+    def solve(self, classifications: Dict[int, Dict[str, str]]) -> None:
+        """
+        Résout entièrement le système pour toutes les questions (itérations de Jacobi)
+        
+        Args:
+            classifications: Classifications par ligne d'œuvre (question -> réponse)
+        """
+        self.graph_version = self.graph.version
+        self._csr = self.graph.csr()
+        num_nodes = self.num_nodes
+        
+        self.scores = {}
+        self._residuals = {}
+        for row, classification in classifications.items():
+            if row >= num_nodes:
+                continue
+            for question, answer in classification.items():
+                self._column(str(question), str(answer))
+        
+        for question, (answers, _) in self.scores.items():
+            known = np.zeros((num_nodes, len(answers)))
+            for row, classification in classifications.items():
+                answer = {str(q): str(a) for q, a in classification.items()}.get(question)
+                if answer is not None and row < num_nodes:
+                    known[row, answers.index(answer)] = 1.0
+            known *= 1.0 - self.alpha
+            
+            scores = known.copy()
+            for _ in range(self.max_iterations):
+                updated = self.alpha * self._propagate(scores) + known
+                converged = np.max(np.abs(updated - scores)) < self.tolerance
+                scores = updated
+                if converged:
+                    break
+            
+            self.scores[question] = (answers, scores)
+            self._residuals[question] = known + self.alpha * self._propagate(scores) - scores
+    
+    def update(self, row: int, previous: Optional[Dict[str, str]],
+               classification: Optional[Dict[str, str]]) -> int:
+        """
+        Corrige les scores après la classification, la reclassification ou le retrait
+        de classification d'une œuvre, en ne visitant que son voisinage
+        
+        Args:
+            row: Ligne de l'œuvre
+            previous: Ancienne classification (None si l'œuvre n'était pas classifiée)
+            classification: Nouvelle classification (None pour un retrait)
+        
+        Returns:
+            Nombre de poussées effectuées
+        """
+        previous = {str(q): str(a) for q, a in (previous or {}).items()}
+        classification = {str(q): str(a) for q, a in (classification or {}).items()}
+        
+        pushes = 0
+        for question in set(previous) | set(classification):
+            old_answer, new_answer = previous.get(question), classification.get(question)
+            if old_answer == new_answer:
+                continue
+            
+            # Variation de (1 - α)·Y sur la ligne de l'œuvre
+            delta = {}
+            if new_answer is not None:
+                delta[self._column(question, new_answer)] = 1.0 - self.alpha
+            if old_answer is not None:
+                delta[self._column(question, old_answer)] = self.alpha - 1.0
+            
+            _, scores = self.scores[question]
+            residuals = self._residuals[question]
+            for column, value in delta.items():
+                residuals[row, column] += value
+            pushes += self._push(scores, residuals, row)
+        return pushes
+    
+    def _push(self, scores: np.ndarray, residuals: np.ndarray, source: int) -> int:
+        """
+        Propage le résidu d'une œuvre par vagues de poussées : la poussée d'un nœud u
+        ajoute son résidu r_u à F[u] et α·W[i, u]·r_u au résidu de chaque voisin i ;
+        tous les nœuds dont le résidu dépasse la tolérance sont poussés ensemble
+        
+        Returns:
+            Nombre de poussées effectuées
+        """
+        indptr, indices, weights, degrees = self._csr
+        active = np.array([source], dtype=np.int64)
+        pushes = 0
+        
+        while len(active):
+            residual = residuals[active].copy()
+            residuals[active] = 0.0
+            scores[active] += residual
+            pushes += len(active)
+            
+            # Arêtes sortant des nœuds poussés (tranches concaténées du CSR)
+            starts = indptr[active]
+            counts = indptr[active + 1] - starts
+            owners = np.repeat(np.arange(len(active)), counts)
+            edges = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts) + starts[owners]
+            neighbors = indices[edges]
+            
+            factors = self.alpha * weights[edges] / np.maximum(degrees[neighbors], 1e-12)
+            np.add.at(residuals, neighbors, factors[:, None] * residual[owners])
+            
+            touched = np.unique(neighbors)
+            active = touched[np.max(np.abs(residuals[touched]), axis=1) >= self.tolerance]
+        return pushes
+    
+    def predict(self, rows: Optional[np.ndarray] = None) -> Dict[str, Tuple[List[Optional[str]], np.ndarray]]:
+        """
+        Retourne la réponse prédite et sa confiance pour chaque question
+        
+        Args:
+            rows: Lignes des œuvres (None: toutes)
+        
+        Returns:
+            Dictionnaire question -> (réponses prédites, confiances) ; la réponse est
+            None pour les œuvres qu'aucune classification n'atteint
+        """
+        predictions = {}
+        for question, (answers, scores) in self.scores.items():
+            selected = np.maximum(scores if rows is None else scores[rows], 0.0)
+            totals = selected.sum(axis=1)
+            best = np.argmax(selected, axis=1)
+            confidences = np.where(totals > 0,
+                                   selected[np.arange(len(selected)), best] / np.maximum(totals, 1e-12), 0.0)
+            labels = [answers[column] if total > 0 else None for column, total in zip(best.tolist(), totals.tolist())]
+            predictions[question] = (labels, confidences)
+        return predictions
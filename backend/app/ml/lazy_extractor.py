@@ -0,0 +1,65 @@
+import threading
+import time
+from typing import Any, Dict, Optional
+
+class LazyFeatureExtractor:
+    """
+    Accès différé au FeatureExtractor : torch, timm et les poids du modèle ne sont
+    chargés qu'à la première extraction (ou par un préchargement en arrière-plan),
+    pour que les instances qui ne font que de la classification démarrent vite
+    """
+    def __init__(self, **kwargs: Any):
+        """
+        Initialise l'accès différé
+        
+        Args:
+            **kwargs: Paramètres transmis au constructeur de FeatureExtractor
+        """
+        self.kwargs = kwargs
+        self.load_seconds: Optional[float] = None
+        self._extractor = None
+        self._lock = threading.Lock()
+    
+    @property
+    def loaded(self) -> bool:
+        return self._extractor is not None
+    
+    def get(self):
+        """
+        Retourne l'extracteur, chargé au premier appel
+        
+        Returns:
+            Instance de FeatureExtractor
+        """
+        if self._extractor is None:
+            with self._lock:
+                if self._extractor is None:
+                    start = time.perf_counter()
+                    from .feature_extractor import FeatureExtractor
+                    self._extractor = FeatureExtractor(**self.kwargs)
+                    self.load_seconds = time.perf_counter() - start
+                    print(f"Extracteur de caractéristiques chargé en {self.load_seconds:.1f}s")
+        return self._extractor
+    
+    def warm_up(self) -> threading.Thread:
+        """
+        Charge l'extracteur dans un thread d'arrière-plan
+        
+        Returns:
+            Thread de chargement
+        """
+        def _load() -> None:
+            try:
+                self.get()
+            except Exception as e:
+                print(f"Erreur lors du préchargement de l'extracteur: {e}")
+        
+        thread = threading.Thread(target=_load, name="feature-extractor-warmup", daemon=True)
+        thread.start()
+        return thread
+    
+    def status(self) -> Dict:
+        """
+        Décrit l'état de chargement de l'extracteur
+        """
+        return {"loaded": self.loaded, "load_seconds": self.load_seconds}
@@ -0,0 +1,287 @@
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from .active_learner import ActiveLearner
+from .compression import PCACompressor
+from .feature_space import FeatureSpace
+from ..utils.label_journal import LabelJournal
+from ..utils.reservations import ReservationRegistry
+
+MODEL_STATE_FILE = 'model_state.json'
+LABEL_JOURNAL_FILE = 'labels.journal.jsonl'
+CAMPAIGNS_DIR = 'campaigns'
+DEFAULT_CAMPAIGN = 'default'
+
+_CAMPAIGN_NAME = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+
+class LearnerSession:
+    """
+    Session de classification d'une campagne : un learner, son journal des
+    classifications et ses réservations, protégés par un verrou propre
+    
+    À utiliser comme gestionnaire de contexte (with session: ...), qui prend le verrou
+    et recharge le learner depuis le disque s'il a été évincé.
+    """
+    def __init__(self, registry: "LearnerRegistry", name: str, state_dir: str):
+        """
+        Initialise la session (le learner n'est chargé qu'à la première utilisation)
+        
+        Args:
+            registry: Registre propriétaire de la session
+            name: Nom de la campagne
+            state_dir: Répertoire de l'instantané et du journal de la campagne
+        """
+        self.registry = registry
+        self.name = name
+        self.state_path = os.path.join(state_dir, MODEL_STATE_FILE)
+        self.journal = LabelJournal(os.path.join(state_dir, LABEL_JOURNAL_FILE))
+        self.reservations = ReservationRegistry(ttl_seconds=registry.reservation_ttl)
+        self.learner: Optional[ActiveLearner] = None
+        self.lock = threading.RLock()
+        self.last_used = time.time()
+    
+    def __enter__(self) -> "LearnerSession":
+        self.lock.acquire()
+        try:
+            if self.learner is None:
+                self._load()
+            self.last_used = time.time()
+        except BaseException:
+            self.lock.release()
+            raise
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.lock.release()
+        self.registry._evict_idle()
+    
+    def _load(self) -> None:
+        """
+        Crée le learner sur l'espace partagé et charge son état (instantané puis journal)
+        """
+        if self.registry.space is None:
+            raise RuntimeError("Aucune donnée disponible pour initialiser le learner")
+        
+        space = self.registry.space
+        self.learner = ActiveLearner(space.features, space.artwork_data, space=space,
+                                     **self.registry.learner_kwargs)
+        self.learner.load_state(self.state_path, journal=self.journal)
+    
+    def snapshot(self) -> None:
+        """
+        Écrit un instantané complet de l'état et retire du journal les classifications
+        qu'il couvre (à appeler avec le verrou)
+        """
+        if self.learner is None:
+            return
+        os.makedirs(os.path.dirname(self.state_path), exist_ok=True)
+        self.learner.save_state(self.state_path)
+        self.journal.compact(self.learner.journal_seq)
+    
+    def classify(self, artwork_id: int, classification: Dict[str, str]) -> None:
+        """
+        Enregistre une classification : journalisation d'abord (coût constant), puis
+        mise à jour du learner une fois l'écriture réussie, l'état complet n'étant
+        réécrit que périodiquement (à appeler avec le verrou)
+        
+        Args:
+            artwork_id: ID de l'œuvre
+            classification: Dictionnaire des classifications (question -> réponse)
+        """
+        # Refuser une œuvre inconnue avant de l'écrire dans le journal
+        if not self.learner.knows_artwork(artwork_id):
+            raise ValueError(f"Œuvre inconnue: {artwork_id}")
+        
+        # Journal d'abord : si l'écriture échoue, la classification n'est pas appliquée
+        os.makedirs(os.path.dirname(self.journal.path), exist_ok=True)
+        seq = self.journal.append(artwork_id, classification)
+        self.learner.update(artwork_id, classification)
+        self.learner.journal_seq = seq
+        self.reservations.release([artwork_id])
+        if len(self.journal) >= self.registry.snapshot_interval:
+            self.snapshot()
+    
+    def precompute_next(self) -> None:
+        """
+        Précalcule la file des prochaines œuvres du learner s'il est chargé (tâche de
+        fond lancée après une classification, qui prend le verrou)
+        """
+        with self.lock:
+            if self.learner is not None:
+                self.learner.precompute_next()
+    
+    def evict(self) -> None:
+        """
+        Enregistre l'état sur disque et libère le learner (à appeler avec le verrou)
+        """
+        if self.learner is None:
+            return
+        if len(self.journal) > 0:
+            self.snapshot()
+        self.learner = None
+
+class LearnerRegistry:
+    """
+    Registre des sessions de classification, une par campagne
+    
+    Toutes les sessions partagent le même espace de caractéristiques (lecture seule) :
+    la mémoire propre à une session est limitée à ses classifications, son modèle et
+    quelques vecteurs d'une valeur par œuvre. Au-delà de max_loaded sessions chargées,
+    les moins récemment utilisées sont enregistrées sur disque puis libérées, et
+    rechargées à leur prochaine utilisation. Les sessions non chargées et inutilisées
+    depuis plus de reservation_ttl secondes (réservations expirées) sont oubliées :
+    une campagne inconnue ne garde pas d'objet en mémoire indéfiniment.
+    """
+    def __init__(self, data_dir: str, space: Optional[FeatureSpace] = None,
+                 max_loaded: int = 8, snapshot_interval: int = 100,
+                 reservation_ttl: float = 300.0, learner_kwargs: Optional[Dict] = None,
+                 compression: Optional[PCACompressor] = None):
+        """
+        Initialise le registre
+        
+        Args:
+            data_dir: Répertoire des données (la campagne par défaut y garde son état,
+                les autres dans campaigns/<nom>)
+            space: Espace de caractéristiques partagé (None tant qu'il n'y a pas de données)
+            max_loaded: Nombre maximal de learners gardés en mémoire
+            snapshot_interval: Nombre de classifications journalisées entre deux
+                instantanés complets
+            reservation_ttl: Durée de validité des réservations (en secondes)
+            learner_kwargs: Paramètres transmis à chaque ActiveLearner
+            compression: Projection des caractéristiques de l'espace créé par add_artworks
+        """
+        if max_loaded < 1:
+            raise ValueError("max_loaded doit être supérieur ou égal à 1")
+        
+        self.data_dir = data_dir
+        self.space = space
+        self.max_loaded = max_loaded
+        self.snapshot_interval = snapshot_interval
+        self.reservation_ttl = reservation_ttl
+        self.learner_kwargs = learner_kwargs or {}
+        self.compression = compression
+        
+        self._sessions: "OrderedDict[str, LearnerSession]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def _state_dir(self, name: str) -> str:
+        if name == DEFAULT_CAMPAIGN:
+            return self.data_dir
+        return os.path.join(self.data_dir, CAMPAIGNS_DIR, name)
+    
+    def session(self, name: str = DEFAULT_CAMPAIGN) -> LearnerSession:
+        """
+        Retourne la session d'une campagne (créée si nécessaire, sans charger le learner)
+        
+        Args:
+            name: Nom de la campagne (lettres, chiffres, '-' et '_')
+        
+        Returns:
+            Session de la campagne, marquée comme la plus récemment utilisée
+        """
+        if not _CAMPAIGN_NAME.fullmatch(name):
+            raise ValueError(f"Nom de campagne invalide: {name}")
+        
+        with self._lock:
+            session = self._sessions.get(name)
+            if session is None:
+                session = LearnerSession(self, name, self._state_dir(name))
+                self._sessions[name] = session
+            session.last_used = time.time()
+            self._sessions.move_to_end(name)
+            return session
+    
+    def sessions(self) -> List[Dict]:
+        """
+        Décrit les sessions connues
+        
+        Returns:
+            Liste de dictionnaires (nom, chargée, nombre de classifications si chargée)
+        """
+        with self._lock:
+            sessions = list(self._sessions.values())
+        
+        descriptions = []
+        for session in sessions:
+            learner = session.learner
+            descriptions.append({
+                "campaign": session.name,
+                "loaded": learner is not None,
+                "classified_count": len(learner.labeled_indices) if learner is not None else None,
+                "last_used": session.last_used
+            })
+        return descriptions
+    
+    def _evict_idle(self) -> None:
+        """
+        Libère les learners les moins récemment utilisés au-delà de max_loaded, puis
+        oublie les sessions non chargées restées inutilisées (les sessions en cours
+        d'utilisation sont ignorées)
+        """
+        with self._lock:
+            loaded = [session for session in self._sessions.values() if session.learner is not None]
+        excess = len(loaded) - self.max_loaded
+        
+        for session in loaded:
+            if excess <= 0:
+                break
+            if not session.lock.acquire(blocking=False):
+                continue
+            try:
+                session.evict()
+                excess -= 1
+            finally:
+                session.lock.release()
+        
+        # Les sessions sont rangées de la moins à la plus récemment utilisée
+        expired_before = time.time() - self.reservation_ttl
+        with self._lock:
+            for name, session in list(self._sessions.items()):
+                if session.last_used >= expired_before:
+                    break
+                if name == DEFAULT_CAMPAIGN or session.learner is not None:
+                    continue
+                if not session.lock.acquire(blocking=False):
+                    continue
+                try:
+                    if session.learner is None:
+                        del self._sessions[name]
+                finally:
+                    session.lock.release()
+    
+    def add_artworks(self, rows: pd.DataFrame, features: np.ndarray,
+                     feature_view: Optional[np.ndarray] = None,
+                     artwork_view: Optional[pd.DataFrame] = None) -> None:
+        """
+        Ajoute de nouvelles œuvres à l'espace partagé (créé s'il s'agit des premières) ;
+        chaque learner s'y synchronise à sa prochaine utilisation
+        
+        Args:
+            rows: Métadonnées des nouvelles œuvres
+            features: Caractéristiques des nouvelles œuvres (une ligne par œuvre)
+            feature_view: Matrice complète déjà étendue, utilisée telle quelle
+            artwork_view: DataFrame complet déjà étendu, utilisé tel quel
+        """
+        if self.space is None:
+            if feature_view is None or artwork_view is None:
+                raise ValueError("feature_view et artwork_view sont requis pour créer l'espace")
+            self.space = FeatureSpace(feature_view, artwork_view, compression=self.compression)
+        else:
+            self.space.add_artworks(rows, features, feature_view=feature_view, artwork_view=artwork_view)
+    
+    def save_all(self) -> None:
+        """
+        Écrit un instantané de toutes les sessions chargées (appelé à l'arrêt de l'API)
+        """
+        with self._lock:
+            sessions = list(self._sessions.values())
+        for session in sessions:
+            with session.lock:
+                session.snapshot()
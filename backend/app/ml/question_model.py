@@ -0,0 +1,350 @@
+import numpy as np
+from typing import Dict, List, Tuple, Optional
+
+from .compression import blockwise_dot
+
+class MultiQuestionModel:
+    """
+    Modèle de classification multi-questions à base de centroïdes.
+    
+    Chaque question est un problème multi-classes traité en un-contre-tous : la classe c
+    a pour poids son centroïde m_c et pour biais -||m_c||²/2, ce qui revient à choisir le
+    centroïde le plus proche. Les poids de toutes les classes de toutes les questions sont
+    empilés dans une seule matrice W, de sorte qu'un seul produit features @ W.T suffit à
+    noter toutes les questions.
+    
+    Les centroïdes sont maintenus par des accumulateurs (somme et effectif par classe),
+    ce qui rend l'ajout et le retrait d'une réponse en O(d).
+    """
+    
+    def __init__(self, dim: int, temperature: float = 0.5):
+        """
+        Initialise un modèle vide
+        
+        Args:
+            dim: Dimension des vecteurs de caractéristiques
+            temperature: Température du softmax, relative à l'écart moyen entre centroïdes
+                d'une même question (une œuvre placée sur un centroïde a une marge
+                normalisée de 1 / temperature)
+        """
+        self.dim = dim
+        self.temperature = temperature
+        self.questions: List[str] = []  # Questions dans l'ordre d'apparition
+        self.class_keys: List[Tuple[str, str]] = []  # (question, réponse) par ligne d'accumulateur
+        self._class_index: Dict[Tuple[str, str], int] = {}
+        self._sums = np.zeros((0, dim), dtype=np.float64)
+        self._counts = np.zeros(0, dtype=np.int64)
+        # Effectifs non nuls par question et réponse, tenus à jour à chaque ajout et retrait
+        self._answer_counts: Dict[str, Dict[str, int]] = {}
+        
+        # Poids empilés, recalculés uniquement après une modification
+        self._weights: Optional[Tuple[np.ndarray, np.ndarray, List[Tuple[str, np.ndarray, float]]]] = None
+        self._weight_labels: List[Tuple[str, str]] = []  # (question, réponse) par ligne de W
+        self._weight_counts = np.zeros(0, dtype=np.int64)  # Effectif par ligne de W
+    
+    def _get_class_row(self, question: str, answer: str) -> int:
+        """
+        Retourne la ligne des accumulateurs d'une classe (créée si nécessaire)
+        """
+        key = (question, answer)
+        row = self._class_index.get(key)
+        if row is None:
+            row = len(self.class_keys)
+            self._class_index[key] = row
+            self.class_keys.append(key)
+            self._sums = np.vstack([self._sums, np.zeros((1, self.dim))])
+            self._counts = np.append(self._counts, 0)
+            if question not in self.questions:
+                self.questions.append(question)
+        return row
+    
+    def add(self, vector: np.ndarray, classification: Dict[str, str]) -> None:
+        """
+        Ajoute les réponses d'une œuvre au modèle en O(d) par réponse
+        
+        Args:
+            vector: Vecteur de caractéristiques de l'œuvre
+            classification: Dictionnaire des classifications (question -> réponse)
+        """
+        for question, answer in classification.items():
+            row = self._get_class_row(str(question), str(answer))
+            self._sums[row] += vector
+            self._counts[row] += 1
+            counts = self._answer_counts.setdefault(str(question), {})
+            counts[str(answer)] = counts.get(str(answer), 0) + 1
+        self._weights = None
+    
+    def remove(self, vector: np.ndarray, classification: Dict[str, str]) -> None:
+        """
+        Retire les réponses d'une œuvre du modèle en O(d) par réponse
+        
+        Args:
+            vector: Vecteur de caractéristiques de l'œuvre
+            classification: Dictionnaire des classifications précédemment ajoutées
+        """
+        for question, answer in classification.items():
+            row = self._class_index.get((str(question), str(answer)))
+            if row is None:
+                continue
+            self._sums[row] -= vector
+            self._counts[row] -= 1
+            counts = self._answer_counts[str(question)]
+            if self._counts[row] == 0:
+                # Classe vide : remettre la somme à zéro pour éviter la dérive numérique
+                self._sums[row] = 0.0
+                del counts[str(answer)]
+            else:
+                counts[str(answer)] -= 1
+        self._weights = None
+    
+    def rebuild(self, features: np.ndarray, classifications: Dict[int, Dict[str, str]]) -> None:
+        """
+        Reconstruit tous les accumulateurs en une passe
+        
+        Args:
+            features: Matrice de caractéristiques
+            classifications: Classifications par ligne d'œuvre
+        """
+        rows, class_rows = [], []
+        for artwork_idx, classification in classifications.items():
+            for question, answer in classification.items():
+                rows.append(artwork_idx)
+                class_rows.append(self._get_class_row(str(question), str(answer)))
+        
+        self._sums[:] = 0.0
+        self._counts[:] = 0
+        if rows:
+            class_rows = np.array(class_rows, dtype=np.int64)
+            np.add.at(self._sums, class_rows, features[np.array(rows, dtype=np.int64)])
+            np.add.at(self._counts, class_rows, 1)
+        self._answer_counts = {}
+        for (question, answer), row in self._class_index.items():
+            if self._counts[row] > 0:
+                self._answer_counts.setdefault(question, {})[answer] = int(self._counts[row])
+        self._weights = None
+    
+    def centroids(self, question: str) -> Dict[str, np.ndarray]:
+        """
+        Retourne les centroïdes des classes non vides d'une question
+        
+        Args:
+            question: Clé de la question
+        
+        Returns:
+            Dictionnaire réponse -> centroïde
+        """
+        return {answer: self._sums[row] / self._counts[row]
+                for (q, answer), row in self._class_index.items()
+                if q == question and self._counts[row] > 0}
+    
+    def class_counts(self, question: str) -> Dict[str, int]:
+        """
+        Retourne le nombre d'œuvres par réponse pour une question
+        
+        Args:
+            question: Clé de la question
+        
+        Returns:
+            Dictionnaire réponse -> effectif (classes vides exclues)
+        """
+        return dict(self._answer_counts.get(question, {}))
+    
+    def active_questions(self) -> List[str]:
+        """
+        Retourne les questions ayant au moins deux classes non vides (frontière définie)
+        """
+        return [q for q in self.questions if len(self._answer_counts.get(q, ())) >= 2]
+    
+    def weights(self) -> Tuple[np.ndarray, np.ndarray, List[Tuple[str, np.ndarray, float]]]:
+        """
+        Retourne les poids empilés des questions actives
+        
+        Returns:
+            Tuple (W, b, groupes) : W (C×d) et b (C,) pour les classes non vides des
+            questions actives, groupes = liste (question, lignes de ses classes dans W,
+            échelle des scores de la question)
+        """
+        if self._weights is not None:
+            return self._weights
+        
+        rows, groups = [], []
+        for question in self.active_questions():
+            question_rows = [row for (q, _), row in self._class_index.items()
+                             if q == question and self._counts[row] > 0]
+            
+            # Échelle : demi-distance carrée moyenne entre centroïdes de la question,
+            # soit l'écart de score typique d'une œuvre placée sur un centroïde
+            centroids = self._sums[question_rows] / self._counts[question_rows, None]
+            squared_norms = np.einsum('ij,ij->i', centroids, centroids)
+            pair_distances = squared_norms[:, None] + squared_norms[None, :] - 2.0 * centroids @ centroids.T
+            num_pairs = len(question_rows) * (len(question_rows) - 1)
+            scale = max(float(pair_distances.sum()) / num_pairs / 2.0, 1e-12) * self.temperature
+            
+            groups.append((question, np.arange(len(rows), len(rows) + len(question_rows)), scale))
+            rows.extend(question_rows)
+        
+        self._weight_labels = [self.class_keys[row] for row in rows]
+        rows = np.array(rows, dtype=np.int64)
+        self._weight_counts = self._counts[rows]
+        W = self._sums[rows] / self._counts[rows, None] if len(rows) else np.zeros((0, self.dim))
+        b = -0.5 * np.einsum('ij,ij->i', W, W)
+        
+        self._weights = (W, b, groups)
+        return self._weights
+    
+    def scores(self, features: np.ndarray) -> np.ndarray:
+        """
+        Calcule les scores de toutes les classes actives en un seul produit matriciel
+        
+        Args:
+            features: Matrice de caractéristiques (N×d)
+        
+        Returns:
+            Matrice de scores (N×C), colonnes dans l'ordre des lignes de W
+        """
+        W, b, _ = self.weights()
+        return blockwise_dot(features, W.T) + b
+    
+    def probabilities(self, features: np.ndarray,
+                      scores: Optional[np.ndarray] = None) -> List[Tuple[str, np.ndarray]]:
+        """
+        Calcule les probabilités par classe pour chaque question active
+        
+        Les scores des classes d'une question sont divisés par l'échelle de la question
+        avant un softmax, ce qui donne des probabilités comparables d'une question à l'autre.
+        
+        Args:
+            features: Matrice de caractéristiques (N×d)
+            scores: Scores déjà calculés (sinon calculés à partir de features)
+        
+        Returns:
+            Liste (question, probabilités N×C_q) dans l'ordre des groupes de W
+        """
+        _, _, groups = self.weights()
+        if not groups:
+            return []
+        
+        if scores is None:
+            scores = self.scores(features)
+        
+        result = []
+        for question, columns, scale in groups:
+            question_scores = scores[:, columns] / scale
+            question_scores -= question_scores.max(axis=1, keepdims=True)
+            exp_scores = np.exp(question_scores)
+            result.append((question, exp_scores / exp_scores.sum(axis=1, keepdims=True)))
+        return result
+    
+    def uncertainty(self, features: np.ndarray) -> Optional[np.ndarray]:
+        """
+        Calcule l'incertitude combinée sur toutes les questions actives
+        
+        L'incertitude d'une question est 1 - (p1 - p2), où p1 et p2 sont les deux plus
+        grandes probabilités (échantillonnage par marge). L'incertitude combinée est la
+        moyenne sur les questions actives.
+        
+        Args:
+            features: Matrice de caractéristiques (N×d)
+        
+        Returns:
+            Vecteur d'incertitudes (N,) ou None si aucune question n'a de frontière
+        """
+        probabilities = self.probabilities(features)
+        if not probabilities:
+            return None
+        
+        total = np.zeros(features.shape[0], dtype=np.float64)
+        for _, question_probs in probabilities:
+            top_two = np.partition(question_probs, -2, axis=1)[:, -2:]
+            total += 1.0 - (top_two[:, 1] - top_two[:, 0])
+        return total / len(probabilities)
+    
+    def predict(self, features: np.ndarray) -> Dict[str, Tuple[List[str], np.ndarray]]:
+        """
+        Prédit une réponse et sa confiance pour chaque question active
+        
+        Args:
+            features: Matrice de caractéristiques (N×d)
+        
+        Returns:
+            Dictionnaire question -> (réponses prédites, confiances)
+        """
+        _, _, groups = self.weights()
+        
+        predictions = {}
+        for (question, question_probs), (_, columns, _) in zip(self.probabilities(features), groups):
+            answers = [self._weight_labels[column][1] for column in columns]
+            best = np.argmax(question_probs, axis=1)
+            predictions[question] = ([answers[i] for i in best], question_probs.max(axis=1))
+        return predictions
+    
+    def confidence(self, features: np.ndarray) -> Optional[np.ndarray]:
+        """
+        Calcule la confiance de chaque œuvre : moyenne, sur les questions actives, de la
+        probabilité de la réponse prédite
+        
+        Args:
+            features: Matrice de caractéristiques (N×d)
+        
+        Returns:
+            Vecteur de confiances (N,) ou None si aucune question n'a de frontière
+        """
+        probabilities = self.probabilities(features)
+        if not probabilities:
+            return None
+        
+        total = np.zeros(features.shape[0], dtype=np.float64)
+        for _, question_probs in probabilities:
+            total += question_probs.max(axis=1)
+        return total / len(probabilities)
+    
+    def leave_one_out_accuracy(self, features: np.ndarray,
+                               classifications: List[Dict[str, str]]) -> Optional[float]:
+        """
+        Calcule la précision en leave-one-out sur les œuvres classifiées
+        
+        Pour un modèle à centroïdes, retirer une œuvre ne modifie que le centroïde de sa
+        propre classe : m_c' = (n_c·m_c - x) / (n_c - 1). Seul le score de cette classe est
+        donc recalculé, ce qui évite de réentraîner un modèle par œuvre.
+        
+        Args:
+            features: Caractéristiques des œuvres classifiées (n×d)
+            classifications: Réponses de chaque œuvre, dans le même ordre
+        
+        Returns:
+            Proportion de réponses correctement prédites, ou None si rien n'est évaluable
+        """
+        W, _, groups = self.weights()
+        if not groups or len(classifications) == 0:
+            return None
+        
+        scores = self.scores(features)
+        label_columns = {key: column for column, key in enumerate(self._weight_labels)}
+        
+        correct, total = 0, 0
+        for question, columns, _ in groups:
+            own_columns = np.array([label_columns.get((question, str(c[question])), -1) if question in c else -1
+                                    for c in classifications], dtype=np.int64)
+            rows = np.flatnonzero(own_columns >= 0)
+            if len(rows) == 0:
+                continue
+            own_columns = own_columns[rows]
+            
+            # Score de la propre classe avec le centroïde recalculé sans l'œuvre
+            x = features[rows].astype(np.float64)
+            counts = self._weight_counts[own_columns][:, None]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                loo_centroids = (W[own_columns] * counts - x) / (counts - 1)
+            loo_scores = np.einsum('ij,ij->i', x, loo_centroids) - 0.5 * np.einsum('ij,ij->i', loo_centroids, loo_centroids)
+            
+            # Une classe réduite à cette seule œuvre disparaît
+            loo_scores[counts[:, 0] <= 1] = -np.inf
+            
+            question_scores = scores[rows][:, columns]
+            question_scores[np.arange(len(rows)), own_columns - columns[0]] = loo_scores
+            
+            predicted = columns[np.argmax(question_scores, axis=1)]
+            correct += int(np.count_nonzero(predicted == own_columns))
+            total += len(rows)
+        
+        return correct / total if total else None
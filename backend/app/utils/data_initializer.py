@@ -7,22 +7,46 @@ from tqdm import tqdm
 import csv
 
 from ..ml.feature_extractor import FeatureExtractor
+from .feature_cache import FeatureCache, file_sha256
+from .data_manager import ARTWORK_LOG_FILE
+from .thumbnails import ThumbnailCache
 
 class DataInitializer:
     """
     Classe pour initialiser les données du système à partir de fichiers existants
     """
-    def __init__(self, data_dir: str, source_dir: str):
+    def __init__(self, data_dir: str, source_dir: str, use_feature_cache: bool = True,
+                 model_name: str = 'resnet18', backend: str = 'eager', parity_check_size: int = 0,
+                 generate_thumbnails: bool = False):
         """
         Initialise l'outil de chargement des données
         
         Args:
             data_dir: Répertoire de destination des données
             source_dir: Répertoire source contenant les fichiers CSV et images
+            use_feature_cache: Réutiliser les caractéristiques des images déjà traitées
+            model_name: Nom du modèle d'extraction des caractéristiques
+            backend: Backend d'inférence de l'extracteur (eager, torchscript, onnx, onnx-int8)
+            parity_check_size: Nombre d'images comparées à l'extraction eager après
+                l'extraction (0: pas de contrôle de parité)
+            generate_thumbnails: Générer les miniatures de toutes les images (sinon elles
+                sont générées à la première demande)
         """
         self.data_dir = data_dir
         self.source_dir = source_dir
         self.images_dir = os.path.join(data_dir, "images")
+        self.feature_cache_dir = os.path.join(data_dir, "feature_cache")
+        self.thumbnails_dir = os.path.join(data_dir, "thumbnails")
+        self.generate_thumbnails = generate_thumbnails
+        self.use_feature_cache = use_feature_cache
+        self.model_name = model_name
+        self.backend = backend
+        self.parity_check_size = parity_check_size
+        self.parity_report = None
+        self._extractor = None
+        
+        # Les vecteurs d'un backend approché ne sont pas mélangés à ceux du modèle eager
+        self.feature_cache_key = model_name if backend == 'eager' else f"{model_name}-{backend}"
         
         # Créer les répertoires nécessaires
         os.makedirs(self.data_dir, exist_ok=True)
@@ -68,6 +92,11 @@ class DataInitializer:
             # Enregistrer le DataFrame nettoyé
             df_cleaned.to_csv(os.path.join(self.data_dir, "artworks.csv"), index=False)
             
+            # Le journal des œuvres ajoutées concerne l'ancien catalogue
+            log_path = os.path.join(self.data_dir, ARTWORK_LOG_FILE)
+            if os.path.exists(log_path):
+                os.remove(log_path)
+            
             print(f"Données chargées avec succès: {len(df_cleaned)} œuvres d'art")
             return df_cleaned
             
@@ -119,9 +148,6 @@ class DataInitializer:
         df = pd.read_csv(os.path.join(self.data_dir, "artworks.csv"))
         image_files = df['imagepath'].tolist()
         
-        # Initialiser l'extracteur de caractéristiques
-        extractor = FeatureExtractor()
-        
         # Préparer les chemins complets des images
         image_paths = [os.path.join(self.images_dir, img) for img in image_files]
         
@@ -132,17 +158,81 @@ class DataInitializer:
             print("Aucune image trouvée pour extraire les caractéristiques")
             return False
         
-        # Extraire les caractéristiques
-        print(f"Extraction des caractéristiques pour {len(existing_paths)} images...")
-        features = extractor.batch_extract_features(existing_paths)
+        if self.use_feature_cache:
+            features = self._extract_features_cached(existing_paths)
+        else:
+            print(f"Extraction des caractéristiques pour {len(existing_paths)} images...")
+            features = self._get_extractor().batch_extract_features(existing_paths)
         
         # Enregistrer les caractéristiques
         features_path = os.path.join(self.data_dir, "features.npy")
         np.save(features_path, features)
         
         print(f"Caractéristiques extraites et enregistrées: {features.shape}")
+        
+        # Comparer le backend choisi au modèle eager sur un échantillon
+        if self.parity_check_size > 0:
+            if self.backend == 'eager':
+                print("Contrôle de parité ignoré: le backend eager est la référence")
+            else:
+                self.parity_report = self._get_extractor().parity_check(existing_paths[:self.parity_check_size])
         return True
+    
+    def _get_extractor(self):
+        """
+        Retourne l'extracteur de caractéristiques (chargé une seule fois)
+        """
+        if self._extractor is None:
+            self._extractor = FeatureExtractor(self.model_name, backend=self.backend)
+        return self._extractor
 
+    def _extract_features_cached(self, image_paths):
+        """
+        Extrait les caractéristiques en réutilisant le cache indexé par empreinte du contenu :
+        seules les images nouvelles ou modifiées passent par le modèle
+        
+        Args:
+            image_paths: Chemins des images
+        
+        Returns:
+            Matrice de caractéristiques (une ligne par image, dans l'ordre de image_paths)
+        """
+        cache = FeatureCache(self.feature_cache_dir, self.feature_cache_key)
+        
+        hashes = [file_sha256(path) for path in tqdm(image_paths, desc="Empreintes des images")]
+        found, cached_vectors = cache.lookup(hashes)
+        missing = np.flatnonzero(~found)
+        print(f"Caractéristiques en cache: {int(found.sum())}, à extraire: {len(missing)}")
+        
+        if len(missing) == 0:
+            return cached_vectors
+        
+        # Extraire uniquement les images absentes du cache
+        new_vectors = self._get_extractor().batch_extract_features([image_paths[i] for i in missing]).astype(np.float32)
+        
+        # Ne pas mettre en cache les vecteurs nuls (images illisibles)
+        valid = np.any(new_vectors != 0, axis=1)
+        cache.put_many([hashes[i] for i, ok in zip(missing, valid) if ok], new_vectors[valid])
+        cache.save()
+        
+        features = np.zeros((len(image_paths), new_vectors.shape[1]), dtype=np.float32)
+        if found.any():
+            features[found] = cached_vectors
+        features[missing] = new_vectors
+        return features
+    
+    def create_thumbnails(self):
+        """
+        Génère les miniatures manquantes de toutes les images
+        """
+        df = pd.read_csv(os.path.join(self.data_dir, "artworks.csv"))
+        filenames = [os.path.basename(img) for img in df['imagepath'].tolist()]
+        
+        cache = ThumbnailCache(self.images_dir, self.thumbnails_dir)
+        count = cache.generate_all(tqdm(filenames, desc="Génération des miniatures"))
+        print(f"Miniatures disponibles pour {count} images")
+        return True
+    
     def initialize(self):
         """
         Initialise le système avec les données existantes
@@ -162,20 +252,32 @@ class DataInitializer:
         if not self.extract_features():
             return False
         
+        # Générer les miniatures
+        if self.generate_thumbnails and not self.create_thumbnails():
+            return False
+        
         print("Initialisation terminée avec succès!")
         return True
 
 
-def initialize_system(data_dir: str, source_dir: str):
+def initialize_system(data_dir: str, source_dir: str, use_feature_cache: bool = True,
+                      backend: str = 'eager', parity_check_size: int = 0,
+                      generate_thumbnails: bool = False):
     """
     Fonction utilitaire pour initialiser le système
     
     Args:
         data_dir: Répertoire de destination des données
         source_dir: Répertoire source contenant les fichiers CSV et images
+        use_feature_cache: Réutiliser les caractéristiques des images déjà traitées
+        backend: Backend d'inférence de l'extracteur de caractéristiques
+        parity_check_size: Nombre d'images du contrôle de parité avec le modèle eager
+        generate_thumbnails: Générer les miniatures de toutes les images
     
     Returns:
         True si l'initialisation a réussi, False sinon
     """
-    initializer = DataInitializer(data_dir, source_dir)
+    initializer = DataInitializer(data_dir, source_dir, use_feature_cache=use_feature_cache,
+                                  backend=backend, parity_check_size=parity_check_size,
+                                  generate_thumbnails=generate_thumbnails)
     return initializer.initialize() 
\ No newline at end of file
@@ -1,9 +1,38 @@
 import pandas as pd
 import numpy as np
 import os
-from typing import List, Dict, Tuple, Optional
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Callable, List, Dict, Tuple, Optional
 import json
 
+from .feature_store import FeatureStore
+from .metrics import timed
+
+# Champ calculé ajouté aux œuvres retournées : version de l'image pour les URL des miniatures
+THUMBNAIL_VERSION_FIELD = 'thumbnail_version'
+
+# Fichiers du stockage en ajout seul (caractéristiques et métadonnées des nouvelles œuvres)
+FEATURE_STORE_FILE = 'features.store.npy'
+ARTWORK_LOG_FILE = 'artworks.log.jsonl'
+
+# Compaction du journal des œuvres (réécriture de artworks.csv et features.npy) dès
+# qu'il contient au moins ce nombre d'œuvres et cette proportion de la collection,
+# pour un coût amorti constant par ajout
+ARTWORK_LOG_COMPACT_MIN = 1000
+ARTWORK_LOG_COMPACT_RATIO = 0.1
+
+# Nombre de pages sérialisées gardées en cache
+SERIALIZED_CACHE_SIZE = 32
+
+def _timed_io(operation: str):
+    """
+    Mesure la durée d'une lecture ou écriture du gestionnaire de données
+    """
+    return timed("data_manager_io_seconds", "Durée des lectures et écritures du gestionnaire de données",
+                 operation=operation)
+
 class DataManager:
     """
     Gestionnaire pour charger et maintenir les données des œuvres d'art
@@ -16,14 +45,51 @@ class DataManager:
             data_dir: Chemin vers le répertoire contenant les données
         """
         self.data_dir = data_dir
-        self.artwork_data = None
+        self._artwork_data: Optional[pd.DataFrame] = None
+        # Œuvres ajoutées pas encore intégrées au DataFrame (une seule concaténation
+        # pour toutes, à la prochaine lecture de artwork_data)
+        self._pending_artworks: List[Dict] = []
+        self._pending_lock = threading.Lock()
+        self._log_entries = 0  # Nombre d'œuvres dans le journal
         self.features = None
+        self.feature_store = FeatureStore(os.path.join(data_dir, FEATURE_STORE_FILE))
         self.questions = []
+        self._id_index: Dict[int, int] = {}  # ID d'œuvre -> ligne dans artwork_data
+        self._next_id = 0
+        
+        # Version des métadonnées (incrémentée à chaque ajout) et pages JSON en cache
+        self.version = 0
+        self._serialized_cache: "OrderedDict[Tuple, Dict]" = OrderedDict()
+        self._serialized_lock = threading.Lock()  # Routes synchrones : accès concurrents
+        
+        # Version de l'image d'une œuvre (chemin de l'image -> version ou None), fournie
+        # par l'API ; None : pas de champ thumbnail_version
+        self.thumbnail_version: Optional[Callable[[str], Optional[str]]] = None
         
         # Charger les données si le répertoire existe
         if os.path.exists(data_dir):
             self._load_data()
     
+    @property
+    def artwork_data(self) -> Optional[pd.DataFrame]:
+        """
+        Métadonnées des œuvres, y compris celles ajoutées depuis la dernière lecture
+        """
+        if self._pending_artworks:
+            with self._pending_lock:
+                if self._pending_artworks:
+                    self._artwork_data = pd.concat([self._artwork_data, pd.DataFrame(self._pending_artworks)],
+                                                   ignore_index=True)
+                    self._pending_artworks = []
+        return self._artwork_data
+    
+    @artwork_data.setter
+    def artwork_data(self, artwork_data: Optional[pd.DataFrame]) -> None:
+        with self._pending_lock:
+            self._artwork_data = artwork_data
+            self._pending_artworks = []
+    
+    @_timed_io("load")
     def _load_data(self) -> None:
         """
         Charge les données des œuvres et les caractéristiques
@@ -49,9 +115,31 @@ class DataManager:
                 'imagepath': []
             })
         
-        # Charger les caractéristiques
-        if os.path.exists(features_npy):
-            self.features = np.load(features_npy)
+        # Rejouer le journal des œuvres ajoutées depuis la dernière écriture du CSV
+        self._replay_artwork_log()
+        
+        # Construire l'index ID -> ligne pour les recherches en O(1)
+        self._rebuild_id_index()
+        
+        # Importer features.npy dans le stockage en ajout seul s'il est plus récent
+        # (première exécution ou réinitialisation des données)
+        if os.path.exists(features_npy) and (
+                not self.feature_store.exists()
+                or os.path.getmtime(features_npy) > os.path.getmtime(self.feature_store.meta_path)):
+            self.feature_store.replace(np.load(features_npy))
+        
+        # Les caractéristiques sont enregistrées avant les métadonnées : des lignes
+        # ajoutées depuis l'import de features.npy sans œuvre correspondante proviennent
+        # d'un ajout interrompu et sont retirées
+        imported = np.load(features_npy, mmap_mode='r').shape[0] if os.path.exists(features_npy) else 0
+        keep = max(len(self.artwork_data), imported)
+        if self.feature_store.count > keep:
+            print(f"Caractéristiques d'un ajout interrompu retirées ({self.feature_store.count - keep} lignes)")
+            self.feature_store.truncate(keep)
+        
+        # Charger les caractéristiques (projetées en mémoire, sans copie)
+        if self.feature_store.exists():
+            self.features = self.feature_store.view()
             # Vérifier que le nombre de caractéristiques correspond au nombre d'œuvres
             if len(self.artwork_data) != self.features.shape[0]:
                 print(f"Attention: Le nombre d'œuvres ({len(self.artwork_data)}) ne correspond pas au nombre de caractéristiques ({self.features.shape[0]})")
@@ -77,6 +165,80 @@ class DataManager:
             # Sauvegarder les questions par défaut
             self.save_questions(self.questions)
     
+    def _replay_artwork_log(self) -> None:
+        """
+        Ajoute au DataFrame les œuvres enregistrées dans le journal en ajout seul
+        (les IDs déjà présents dans le CSV sont ignorés)
+        """
+        log_path = os.path.join(self.data_dir, ARTWORK_LOG_FILE)
+        if not os.path.exists(log_path):
+            return
+        
+        known_ids = set(self.artwork_data['id'].astype(int).tolist())
+        records = []
+        with open(log_path, 'r') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # Dernière ligne tronquée par une interruption pendant l'écriture
+                    print(f"Ligne ignorée dans {ARTWORK_LOG_FILE}: {line[:80]}")
+                    continue
+                self._log_entries += 1
+                if int(record['id']) not in known_ids:
+                    known_ids.add(int(record['id']))
+                    records.append(record)
+        
+        if records:
+            self.artwork_data = pd.concat([self.artwork_data, pd.DataFrame(records)], ignore_index=True)
+    
+    @_timed_io("compact_artwork_log")
+    def compact_artwork_log(self) -> None:
+        """
+        Réécrit artworks.csv et features.npy avec toutes les œuvres puis vide le journal
+        (les scripts hors ligne et la réinitialisation lisent ces deux fichiers)
+        """
+        artwork_csv = os.path.join(self.data_dir, 'artworks.csv')
+        tmp_csv = artwork_csv + '.tmp'
+        self.artwork_data.to_csv(tmp_csv, index=False)
+        os.replace(tmp_csv, artwork_csv)
+        
+        if self.feature_store.exists():
+            self.feature_store.export(os.path.join(self.data_dir, 'features.npy'))
+        
+        log_path = os.path.join(self.data_dir, ARTWORK_LOG_FILE)
+        if os.path.exists(log_path):
+            os.remove(log_path)
+        self._log_entries = 0
+    
+    def maybe_compact_artwork_log(self) -> bool:
+        """
+        Compacte le journal des œuvres s'il a atteint le seuil de compaction, et si
+        les caractéristiques de toutes les œuvres sont enregistrées
+        
+        Returns:
+            True si le journal a été compacté
+        """
+        num_artworks = len(self.artwork_data)
+        if self._log_entries < max(ARTWORK_LOG_COMPACT_MIN, ARTWORK_LOG_COMPACT_RATIO * num_artworks):
+            return False
+        if self.feature_store.count != num_artworks:
+            return False
+        self.compact_artwork_log()
+        return True
+    
+    def _rebuild_id_index(self) -> None:
+        """
+        Reconstruit l'index ID d'œuvre -> ligne du DataFrame
+        """
+        self._id_index = dict(zip(self.artwork_data['id'].astype(int).tolist(),
+                                  range(len(self.artwork_data))))
+        self._next_id = max(self._id_index) + 1 if self._id_index else 0
+    
+    @_timed_io("save_questions")
     def save_questions(self, questions: List[Dict]) -> None:
         """
         Sauvegarde les questions
@@ -99,10 +261,13 @@ class DataManager:
         Returns:
             Dictionnaire contenant les informations de l'œuvre ou None si non trouvée
         """
-        artwork = self.artwork_data[self.artwork_data['id'] == artwork_id]
-        if len(artwork) == 0:
+        row = self._id_index.get(int(artwork_id))
+        if row is None:
             return None
-        return artwork.iloc[0].to_dict()
+        artwork = self.artwork_data.iloc[row].to_dict()
+        if self.thumbnail_version is not None:
+            artwork[THUMBNAIL_VERSION_FIELD] = self.thumbnail_version(artwork.get('imagepath'))
+        return artwork
     
     def get_all_artworks(self) -> List[Dict]:
         """
@@ -111,7 +276,125 @@ class DataManager:
         Returns:
             Liste des œuvres
         """
-        return [row.to_dict() for _, row in self.artwork_data.iterrows()]
+        return self.get_artworks_page()
+    
+    def get_artworks_page(self, offset: int = 0, limit: Optional[int] = None,
+                          after_id: Optional[int] = None,
+                          fields: Optional[List[str]] = None) -> List[Dict]:
+        """
+        Récupère une page d'œuvres (sérialisation vectorisée du DataFrame)
+        
+        Args:
+            offset: Nombre d'œuvres à sauter
+            limit: Nombre maximal d'œuvres (None: toutes les suivantes)
+            after_id: Curseur, la page commence après l'œuvre de cet ID
+                (l'offset s'applique ensuite)
+            fields: Colonnes à retourner (None: toutes)
+        
+        Returns:
+            Liste des œuvres de la page
+        """
+        return self._page_records(self.artwork_data, self._page_start(offset, after_id), limit, fields)
+    
+    def _page_start(self, offset: int, after_id: Optional[int]) -> int:
+        """
+        Retourne la ligne de la première œuvre d'une page
+        """
+        if after_id is None:
+            return offset
+        row = self._id_index.get(int(after_id))
+        if row is None:
+            raise ValueError(f"Œuvre inconnue: {after_id}")
+        return row + 1 + offset
+    
+    def _page_records(self, data: pd.DataFrame, start: int, limit: Optional[int],
+                      fields: Optional[List[str]]) -> List[Dict]:
+        """
+        Sélectionne une page du DataFrame et la convertit en dictionnaires
+        (les valeurs manquantes deviennent None)
+        """
+        with_version = self.thumbnail_version is not None and (
+            not fields or THUMBNAIL_VERSION_FIELD in fields)
+        if fields:
+            # Le champ calculé n'est pas une colonne du DataFrame
+            fields = [field for field in fields if field != THUMBNAIL_VERSION_FIELD or not with_version]
+            unknown = [field for field in fields if field not in data.columns]
+            if unknown:
+                raise ValueError(f"Champs inconnus: {', '.join(unknown)}")
+        
+        end = None if limit is None else start + limit
+        page = data.iloc[start:end]
+        versions = None
+        if with_version:
+            paths = page['imagepath'].tolist() if 'imagepath' in page.columns else [None] * len(page)
+            versions = [self.thumbnail_version(path) for path in paths]
+        if fields is not None:
+            page = page[fields]
+        if page.isna().values.any():
+            page = page.astype(object).where(page.notna(), None)
+        records = page.to_dict(orient='records')
+        if versions is not None:
+            for record, version in zip(records, versions):
+                record[THUMBNAIL_VERSION_FIELD] = version
+        return records
+    
+    def serialize_artworks(self, offset: int = 0, limit: Optional[int] = None,
+                           after_id: Optional[int] = None,
+                           fields: Optional[List[str]] = None) -> Dict:
+        """
+        Retourne une page d'œuvres sérialisée en JSON, mise en cache jusqu'au prochain
+        ajout d'œuvre
+        
+        Args:
+            offset: Nombre d'œuvres à sauter
+            limit: Nombre maximal d'œuvres (None: toutes les suivantes)
+            after_id: Curseur, la page commence après l'œuvre de cet ID
+            fields: Colonnes à retourner (None: toutes)
+        
+        Returns:
+            Dictionnaire avec le corps JSON ("body"), son empreinte ("etag"), le nombre
+            total d'œuvres ("total") et le curseur de la page suivante ("next_after_id",
+            None sur la dernière page)
+        """
+        # La version est lue avant les données : au pire, une page plus récente est
+        # mise en cache sous une version périmée, jamais l'inverse
+        version = self.version
+        data = self.artwork_data
+        key = (version, offset, limit, after_id, tuple(fields) if fields else None)
+        
+        with self._serialized_lock:
+            cached = self._serialized_cache.get(key)
+            if cached is not None:
+                self._serialized_cache.move_to_end(key)
+                return cached
+        
+        start = self._page_start(offset, after_id)
+        records = self._page_records(data, start, limit, fields)
+        body = json.dumps(records, ensure_ascii=False, allow_nan=False,
+                          separators=(",", ":")).encode("utf-8")
+        
+        next_after_id = None
+        last_row = start + len(records) - 1
+        if records and limit is not None and last_row < len(data) - 1:
+            next_after_id = int(data['id'].iat[last_row])
+        
+        page = {
+            "body": body,
+            "etag": '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"',
+            "total": len(data),
+            "next_after_id": next_after_id
+        }
+        
+        with self._serialized_lock:
+            # Les pages des versions précédentes sont périmées (celles d'une version plus
+            # récente, mises en cache par un autre thread, sont gardées)
+            if self._serialized_cache and next(iter(self._serialized_cache))[0] < version:
+                for stale in [k for k in self._serialized_cache if k[0] < version]:
+                    del self._serialized_cache[stale]
+            self._serialized_cache[key] = page
+            while len(self._serialized_cache) > SERIALIZED_CACHE_SIZE:
+                self._serialized_cache.popitem(last=False)
+        return page
     
     def get_questions(self) -> List[Dict]:
         """
@@ -132,29 +415,107 @@ class DataManager:
         Returns:
             ID de la nouvelle œuvre
         """
-        # Générer un nouvel ID
-        new_id = 0 if len(self.artwork_data) == 0 else self.artwork_data['id'].max() + 1
-        artwork['id'] = new_id
+        return self.add_artworks([artwork])[0]
+    
+    @_timed_io("add_artwork")
+    def add_artworks(self, artworks: List[Dict]) -> List[int]:
+        """
+        Ajoute de nouvelles œuvres : lignes mises en attente du DataFrame et une seule
+        écriture (avec fsync) dans le journal pour tout le lot
         
-        # Ajouter l'œuvre au DataFrame
-        self.artwork_data = pd.concat([self.artwork_data, pd.DataFrame([artwork])], ignore_index=True)
+        Args:
+            artworks: Dictionnaires des informations des œuvres (l'ID y est ajouté)
         
-        # Sauvegarder les données
-        artwork_csv = os.path.join(self.data_dir, 'artworks.csv')
-        self.artwork_data.to_csv(artwork_csv, index=False)
+        Returns:
+            IDs des nouvelles œuvres
+        """
+        with self._pending_lock:
+            # Générer les nouveaux IDs
+            new_ids = list(range(self._next_id, self._next_id + len(artworks)))
+            for artwork, new_id in zip(artworks, new_ids):
+                artwork['id'] = new_id
+            
+            # Ajouter des lignes au journal plutôt que réécrire tout le CSV ; les œuvres
+            # ne sont visibles qu'une fois l'écriture réussie, et une écriture interrompue
+            # est retirée du journal (sans quoi la ligne suivante y serait accolée)
+            log_path = os.path.join(self.data_dir, ARTWORK_LOG_FILE)
+            log_size = os.path.getsize(log_path) if os.path.exists(log_path) else 0
+            try:
+                with open(log_path, 'a') as f:
+                    f.write(''.join(json.dumps(artwork) + '\n' for artwork in artworks))
+                    f.flush()
+                    os.fsync(f.fileno())
+            except BaseException:
+                if os.path.exists(log_path):
+                    with open(log_path, 'r+') as f:
+                        f.truncate(log_size)
+                raise
+            self._log_entries += len(artworks)
+            
+            first_row = (len(self._artwork_data) if self._artwork_data is not None else 0) + len(self._pending_artworks)
+            self._id_index.update(zip(new_ids, range(first_row, first_row + len(artworks))))
+            self._next_id += len(artworks)
+            self._pending_artworks.extend(artworks)
+        self.version += 1
+        
+        return new_ids
+    
+    def add_artworks_with_features(self, artworks: List[Dict], features: np.ndarray) -> List[int]:
+        """
+        Ajoute de nouvelles œuvres et leurs caractéristiques, en gardant les deux
+        stockages alignés : caractéristiques d'abord, retirées si l'ajout des
+        métadonnées échoue
+        
+        Args:
+            artworks: Dictionnaires des informations des œuvres (l'ID y est ajouté)
+            features: Caractéristiques des œuvres (une ligne par œuvre)
         
-        return new_id
+        Returns:
+            IDs des nouvelles œuvres
+        """
+        features = np.asarray(features, dtype=FeatureStore.DTYPE)
+        if features.ndim != 2 or features.shape[0] != len(artworks):
+            raise ValueError(f"{len(artworks)} lignes de caractéristiques attendues ({features.shape} reçues)")
+        if self.feature_store.exists() and features.shape[1] != self.feature_store.dim:
+            raise ValueError(f"Dimension incompatible: {features.shape[1]} au lieu de {self.feature_store.dim}")
+        if self.features is not None and len(self.artwork_data) != self.feature_store.count:
+            raise ValueError(f"Œuvres ({len(self.artwork_data)}) et caractéristiques "
+                             f"({self.feature_store.count}) désalignées")
+        
+        count = self.feature_store.count
+        self.append_features(features)
+        try:
+            return self.add_artworks(artworks)
+        except BaseException:
+            self.feature_store.truncate(count)
+            self.features = self.feature_store.view()
+            if self.feature_store.count != len(self.artwork_data):
+                raise RuntimeError(f"Annulation incomplète : {len(self.artwork_data)} œuvres pour "
+                                   f"{self.feature_store.count} caractéristiques")
+            raise
     
+    @_timed_io("replace_features")
     def update_features(self, features: np.ndarray) -> None:
         """
-        Met à jour les caractéristiques des œuvres
+        Remplace toutes les caractéristiques des œuvres
         
         Args:
             features: Matrice de caractéristiques
         """
-        self.features = features
-        features_npy = os.path.join(self.data_dir, 'features.npy')
-        np.save(features_npy, features)
+        self.feature_store.replace(features)
+        self.features = self.feature_store.view()
+    
+    @_timed_io("append_features")
+    def append_features(self, features: np.ndarray) -> None:
+        """
+        Ajoute les caractéristiques de nouvelles œuvres en fin de stockage, en O(d) amorti
+        par œuvre
+        
+        Args:
+            features: Caractéristiques des nouvelles œuvres (une ligne par œuvre)
+        """
+        self.feature_store.append(features)
+        self.features = self.feature_store.view()
     
     def get_features(self) -> Optional[np.ndarray]:
         """
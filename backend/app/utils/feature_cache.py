@@ -0,0 +1,123 @@
+import hashlib
+import json
+import os
+import numpy as np
+from typing import Dict, List, Tuple
+
+def file_sha256(path: str, chunk_size: int = 1 << 20) -> str:
+    """
+    Calcule l'empreinte SHA-256 du contenu d'un fichier
+    
+    Args:
+        path: Chemin du fichier
+        chunk_size: Taille des blocs lus
+    
+    Returns:
+        Empreinte hexadécimale
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class FeatureCache:
+    """
+    Cache persistant des vecteurs de caractéristiques, indexé par empreinte du contenu
+    de l'image et par nom du modèle d'extraction
+    
+    Les vecteurs d'un modèle sont stockés dans <cache_dir>/<backbone>/vectors.npy, et les
+    empreintes correspondantes (dans le même ordre) dans keys.json.
+    """
+    def __init__(self, cache_dir: str, backbone: str):
+        """
+        Initialise le cache et charge les vecteurs déjà enregistrés
+        
+        Args:
+            cache_dir: Répertoire racine du cache
+            backbone: Nom du modèle d'extraction (les vecteurs de modèles différents
+                ne sont jamais mélangés)
+        """
+        self.directory = os.path.join(cache_dir, backbone)
+        self.keys_path = os.path.join(self.directory, "keys.json")
+        self.vectors_path = os.path.join(self.directory, "vectors.npy")
+        
+        self._index: Dict[str, int] = {}
+        self._vectors = np.zeros((0, 0), dtype=np.float32)
+        self._pending_keys: List[str] = []
+        self._pending_vectors: List[np.ndarray] = []
+        
+        if os.path.exists(self.keys_path) and os.path.exists(self.vectors_path):
+            try:
+                with open(self.keys_path, 'r') as f:
+                    keys = json.load(f)
+                vectors = np.load(self.vectors_path)
+                if len(keys) == vectors.shape[0]:
+                    self._index = {key: i for i, key in enumerate(keys)}
+                    self._vectors = vectors
+                else:
+                    print(f"Cache de caractéristiques incohérent, ignoré: {self.directory}")
+            except Exception as e:
+                print(f"Erreur lors du chargement du cache de caractéristiques: {e}")
+    
+    def __len__(self) -> int:
+        return len(self._index) + len(self._pending_keys)
+    
+    def lookup(self, keys: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Recherche les vecteurs associés à une liste d'empreintes
+        
+        Args:
+            keys: Empreintes des images
+        
+        Returns:
+            Tuple (masque des empreintes trouvées, vecteurs trouvés dans l'ordre de keys)
+        """
+        rows = np.array([self._index.get(key, -1) for key in keys], dtype=np.int64)
+        found = rows >= 0
+        return found, self._vectors[rows[found]]
+    
+    def put_many(self, keys: List[str], vectors: np.ndarray) -> None:
+        """
+        Ajoute des vecteurs au cache (enregistrés sur disque par save)
+        
+        Args:
+            keys: Empreintes des images
+            vectors: Vecteurs correspondants (une ligne par empreinte)
+        """
+        pending = set(self._pending_keys)
+        for key, vector in zip(keys, vectors):
+            if key not in self._index and key not in pending:
+                pending.add(key)
+                self._pending_keys.append(key)
+                self._pending_vectors.append(np.asarray(vector, dtype=np.float32))
+    
+    def save(self) -> None:
+        """
+        Intègre les nouveaux vecteurs et réécrit le cache de manière atomique
+        """
+        if not self._pending_keys:
+            return
+        
+        pending = np.vstack(self._pending_vectors)
+        if self._vectors.shape[0] == 0:
+            self._vectors = pending
+        else:
+            self._vectors = np.vstack([self._vectors, pending])
+        
+        start = len(self._index)
+        for i, key in enumerate(self._pending_keys):
+            self._index[key] = start + i
+        self._pending_keys, self._pending_vectors = [], []
+        
+        os.makedirs(self.directory, exist_ok=True)
+        keys = sorted(self._index, key=self._index.get)
+        
+        # Écrire dans des fichiers temporaires puis les renommer
+        tmp_vectors = self.vectors_path + ".tmp.npy"
+        tmp_keys = self.keys_path + ".tmp"
+        np.save(tmp_vectors, self._vectors)
+        with open(tmp_keys, 'w') as f:
+            json.dump(keys, f)
+        os.replace(tmp_vectors, self.vectors_path)
+        os.replace(tmp_keys, self.keys_path)
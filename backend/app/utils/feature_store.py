@@ -0,0 +1,155 @@
+import json
+import os
+import numpy as np
+from typing import Optional
+
+class FeatureStore:
+    """
+    Stockage des caractéristiques en ajout seul, dans un fichier .npy projeté en mémoire
+    
+    Le fichier est préalloué avec une capacité supérieure au nombre de lignes utiles ;
+    la capacité double lorsqu'elle est atteinte, ce qui rend l'ajout d'une œuvre en O(d)
+    amorti au lieu d'une réécriture complète de la matrice. Le nombre de lignes utiles
+    est enregistré dans un fichier JSON séparé, mis à jour de manière atomique après
+    l'écriture des données : une interruption pendant un ajout laisse le stockage cohérent.
+    """
+    DTYPE = np.float32
+    
+    def __init__(self, path: str):
+        """
+        Ouvre le stockage s'il existe
+        
+        Args:
+            path: Chemin du fichier de données (.npy), les métadonnées sont dans path + ".json"
+        """
+        self.path = path
+        self.meta_path = path + ".json"
+        self.count = 0
+        self._data: Optional[np.memmap] = None
+        
+        if os.path.exists(self.path) and os.path.exists(self.meta_path):
+            with open(self.meta_path, 'r') as f:
+                meta = json.load(f)
+            self._data = np.load(self.path, mmap_mode='r+')
+            self.count = min(int(meta["count"]), self._data.shape[0])
+    
+    def exists(self) -> bool:
+        """
+        Indique si le stockage contient une matrice
+        """
+        return self._data is not None
+    
+    @property
+    def capacity(self) -> int:
+        return 0 if self._data is None else self._data.shape[0]
+    
+    @property
+    def dim(self) -> Optional[int]:
+        return None if self._data is None else self._data.shape[1]
+    
+    def view(self) -> Optional[np.ndarray]:
+        """
+        Retourne les lignes utiles (vue sans copie sur le fichier projeté)
+        
+        Returns:
+            Matrice count×d ou None si le stockage est vide
+        """
+        if self._data is None:
+            return None
+        return self._data[:self.count]
+    
+    def _write_meta(self) -> None:
+        """
+        Enregistre le nombre de lignes utiles de manière atomique
+        """
+        tmp_path = self.meta_path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({"count": self.count, "dim": self.dim, "dtype": np.dtype(self.DTYPE).name}, f)
+        os.replace(tmp_path, self.meta_path)
+    
+    def _allocate(self, capacity: int, dim: int) -> None:
+        """
+        Crée un nouveau fichier de la capacité donnée et y recopie les lignes utiles
+        """
+        tmp_path = self.path + ".tmp.npy"
+        data = np.lib.format.open_memmap(tmp_path, mode='w+', dtype=self.DTYPE, shape=(capacity, dim))
+        if self._data is not None and self.count > 0:
+            data[:self.count] = self._data[:self.count]
+        data.flush()
+        del data
+        
+        os.replace(tmp_path, self.path)
+        self._data = np.load(self.path, mmap_mode='r+')
+    
+    def replace(self, features: np.ndarray) -> None:
+        """
+        Remplace tout le contenu du stockage (import initial)
+        
+        Args:
+            features: Matrice de caractéristiques
+        """
+        features = np.asarray(features, dtype=self.DTYPE)
+        self.count = 0
+        self._data = None
+        self._allocate(max(features.shape[0], 1), features.shape[1])
+        self._data[:features.shape[0]] = features
+        self._data.flush()
+        self.count = features.shape[0]
+        self._write_meta()
+    
+    def append(self, vectors: np.ndarray) -> int:
+        """
+        Ajoute des vecteurs en fin de stockage
+        
+        Args:
+            vectors: Vecteurs à ajouter (k×d ou d)
+        
+        Returns:
+            Index de la première ligne ajoutée
+        """
+        vectors = np.asarray(vectors, dtype=self.DTYPE)
+        vectors = vectors.reshape(-1, vectors.shape[-1])
+        if self._data is None or (self.count == 0 and vectors.shape[1] != self.dim):
+            # Stockage vide (ou vidé par truncate) : la dimension est celle des vecteurs
+            self.replace(vectors)
+            return 0
+        
+        if vectors.shape[1] != self.dim:
+            raise ValueError(f"Dimension incompatible: {vectors.shape[1]} au lieu de {self.dim}")
+        
+        needed = self.count + vectors.shape[0]
+        if needed > self.capacity:
+            self._allocate(max(needed, 2 * self.capacity), self.dim)
+        
+        start = self.count
+        self._data[start:needed] = vectors
+        self._data.flush()
+        self.count = needed
+        self._write_meta()
+        return start
+    
+    def truncate(self, count: int) -> None:
+        """
+        Retire les dernières lignes (annulation d'un ajout)
+        
+        Args:
+            count: Nombre de lignes utiles conservées
+        """
+        if not 0 <= count <= self.count:
+            raise ValueError(f"Impossible de tronquer à {count} lignes (le stockage en contient {self.count})")
+        self.count = count
+        self._write_meta()
+    
+    def export(self, path: str) -> None:
+        """
+        Écrit les lignes utiles dans un fichier .npy autonome (écriture atomique) ; les
+        métadonnées du stockage sont réécrites ensuite, pour que le stockage reste plus
+        récent que l'export et ne soit pas réimporté au prochain chargement
+        
+        Args:
+            path: Chemin du fichier .npy
+        """
+        tmp_path = path + ".tmp.npy"
+        np.save(tmp_path, self.view())
+        os.replace(tmp_path, path)
+        self._write_meta()
@@ -0,0 +1,134 @@
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+
+class BatchJobQueue:
+    """
+    File de tâches traitées en arrière-plan par un thread unique, qui regroupe les
+    tâches en attente en micro-lots (un seul appel de traitement par lot)
+    """
+    def __init__(self, process_batch: Callable[[List[Dict]], List[Dict]],
+                 max_batch_size: int = 16, max_wait_seconds: float = 0.05,
+                 max_finished_jobs: int = 1000):
+        """
+        Initialise la file (le thread de traitement démarre à la première tâche)
+        
+        Args:
+            process_batch: Fonction traitant une liste de charges utiles et retournant
+                un résultat par tâche, dans le même ordre
+            max_batch_size: Nombre maximal de tâches par lot
+            max_wait_seconds: Délai d'attente des tâches suivantes après la première
+            max_finished_jobs: Nombre de tâches terminées conservées pour consultation
+        """
+        self.process_batch = process_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait_seconds = max_wait_seconds
+        self.max_finished_jobs = max_finished_jobs
+        
+        self._queue: "queue.Queue[str]" = queue.Queue()
+        self._jobs: "OrderedDict[str, Dict]" = OrderedDict()
+        self._payloads: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        self._worker: Optional[threading.Thread] = None
+    
+    def submit(self, payload: Dict) -> str:
+        """
+        Ajoute une tâche à la file
+        
+        Args:
+            payload: Données de la tâche, transmises à process_batch
+        
+        Returns:
+            Identifiant de la tâche
+        """
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            self._jobs[job_id] = {
+                "id": job_id,
+                "status": "pending",
+                "created_at": time.time(),
+                "finished_at": None,
+                "result": None,
+                "error": None
+            }
+            self._payloads[job_id] = payload
+            self._ensure_worker()
+        self._queue.put(job_id)
+        return job_id
+    
+    def get(self, job_id: str) -> Optional[Dict]:
+        """
+        Retourne l'état d'une tâche
+        
+        Args:
+            job_id: Identifiant de la tâche
+        
+        Returns:
+            Copie de l'état de la tâche ou None si inconnue
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+    
+    def _ensure_worker(self) -> None:
+        """
+        Démarre le thread de traitement s'il ne tourne pas (à appeler avec le verrou)
+        """
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(target=self._run, name="batch-job-worker", daemon=True)
+            self._worker.start()
+    
+    def _next_batch(self) -> List[str]:
+        """
+        Attend une tâche puis regroupe celles qui arrivent pendant max_wait_seconds
+        """
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait_seconds
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=max(remaining, 0)) if remaining > 0
+                             else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+    
+    def _run(self) -> None:
+        """
+        Boucle du thread de traitement
+        """
+        while True:
+            job_ids = self._next_batch()
+            
+            with self._lock:
+                payloads = [self._payloads.pop(job_id) for job_id in job_ids]
+                for job_id in job_ids:
+                    self._jobs[job_id]["status"] = "running"
+            
+            try:
+                results = self.process_batch(payloads)
+                error = None
+            except Exception as e:
+                print(f"Erreur lors du traitement d'un lot de {len(job_ids)} tâches: {e}")
+                results, error = [None] * len(job_ids), str(e)
+            
+            with self._lock:
+                now = time.time()
+                for job_id, result in zip(job_ids, results):
+                    job = self._jobs[job_id]
+                    job["status"] = "failed" if error else "done"
+                    job["result"] = result
+                    job["error"] = error
+                    job["finished_at"] = now
+                self._forget_old_jobs()
+    
+    def _forget_old_jobs(self) -> None:
+        """
+        Oublie les tâches terminées les plus anciennes (à appeler avec le verrou)
+        """
+        finished = [job_id for job_id, job in self._jobs.items() if job["status"] in ("done", "failed")]
+        for job_id in finished[:max(0, len(finished) - self.max_finished_jobs)]:
+            del self._jobs[job_id]
@@ -0,0 +1,121 @@
+import json
+import os
+import threading
+from typing import Dict, List, Optional
+
+class LabelJournal:
+    """
+    Journal en ajout seul des classifications (write-ahead log)
+    
+    Chaque classification est ajoutée sous forme d'une ligne JSON numérotée et
+    synchronisée sur disque, ce qui rend le coût d'un enregistrement constant quelle que
+    soit la progression. Un instantané complet de l'état est écrit périodiquement ; les
+    enregistrements dont le numéro est inférieur ou égal à celui de l'instantané sont
+    alors retirés du journal.
+    """
+    def __init__(self, path: str):
+        """
+        Ouvre le journal et détermine le dernier numéro de séquence
+        
+        Args:
+            path: Chemin du fichier journal
+        """
+        self.path = path
+        self.last_seq = 0
+        self.snapshot_seq = 0
+        self._lock = threading.Lock()
+        
+        records = self.read_after(0)
+        if records:
+            self.last_seq = records[-1]["seq"]
+            self.snapshot_seq = records[0]["seq"] - 1
+        
+        # Réécrire le journal si sa dernière ligne a été tronquée, pour que les
+        # enregistrements suivants ne lui soient pas accolés
+        if os.path.exists(self.path) and os.path.getsize(self.path) > 0:
+            with open(self.path, 'rb') as f:
+                f.seek(-1, os.SEEK_END)
+                truncated = f.read(1) != b'\n'
+            if truncated:
+                self.compact(self.snapshot_seq)
+    
+    def __len__(self) -> int:
+        """
+        Nombre d'enregistrements postérieurs au dernier instantané
+        """
+        return self.last_seq - self.snapshot_seq
+    
+    def advance_to(self, seq: int) -> None:
+        """
+        Signale qu'un instantané couvre le journal jusqu'au numéro donné
+        (les numéros suivants restent ainsi croissants après une compaction)
+        
+        Args:
+            seq: Numéro du dernier enregistrement couvert par l'instantané
+        """
+        with self._lock:
+            self.snapshot_seq = max(self.snapshot_seq, seq)
+            self.last_seq = max(self.last_seq, seq)
+    
+    def append(self, artwork_id: int, classification: Optional[Dict[str, str]]) -> int:
+        """
+        Ajoute une classification au journal
+        
+        Args:
+            artwork_id: ID de l'œuvre
+            classification: Réponses par question (None pour un retrait d'étiquette)
+        
+        Returns:
+            Numéro de séquence de l'enregistrement
+        """
+        with self._lock:
+            self.last_seq += 1
+            record = {"seq": self.last_seq, "artwork_id": int(artwork_id), "classification": classification}
+            with open(self.path, 'a') as f:
+                f.write(json.dumps(record) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+            return self.last_seq
+    
+    def read_after(self, seq: int) -> List[Dict]:
+        """
+        Lit les enregistrements postérieurs à un numéro de séquence
+        
+        Args:
+            seq: Numéro de séquence de l'instantané
+        
+        Returns:
+            Liste des enregistrements, dans l'ordre du journal
+        """
+        if not os.path.exists(self.path):
+            return []
+        
+        records = []
+        with open(self.path, 'r') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # Ligne tronquée par une interruption pendant l'écriture
+                    continue
+                if record.get("seq", 0) > seq:
+                    records.append(record)
+        return records
+    
+    def compact(self, seq: int) -> None:
+        """
+        Retire du journal les enregistrements couverts par un instantané
+        
+        Args:
+            seq: Numéro du dernier enregistrement couvert par l'instantané
+        """
+        with self._lock:
+            remaining = self.read_after(seq)
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, 'w') as f:
+                for record in remaining:
+                    f.write(json.dumps(record) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+            self.snapshot_seq = max(self.snapshot_seq, seq)
@@ -0,0 +1,181 @@
+import functools
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Bornes des histogrammes de durées (en secondes)
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+def _format_labels(labels: Tuple[Tuple[str, str], ...]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels) + "}"
+
+class _Metric:
+    """
+    Métrique nommée, avec une série de valeurs par combinaison d'étiquettes
+    """
+    kind = "untyped"
+    
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help_text = help_text
+        self._series: Dict[Tuple[Tuple[str, str], ...], object] = {}
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def _key(labels: Dict[str, object]) -> Tuple[Tuple[str, str], ...]:
+        return tuple(sorted((name, str(value)) for name, value in labels.items()))
+    
+    def _header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+
+class Counter(_Metric):
+    """
+    Compteur croissant (ex: nombre de requêtes)
+    """
+    kind = "counter"
+    
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0.0) + amount
+    
+    def render(self) -> List[str]:
+        with self._lock:
+            series = list(self._series.items())
+        return self._header() + [f"{self.name}{_format_labels(key)} {value}" for key, value in series]
+
+class Gauge(Counter):
+    """
+    Valeur instantanée (ex: requêtes en cours)
+    """
+    kind = "gauge"
+    
+    def dec(self, amount: float = 1.0, **labels) -> None:
+        self.inc(-amount, **labels)
+    
+    def set(self, value: float, **labels) -> None:
+        with self._lock:
+            self._series[self._key(labels)] = float(value)
+
+class Histogram(_Metric):
+    """
+    Répartition de durées par tranches cumulatives, avec leur somme et leur nombre
+    """
+    kind = "histogram"
+    
+    def __init__(self, name: str, help_text: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, help_text)
+        self.buckets = tuple(sorted(buckets))
+    
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        # Tranche de la valeur (la dernière correspond à +Inf)
+        position = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][position] += 1
+            series[1] += value
+    
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        """
+        Mesure la durée du bloc (enregistrée même si le bloc lève une exception)
+        """
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+    
+    def render(self) -> List[str]:
+        with self._lock:
+            series = [(key, list(counts), total) for key, (counts, total) in self._series.items()]
+        
+        lines = self._header()
+        for key, counts, total in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{self.name}_bucket{_format_labels(key + (('le', le),))} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {cumulative}")
+        return lines
+
+class MetricsRegistry:
+    """
+    Registre des métriques de l'application, exposées au format texte de Prometheus
+    
+    Les métriques sont créées à leur première utilisation ; l'enregistrement d'une
+    valeur ne coûte qu'une prise de verrou et quelques opérations sur un dictionnaire.
+    """
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+    
+    def _get(self, cls, name: str, help_text: str, **kwargs) -> _Metric:
+        metric = self._metrics.get(name)
+        if metric is None:
+            with self._lock:
+                metric = self._metrics.get(name)
+                if metric is None:
+                    metric = self._metrics[name] = cls(name, help_text, **kwargs)
+        if not isinstance(metric, cls):
+            raise ValueError(f"La métrique {name} existe déjà avec un autre type")
+        return metric
+    
+    def counter(self, name: str, help_text: str = "") -> Counter:
+        return self._get(Counter, name, help_text)
+    
+    def gauge(self, name: str, help_text: str = "") -> Gauge:
+        return self._get(Gauge, name, help_text)
+    
+    def histogram(self, name: str, help_text: str = "",
+                  buckets: Optional[Tuple[float, ...]] = None) -> Histogram:
+        if buckets is None:
+            return self._get(Histogram, name, help_text)
+        return self._get(Histogram, name, help_text, buckets=buckets)
+    
+    def render(self) -> str:
+        """
+        Retourne toutes les métriques au format texte d'exposition de Prometheus
+        """
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda metric: metric.name)
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+# Registre partagé par toute l'application
+registry = MetricsRegistry()
+
+def timer(name: str, help_text: str = "", **labels):
+    """
+    Mesure la durée d'un bloc dans l'histogramme name du registre partagé
+    
+    Exemple: with timer("learner_update_seconds", "Durée de ActiveLearner.update"): ...
+    """
+    return registry.histogram(name, help_text).time(**labels)
+
+def timed(name: str, help_text: str = "", **labels):
+    """
+    Décorateur mesurant la durée de chaque appel de la fonction dans l'histogramme
+    name du registre partagé
+    """
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with timer(name, help_text, **labels):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,77 @@
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+class ReservationRegistry:
+    """
+    Réservations temporaires d'œuvres par session, pour que plusieurs conservateurs
+    qui classifient en parallèle ne reçoivent pas les mêmes œuvres
+    """
+    def __init__(self, ttl_seconds: float = 300.0):
+        """
+        Initialise le registre
+        
+        Args:
+            ttl_seconds: Durée de validité par défaut d'une réservation (en secondes)
+        """
+        self.ttl_seconds = ttl_seconds
+        self._reservations: Dict[int, Tuple[str, float]] = {}  # ID d'œuvre -> (session, expiration)
+        self._lock = threading.Lock()
+    
+    def _purge_expired(self, now: float) -> None:
+        """
+        Supprime les réservations expirées (à appeler avec le verrou)
+        """
+        expired = [artwork_id for artwork_id, (_, expires_at) in self._reservations.items()
+                   if expires_at <= now]
+        for artwork_id in expired:
+            del self._reservations[artwork_id]
+    
+    def reserve(self, artwork_ids: Iterable[int], session_id: str,
+                ttl_seconds: Optional[float] = None) -> float:
+        """
+        Réserve des œuvres pour une session
+        
+        Args:
+            artwork_ids: IDs des œuvres à réserver
+            session_id: Identifiant de la session
+            ttl_seconds: Durée de la réservation (par défaut celle du registre)
+        
+        Returns:
+            Horodatage d'expiration des réservations
+        """
+        now = time.time()
+        expires_at = now + (ttl_seconds if ttl_seconds is not None else self.ttl_seconds)
+        with self._lock:
+            self._purge_expired(now)
+            for artwork_id in artwork_ids:
+                self._reservations[int(artwork_id)] = (session_id, expires_at)
+        return expires_at
+    
+    def release(self, artwork_ids: Iterable[int]) -> None:
+        """
+        Libère les réservations des œuvres données
+        
+        Args:
+            artwork_ids: IDs des œuvres à libérer
+        """
+        with self._lock:
+            for artwork_id in artwork_ids:
+                self._reservations.pop(int(artwork_id), None)
+    
+    def reserved_by_others(self, session_id: Optional[str]) -> List[int]:
+        """
+        Retourne les œuvres réservées par d'autres sessions
+        
+        Args:
+            session_id: Identifiant de la session courante (None: toutes les réservations)
+        
+        Returns:
+            Liste des IDs d'œuvres réservées par une autre session
+        """
+        now = time.time()
+        with self._lock:
+            self._purge_expired(now)
+            return [artwork_id for artwork_id, (owner, _) in self._reservations.items()
+                    if owner != session_id]
@@ -0,0 +1,51 @@
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator
+
+class StartupTimer:
+    """
+    Mesure la durée des étapes du démarrage (import, chargement des données,
+    chargement de l'état) pour suivre le temps de démarrage à froid
+    """
+    def __init__(self):
+        self.phases: Dict[str, float] = {}
+    
+    def record(self, name: str, seconds: float) -> None:
+        """
+        Enregistre la durée d'une étape
+        
+        Args:
+            name: Nom de l'étape
+            seconds: Durée en secondes
+        """
+        self.phases[name] = round(seconds, 4)
+    
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """
+        Mesure la durée du bloc et l'enregistre sous le nom donné
+        
+        Args:
+            name: Nom de l'étape
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+    
+    def report(self) -> Dict[str, float]:
+        """
+        Retourne la durée de chaque étape et la durée totale
+        
+        Returns:
+            Dictionnaire étape -> durée en secondes
+        """
+        return {**self.phases, "total": round(sum(self.phases.values()), 4)}
+    
+    def print_report(self) -> None:
+        """
+        Affiche le rapport de démarrage
+        """
+        details = ", ".join(f"{name}: {seconds:.2f}s" for name, seconds in self.report().items())
+        print(f"Démarrage de l'API - {details}")
@@ -0,0 +1,170 @@
+import os
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from PIL import Image
+
+from .feature_cache import file_sha256
+
+# Largeurs des miniatures (en pixels) et formats disponibles
+THUMBNAIL_WIDTHS = (200, 400, 800)
+THUMBNAIL_FORMATS = {
+    "webp": ("WEBP", "image/webp"),
+    "jpeg": ("JPEG", "image/jpeg"),
+}
+
+# Longueur de la version d'une image (préfixe de l'empreinte de son contenu) transmise
+# dans les URL des miniatures
+THUMBNAIL_VERSION_LENGTH = 16
+
+class ThumbnailCache:
+    """
+    Miniatures des images, générées à la demande ou à l'initialisation, et enregistrées
+    sur disque sous <cache_dir>/<empreinte du contenu>/<largeur>.<format>
+    
+    L'empreinte du contenu rend les miniatures d'une image inchangée réutilisables
+    d'une exécution à l'autre, et ne confond jamais deux versions d'un même fichier.
+    """
+    def __init__(self, images_dir: str, cache_dir: str, widths: Tuple[int, ...] = THUMBNAIL_WIDTHS,
+                 quality: int = 80):
+        """
+        Initialise le cache
+        
+        Args:
+            images_dir: Répertoire des images originales
+            cache_dir: Répertoire des miniatures
+            widths: Largeurs autorisées
+            quality: Qualité d'encodage (WebP et JPEG)
+        """
+        self.images_dir = images_dir
+        self.cache_dir = cache_dir
+        self.widths = widths
+        self.quality = quality
+        
+        # Nom de fichier -> (date de modification, taille, empreinte)
+        self._hashes: Dict[str, Tuple[float, int, str]] = {}
+        self._lock = threading.Lock()
+    
+    def source_path(self, filename: str) -> Optional[str]:
+        """
+        Retourne le chemin de l'image originale, ou None si le nom est invalide ou
+        si l'image n'existe pas
+        """
+        if not filename or os.path.basename(filename) != filename:
+            return None
+        path = os.path.join(self.images_dir, filename)
+        return path if os.path.isfile(path) else None
+    
+    def content_hash(self, filename: str) -> str:
+        """
+        Retourne l'empreinte du contenu d'une image (recalculée seulement si le
+        fichier a changé)
+        
+        Args:
+            filename: Nom du fichier dans images_dir
+        """
+        path = os.path.join(self.images_dir, filename)
+        stat = os.stat(path)
+        cached = self._hashes.get(filename)
+        if cached is not None and cached[:2] == (stat.st_mtime, stat.st_size):
+            return cached[2]
+        
+        digest = file_sha256(path)
+        with self._lock:
+            self._hashes[filename] = (stat.st_mtime, stat.st_size, digest)
+        return digest
+    
+    def version(self, filename: str) -> Optional[str]:
+        """
+        Retourne la version d'une image, à passer dans l'URL de ses miniatures pour
+        qu'elles puissent être gardées en cache indéfiniment
+        
+        Args:
+            filename: Nom du fichier dans images_dir
+        
+        Returns:
+            Préfixe de l'empreinte du contenu, ou None si l'image n'existe pas
+        """
+        if self.source_path(filename) is None:
+            return None
+        try:
+            return self.content_hash(filename)[:THUMBNAIL_VERSION_LENGTH]
+        except OSError:
+            return None
+    
+    def get(self, filename: str, width: int, fmt: str = "webp") -> Tuple[str, str]:
+        """
+        Retourne la miniature d'une image, générée si elle n'existe pas encore
+        
+        Args:
+            filename: Nom du fichier dans images_dir
+            width: Largeur de la miniature (parmi widths)
+            fmt: Format de la miniature (clé de THUMBNAIL_FORMATS)
+        
+        Returns:
+            Tuple (chemin de la miniature, empreinte du contenu de l'image originale)
+        """
+        if width not in self.widths:
+            raise ValueError(f"Largeur non disponible: {width}")
+        if fmt not in THUMBNAIL_FORMATS:
+            raise ValueError(f"Format non disponible: {fmt}")
+        source = self.source_path(filename)
+        if source is None:
+            raise FileNotFoundError(filename)
+        
+        digest = self.content_hash(filename)
+        path = os.path.join(self.cache_dir, digest, f"{width}.{fmt}")
+        if not os.path.exists(path):
+            self._render(source, path, width, fmt)
+        return path, digest
+    
+    def _render(self, source: str, path: str, width: int, fmt: str) -> None:
+        """
+        Redimensionne une image (sans l'agrandir) et l'enregistre de manière atomique
+        """
+        image = Image.open(source)
+        if image.format == 'JPEG':
+            # Décodage JPEG directement à une échelle réduite
+            image.draft('RGB', (width, width))
+        image = image.convert('RGB')
+        
+        if image.width > width:
+            height = max(1, round(image.height * width / image.width))
+            image = image.resize((width, height), Image.LANCZOS)
+        
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        pil_format, _ = THUMBNAIL_FORMATS[fmt]
+        options = {"quality": self.quality}
+        if pil_format == "JPEG":
+            options.update(optimize=True, progressive=True)
+        else:
+            options.update(method=4)
+        
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        image.save(tmp_path, pil_format, **options)
+        os.replace(tmp_path, path)
+    
+    def generate_all(self, filenames: Iterable[str], formats: Iterable[str] = ("webp", "jpeg")) -> int:
+        """
+        Génère toutes les miniatures manquantes d'une liste d'images
+        
+        Args:
+            filenames: Noms des fichiers dans images_dir
+            formats: Formats à générer
+        
+        Returns:
+            Nombre d'images traitées
+        """
+        formats: List[str] = list(formats)
+        count = 0
+        for filename in filenames:
+            if self.source_path(filename) is None:
+                continue
+            try:
+                for width in self.widths:
+                    for fmt in formats:
+                        self.get(filename, width, fmt)
+                count += 1
+            except Exception as e:
+                print(f"Erreur lors de la génération des miniatures de {filename}: {e}")
+        return count
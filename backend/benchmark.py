@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+Banc d'essai des chemins critiques de l'active learning et du gestionnaire de données.
+Génère des collections synthétiques de différentes tailles, mesure la latence de chaque
+opération (percentiles) et son pic de mémoire, et écrit les résultats en JSON pour
+comparer les performances d'un commit à l'autre.
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import tracemalloc
+import subprocess
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+# Ajouter le répertoire parent au path pour pouvoir importer les modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.ml.active_learner import ActiveLearner
+from app.utils.data_manager import DataManager
+
+# Tailles de collection mesurées par défaut
+DEFAULT_SIZES = [1000, 10000, 100000, 1000000]
+
+# Réponses possibles de la question synthétique
+ANSWERS = ["portrait", "paysage", "nature morte"]
+
+def generate_collection(size: int, dim: int, seed: int, num_clusters: int = 64):
+    """
+    Génère des caractéristiques regroupées en amas (comme celles d'un CNN) et les
+    métadonnées correspondantes
+    
+    Args:
+        size: Nombre d'œuvres
+        dim: Dimension des caractéristiques
+        seed: Graine du générateur aléatoire
+        num_clusters: Nombre d'amas
+    
+    Returns:
+        Tuple (caractéristiques float32, DataFrame des métadonnées, amas de chaque œuvre)
+    """
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(num_clusters, dim)).astype(np.float32)
+    clusters = rng.integers(0, num_clusters, size=size)
+    
+    features = np.empty((size, dim), dtype=np.float32)
+    for start in range(0, size, 65536):
+        end = min(start + 65536, size)
+        features[start:end] = centers[clusters[start:end]]
+        features[start:end] += rng.normal(scale=0.8, size=(end - start, dim)).astype(np.float32)
+    np.maximum(features, 0.0, out=features)
+    
+    ids = np.arange(size)
+    artwork_data = pd.DataFrame({
+        "id": ids,
+        "title": [f"Œuvre {i}" for i in ids],
+        "artist": [f"Artiste {i % 997}" for i in ids],
+        "year": 1500 + ids % 500,
+        "imagepath": [f"/images/{i:08d}.jpg" for i in ids]
+    })
+    return features, artwork_data, clusters
+
+def measure(operation: Callable[[int], object], repeats: int,
+            prepare: Optional[Callable[[int], object]] = None) -> Dict:
+    """
+    Mesure une opération : latences sur plusieurs répétitions, puis pic de mémoire
+    alloué pendant une répétition supplémentaire (tracemalloc, désactivé pendant
+    les mesures de temps pour ne pas les fausser)
+    
+    Args:
+        operation: Fonction appelée avec le numéro de la répétition
+        repeats: Nombre de répétitions chronométrées
+        prepare: Fonction appelée avant chaque répétition, hors mesure
+    
+    Returns:
+        Dictionnaire des statistiques (en millisecondes et en mégaoctets)
+    """
+    latencies = []
+    for repeat in range(repeats):
+        if prepare is not None:
+            prepare(repeat)
+        started = time.perf_counter()
+        operation(repeat)
+        latencies.append((time.perf_counter() - started) * 1000)
+    
+    if prepare is not None:
+        prepare(repeats)
+    tracemalloc.start()
+    baseline, _ = tracemalloc.get_traced_memory()
+    operation(repeats)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    
+    latencies = np.array(latencies)
+    return {
+        "repeats": repeats,
+        "mean_ms": float(latencies.mean()),
+        "min_ms": float(latencies.min()),
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p90_ms": float(np.percentile(latencies, 90)),
+        "p99_ms": float(np.percentile(latencies, 99)),
+        "max_ms": float(latencies.max()),
+        "peak_memory_mb": (peak - baseline) / 1e6
+    }
+
+def benchmark_size(size: int, dim: int, repeats: int, seed: int, seed_mode: str,
+                   work_dir: str, operations: Optional[List[str]] = None) -> Dict:
+    """
+    Mesure toutes les opérations sur une collection synthétique
+    
+    Args:
+        size: Nombre d'œuvres
+        dim: Dimension des caractéristiques
+        repeats: Nombre de répétitions par opération
+        seed: Graine du générateur aléatoire
+        seed_mode: Recherche de la paire initiale ("exact" ou "approximate")
+        work_dir: Répertoire temporaire (données du DataManager, états enregistrés)
+        operations: Opérations à mesurer (None: toutes)
+    
+    Returns:
+        Dictionnaire opération -> statistiques
+    """
+    print(f"\n=== {size} œuvres ===")
+    started = time.perf_counter()
+    features, artwork_data, clusters = generate_collection(size, dim, seed)
+    print(f"Collection générée en {time.perf_counter() - started:.1f}s "
+          f"({features.nbytes / 1e6:.0f} Mo de caractéristiques)")
+    
+    data_dir = os.path.join(work_dir, str(size))
+    os.makedirs(data_dir, exist_ok=True)
+    artwork_data.to_csv(os.path.join(data_dir, "artworks.csv"), index=False)
+    np.save(os.path.join(data_dir, "features.npy"), features)
+    state_path = os.path.join(data_dir, "model_state.json")
+    
+    learner = ActiveLearner(features, artwork_data, seed_mode=seed_mode)
+    rng = np.random.default_rng(seed)
+    
+    def classify(repeat: int) -> None:
+        index, artwork = learner.get_next_artwork()
+        answer = ANSWERS[clusters[index] % len(ANSWERS)] if rng.random() > 0.1 else rng.choice(ANSWERS)
+        learner.update(artwork["id"], {"type": answer})
+    
+    data_manager: Optional[DataManager] = None
+    
+    def load_data_manager(repeat: int) -> None:
+        nonlocal data_manager
+        data_manager = DataManager(data_dir)
+    
+    operations_table = {
+        "learner_init": lambda repeat: ActiveLearner(features, artwork_data, seed_mode=seed_mode),
+        # Premier appel : calcul de la paire initiale (mémorisée ensuite)
+        "first_next_artwork": lambda repeat: ActiveLearner(features, artwork_data, seed_mode=seed_mode).get_next_artwork(),
+        # Précédée (hors mesure) de l'oubli de la file précalculée : sélection complète
+        "get_next_artwork": lambda repeat: learner.get_next_artwork(),
+        # Servie depuis la file précalculée
+        "get_next_artwork_cached": lambda repeat: learner.get_next_artwork(),
+        "get_next_artworks_10": lambda repeat: learner.get_next_artworks(10),
+        "update": lambda repeat: learner.update(int(artwork_data["id"].iat[rng.integers(size)]),
+                                                {"type": ANSWERS[repeat % len(ANSWERS)]}),
+        "classify_loop": classify,
+        # Précédée (hors mesure) d'une classification : les statistiques sont recalculées
+        "get_stats": lambda repeat: learner.get_stats(),
+        "get_stats_cached": lambda repeat: learner.get_stats(),
+        "save_state": lambda repeat: learner.save_state(state_path),
+        "load_state": lambda repeat: ActiveLearner(features, artwork_data, seed_mode=seed_mode,
+                                                   space=learner.space).load_state(state_path),
+        "data_manager_load": load_data_manager,
+        "get_all_artworks": lambda repeat: data_manager.get_all_artworks(),
+        "serialize_artworks_page": lambda repeat: data_manager.serialize_artworks(
+            offset=(repeat * 100) % max(size - 100, 1), limit=100),
+    }
+    
+    # Préparations hors mesure, avant chaque répétition
+    prepares = {
+        "get_next_artwork": lambda repeat: learner.discard_next_queue(),
+        "get_stats": classify
+    }
+    
+    # Quelques classifications pour que les mesures portent sur un modèle actif
+    for repeat in range(10):
+        classify(repeat)
+    
+    results = {}
+    for name, operation in operations_table.items():
+        if operations and name not in operations:
+            continue
+        # Les opérations coûteuses en O(N) sur les grandes collections sont moins répétées
+        count = repeats if name not in ("learner_init", "first_next_artwork", "data_manager_load") \
+            else max(1, min(repeats, 3))
+        if name in ("get_all_artworks",) and size >= 100000:
+            count = max(1, min(repeats, 3))
+        if data_manager is None and name in ("get_all_artworks", "serialize_artworks_page"):
+            load_data_manager(0)
+        
+        results[name] = measure(operation, count, prepare=prepares.get(name))
+        print(f"{name:<24} p50 {results[name]['p50_ms']:>10.2f} ms   p99 {results[name]['p99_ms']:>10.2f} ms   "
+              f"pic {results[name]['peak_memory_mb']:>8.1f} Mo")
+    
+    shutil.rmtree(data_dir, ignore_errors=True)
+    return results
+
+def git_commit() -> Optional[str]:
+    """
+    Retourne le commit courant (None hors d'un dépôt git)
+    """
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=os.path.dirname(os.path.abspath(__file__)),
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def main():
+    # Analyser les arguments de la ligne de commande
+    parser = argparse.ArgumentParser(description="Mesurer les performances des chemins critiques sur des collections synthétiques")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Tailles de collection mesurées (par défaut: 1000 10000 100000 1000000)")
+    parser.add_argument("--dim", type=int, default=512, help="Dimension des caractéristiques (par défaut: 512)")
+    parser.add_argument("--repeats", type=int, default=20, help="Nombre de répétitions par opération (par défaut: 20)")
+    parser.add_argument("--seed", type=int, default=0, help="Graine du générateur aléatoire (par défaut: 0)")
+    parser.add_argument("--seed-mode", type=str, default="approximate", choices=["exact", "approximate"], help="Recherche de la paire initiale (par défaut: approximate, la recherche exacte étant quadratique)")
+    parser.add_argument("--operations", type=str, nargs="+", default=None, help="Opérations à mesurer (par défaut: toutes)")
+    parser.add_argument("--output", type=str, default="benchmark_results.json", help="Fichier JSON des résultats (par défaut: benchmark_results.json)")
+    
+    args = parser.parse_args()
+    
+    results = {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "environment": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count()
+        },
+        "parameters": {
+            "dim": args.dim,
+            "repeats": args.repeats,
+            "seed": args.seed,
+            "seed_mode": args.seed_mode
+        },
+        "sizes": {}
+    }
+    
+    work_dir = tempfile.mkdtemp(prefix="museum-benchmark-")
+    try:
+        for size in args.sizes:
+            results["sizes"][str(size)] = benchmark_size(size, args.dim, args.repeats, args.seed,
+                                                         args.seed_mode, work_dir, args.operations)
+            # Écrire les résultats après chaque taille (une taille trop grande peut échouer)
+            tmp_path = args.output + ".tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(results, f, indent=2)
+            os.replace(tmp_path, args.output)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    
+    print(f"\nRésultats enregistrés dans: {args.output}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -13,12 +13,17 @@ from pathlib import Path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from app.utils.data_initializer import initialize_system
+from app.ml.feature_extractor import BACKENDS
 
 def main():
     # Analyser les arguments de la ligne de commande
     parser = argparse.ArgumentParser(description="Initialiser le système d'active learning avec des données existantes")
     parser.add_argument("--source", type=str, required=True, help="Répertoire source contenant les fichiers CSV et images")
     parser.add_argument("--data-dir", type=str, default="data", help="Répertoire de destination des données (par défaut: data)")
+    parser.add_argument("--no-feature-cache", action="store_true", help="Réextraire les caractéristiques de toutes les images sans utiliser le cache")
+    parser.add_argument("--backend", type=str, default="eager", choices=BACKENDS, help="Backend d'inférence de l'extracteur de caractéristiques (par défaut: eager)")
+    parser.add_argument("--thumbnails", action="store_true", help="Générer les miniatures de toutes les images (sinon à la première demande)")
+    parser.add_argument("--parity-check", type=int, nargs="?", const=64, default=0, metavar="N", help="Comparer les caractéristiques du backend à celles du modèle eager sur N images (par défaut: 64)")
     
     args = parser.parse_args()
     
@@ -32,7 +37,9 @@ def main():
         return 1
     
     # Initialiser le système
-    success = initialize_system(data_dir, source_dir)
+    success = initialize_system(data_dir, source_dir, use_feature_cache=not args.no_feature_cache,
+                                backend=args.backend, parity_check_size=args.parity_check,
+                                generate_thumbnails=args.thumbnails)
     
     if success:
         print(f"Le système a été initialisé avec succès!")
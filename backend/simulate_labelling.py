@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Simulateur de classification hors ligne : rejoue un oracle (colonne de vérité terrain
+de artworks.csv) face à l'active learner, pour mesurer combien de classifications et
+de millisecondes chaque stratégie de sélection nécessite pour atteindre une précision
+cible. Les simulations (stratégies × graines) sont exécutées en parallèle.
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+# Ajouter le répertoire parent au path pour pouvoir importer les modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.ml.active_learner import ActiveLearner
+
+# Stratégies de sélection comparées :
+# - active : prochaine œuvre choisie par l'active learner (get_next_artwork)
+# - batch : lots d'œuvres informatives et diversifiées (get_next_artworks)
+# - random : œuvre non classifiée tirée au hasard (référence)
+STRATEGIES = ("active", "batch", "random")
+
+# Stratégies sans tirage aléatoire : sans œuvres initiales tirées au hasard, toutes
+# leurs graines donnent la même simulation
+DETERMINISTIC_STRATEGIES = ("active", "batch")
+
+def evaluate(learner: ActiveLearner, question: str, truth: np.ndarray) -> float:
+    """
+    Calcule la précision du modèle sur les œuvres non encore classifiées
+    
+    Args:
+        learner: Learner évalué
+        question: Question simulée
+        truth: Réponse de vérité terrain de chaque œuvre
+    
+    Returns:
+        Proportion des œuvres non classifiées dont la réponse prédite est correcte
+    """
+    unlabeled = ~learner._labeled_mask
+    if not unlabeled.any():
+        return 1.0
+    
+    predictions = learner.model.predict(learner.features[unlabeled]).get(question)
+    if predictions is not None:
+        predicted = np.asarray(predictions[0], dtype=object)
+    else:
+        # Une seule réponse connue : elle est prédite pour toutes les œuvres
+        counts = learner.model.class_counts(question)
+        if not counts:
+            return 0.0
+        predicted = np.full(int(unlabeled.sum()), max(counts, key=counts.get), dtype=object)
+    return float(np.mean(predicted == truth[unlabeled]))
+
+def simulate(features_path: str, artworks_path: str, label_column: str, strategy: str, seed: int,
+             budget: int, eval_every: int, batch_size: int, initial_labels: int,
+             seed_mode: str) -> Dict:
+    """
+    Exécute une simulation (dans un processus du pool)
+    
+    Args:
+        features_path: Chemin de features.npy
+        artworks_path: Chemin de artworks.csv
+        label_column: Colonne de vérité terrain
+        strategy: Stratégie de sélection (parmi STRATEGIES)
+        seed: Graine du générateur aléatoire
+        budget: Nombre maximal de classifications
+        eval_every: Nombre de classifications entre deux évaluations
+        batch_size: Taille des lots de la stratégie batch
+        initial_labels: Nombre d'œuvres tirées au hasard avant d'appliquer la stratégie
+        seed_mode: Recherche de la paire initiale ("exact" ou "approximate")
+    
+    Returns:
+        Dictionnaire de la courbe de précision et des latences de la simulation
+    """
+    features = np.load(features_path, mmap_mode='r')
+    artwork_data = pd.read_csv(artworks_path)
+    truth = artwork_data[label_column].astype(str).to_numpy(dtype=object)
+    ids = artwork_data['id'].astype(int).to_numpy()
+    question = label_column
+    
+    learner = ActiveLearner(np.asarray(features), artwork_data, seed_mode=seed_mode)
+    rng = np.random.default_rng(seed)
+    budget = min(budget, len(ids))
+    
+    labels, accuracy, query_ms, update_ms = [], [], [], []
+    pending: List[int] = []
+    
+    while len(learner.labeled_indices) < budget:
+        # Sélection des prochaines œuvres selon la stratégie
+        started = time.perf_counter()
+        if len(learner.labeled_indices) < initial_labels or strategy == "random":
+            candidates = np.flatnonzero(~learner._labeled_mask)
+            pending = [int(rng.choice(candidates))]
+        elif strategy == "active":
+            pending = [learner.get_next_artwork()[0]]
+        elif strategy == "batch":
+            pending = [index for index, _ in learner.get_next_artworks(batch_size)]
+        else:
+            raise ValueError(f"Stratégie inconnue: {strategy}")
+        elapsed = (time.perf_counter() - started) * 1000
+        if not pending:
+            break
+        
+        # L'oracle répond ; le coût de sélection d'un lot est réparti entre ses œuvres
+        for index in pending[:budget - len(learner.labeled_indices)]:
+            started = time.perf_counter()
+            learner.update(ids[index], {question: truth[index]})
+            update_ms.append((time.perf_counter() - started) * 1000)
+            query_ms.append(elapsed / len(pending))
+            
+            count = len(learner.labeled_indices)
+            if count % eval_every == 0 or count == budget:
+                labels.append(count)
+                accuracy.append(evaluate(learner, question, truth))
+    
+    return {
+        "strategy": strategy,
+        "seed": seed,
+        "labels": labels,
+        "accuracy": accuracy,
+        "query_ms": query_ms,
+        "update_ms": update_ms
+    }
+
+def labels_to_target(run: Dict, target: float) -> Optional[int]:
+    """
+    Retourne le nombre de classifications nécessaires pour atteindre la précision
+    cible (None si elle n'est pas atteinte)
+    """
+    for count, value in zip(run["labels"], run["accuracy"]):
+        if value >= target:
+            return count
+    return None
+
+def summarize(runs: List[Dict], target: float) -> Dict:
+    """
+    Agrège les simulations par stratégie
+    
+    Args:
+        runs: Résultats des simulations
+        target: Précision cible
+    
+    Returns:
+        Dictionnaire stratégie -> statistiques (classifications et temps de sélection
+        cumulé nécessaires pour atteindre la cible, latences, précision finale)
+    """
+    summary = {}
+    for strategy in sorted({run["strategy"] for run in runs}):
+        strategy_runs = [run for run in runs if run["strategy"] == strategy]
+        reached = []
+        reached_ms = []
+        for run in strategy_runs:
+            count = labels_to_target(run, target)
+            run["labels_to_target"] = count
+            if count is not None:
+                reached.append(count)
+                reached_ms.append(float(np.sum(run["query_ms"][:count]) + np.sum(run["update_ms"][:count])))
+        
+        query_ms = np.concatenate([run["query_ms"] for run in strategy_runs])
+        update_ms = np.concatenate([run["update_ms"] for run in strategy_runs])
+        summary[strategy] = {
+            "runs": len(strategy_runs),
+            "reached_target": len(reached),
+            "labels_to_target_mean": float(np.mean(reached)) if reached else None,
+            "labels_to_target_median": float(np.median(reached)) if reached else None,
+            "ms_to_target_mean": float(np.mean(reached_ms)) if reached_ms else None,
+            "query_ms_p50": float(np.percentile(query_ms, 50)) if len(query_ms) else None,
+            "query_ms_p90": float(np.percentile(query_ms, 90)) if len(query_ms) else None,
+            "update_ms_p50": float(np.percentile(update_ms, 50)) if len(update_ms) else None,
+            "final_accuracy_mean": float(np.mean([run["accuracy"][-1] for run in strategy_runs if run["accuracy"]]))
+        }
+    return summary
+
+def main():
+    # Analyser les arguments de la ligne de commande
+    parser = argparse.ArgumentParser(description="Simuler des classifications hors ligne pour comparer les stratégies de sélection")
+    parser.add_argument("--data-dir", type=str, default="data", help="Répertoire contenant features.npy et artworks.csv (par défaut: data)")
+    parser.add_argument("--label-column", type=str, required=True, help="Colonne de artworks.csv servant de vérité terrain (ex: artist)")
+    parser.add_argument("--strategies", type=str, nargs="+", default=list(STRATEGIES), choices=STRATEGIES, help="Stratégies comparées (par défaut: toutes)")
+    parser.add_argument("--seeds", type=int, default=5, help="Nombre de graines par stratégie (par défaut: 5)")
+    parser.add_argument("--budget", type=int, default=200, help="Nombre maximal de classifications par simulation (par défaut: 200)")
+    parser.add_argument("--target-accuracy", type=float, default=0.8, help="Précision cible (par défaut: 0.8)")
+    parser.add_argument("--eval-every", type=int, default=5, help="Nombre de classifications entre deux évaluations (par défaut: 5)")
+    parser.add_argument("--batch-size", type=int, default=10, help="Taille des lots de la stratégie batch (par défaut: 10)")
+    parser.add_argument("--initial-labels", type=int, default=5, help="Œuvres tirées au hasard avant d'appliquer la stratégie (par défaut: 5 ; à 0, les stratégies active et batch sont déterministes et ne sont simulées qu'une fois)")
+    parser.add_argument("--seed-mode", type=str, default="exact", choices=["exact", "approximate"], help="Recherche de la paire initiale (par défaut: exact)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Nombre de processus (par défaut: nombre de CPU)")
+    parser.add_argument("--output", type=str, default="simulation_results.json", help="Fichier JSON des résultats (par défaut: simulation_results.json)")
+    
+    args = parser.parse_args()
+    
+    data_dir = os.path.abspath(args.data_dir)
+    features_path = os.path.join(data_dir, "features.npy")
+    artworks_path = os.path.join(data_dir, "artworks.csv")
+    for path in (features_path, artworks_path):
+        if not os.path.exists(path):
+            print(f"Erreur: Le fichier {path} n'existe pas.")
+            return 1
+    if args.label_column not in pd.read_csv(artworks_path, nrows=0).columns:
+        print(f"Erreur: La colonne {args.label_column} n'existe pas dans {artworks_path}.")
+        return 1
+    
+    # Sans tirage initial, une seule graine par stratégie déterministe
+    def seeds(strategy: str) -> int:
+        if args.initial_labels <= 0 and strategy in DETERMINISTIC_STRATEGIES:
+            return 1
+        return args.seeds
+    
+    tasks = [(features_path, artworks_path, args.label_column, strategy, seed, args.budget,
+              args.eval_every, args.batch_size, args.initial_labels, args.seed_mode)
+             for strategy in args.strategies for seed in range(seeds(strategy))]
+    print(f"{len(tasks)} simulations ({', '.join(f'{strategy} × {seeds(strategy)}' for strategy in args.strategies)} "
+          f"graines) sur {args.workers} processus")
+    
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        runs = list(executor.map(simulate, *zip(*tasks)))
+    print(f"Simulations terminées en {time.perf_counter() - started:.1f}s")
+    
+    summary = summarize(runs, args.target_accuracy)
+    for strategy, stats in summary.items():
+        labels = stats["labels_to_target_mean"]
+        print(f"{strategy:<8} cible atteinte {stats['reached_target']}/{stats['runs']}, "
+              f"classifications: {labels if labels is not None else '-'}, "
+              f"sélection p50: {stats['query_ms_p50']:.2f} ms, "
+              f"précision finale: {stats['final_accuracy_mean']:.3f}")
+    
+    results = {
+        "parameters": {key: value for key, value in vars(args).items() if key != "output"},
+        "summary": summary,
+        "runs": runs
+    }
+    tmp_path = args.output + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(results, f, indent=2)
+    os.replace(tmp_path, args.output)
+    
+    print(f"Résultats enregistrés dans: {args.output}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
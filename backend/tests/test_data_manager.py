@@ -0,0 +1,104 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import app.utils.data_manager as data_manager_module
+from app.utils.data_manager import ARTWORK_LOG_FILE, DataManager
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    pd.DataFrame({
+        "id": [0, 1, 2],
+        "title": ["a", "b", "c"],
+        "artist": ["x", "y", "z"],
+        "year": [1900, 1901, 1902],
+        "imagepath": ["a.jpg", "b.jpg", "c.jpg"]
+    }).to_csv(tmp_path / "artworks.csv", index=False)
+    np.save(tmp_path / "features.npy", np.eye(3, 4, dtype=np.float32))
+    return str(tmp_path)
+
+
+def new_artworks(count):
+    return [{"title": f"new{i}", "artist": "n", "year": 2000, "imagepath": f"new{i}.jpg"}
+            for i in range(count)]
+
+
+def log_contents(data_dir):
+    path = os.path.join(data_dir, ARTWORK_LOG_FILE)
+    if not os.path.exists(path):
+        return b""
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def test_add_artworks_with_features_persists_both(data_dir):
+    manager = DataManager(data_dir)
+    ids = manager.add_artworks_with_features(new_artworks(2), np.ones((2, 4)))
+    assert ids == [3, 4]
+    
+    reloaded = DataManager(data_dir)
+    assert len(reloaded.artwork_data) == 5
+    assert reloaded.feature_store.count == 5
+    np.testing.assert_array_equal(reloaded.get_features()[3:], np.ones((2, 4)))
+    assert reloaded.get_artwork_by_id(4)["title"] == "new1"
+
+
+def test_failed_log_write_rolls_back_features_and_log(data_dir, monkeypatch):
+    manager = DataManager(data_dir)
+    manager.add_artworks_with_features(new_artworks(1), np.ones((1, 4)))
+    log_before = log_contents(data_dir)
+    
+    def failing_fsync(fd):
+        raise OSError("disque plein")
+    monkeypatch.setattr(data_manager_module.os, "fsync", failing_fsync)
+    with pytest.raises(OSError):
+        manager.add_artworks_with_features(new_artworks(2), np.full((2, 4), 9.0))
+    monkeypatch.undo()
+    
+    assert manager.feature_store.count == len(manager.artwork_data) == 4
+    assert manager.get_features().shape == (4, 4)
+    assert log_contents(data_dir) == log_before
+    
+    # Les IDs ne sont pas consommés et le stockage est réutilisé au prochain ajout
+    assert manager.add_artworks_with_features(new_artworks(1), np.full((1, 4), 5.0)) == [4]
+    reloaded = DataManager(data_dir)
+    assert len(reloaded.artwork_data) == reloaded.feature_store.count == 5
+    np.testing.assert_array_equal(reloaded.get_features()[4], np.full(4, 5.0))
+
+
+def test_invalid_features_are_rejected_before_writing(data_dir):
+    manager = DataManager(data_dir)
+    with pytest.raises(ValueError):
+        manager.add_artworks_with_features(new_artworks(2), np.ones((1, 4)))
+    with pytest.raises(ValueError):
+        manager.add_artworks_with_features(new_artworks(1), np.ones((1, 5)))
+    assert manager.feature_store.count == len(manager.artwork_data) == 3
+    assert log_contents(data_dir) == b""
+
+
+def test_orphan_features_from_interrupted_add_are_dropped_on_load(data_dir):
+    manager = DataManager(data_dir)
+    manager.add_artworks_with_features(new_artworks(1), np.ones((1, 4)))
+    
+    # Interruption entre l'ajout des caractéristiques et l'écriture du journal
+    manager.append_features(np.ones((2, 4)))
+    
+    reloaded = DataManager(data_dir)
+    assert len(reloaded.artwork_data) == reloaded.feature_store.count == 4
+    assert reloaded.get_features().shape == (4, 4)
+
+
+def test_compaction_rewrites_csv_and_features(data_dir, monkeypatch):
+    monkeypatch.setattr(data_manager_module, "ARTWORK_LOG_COMPACT_MIN", 1)
+    manager = DataManager(data_dir)
+    manager.add_artworks_with_features(new_artworks(2), np.ones((2, 4)))
+    assert manager.maybe_compact_artwork_log()
+    assert not os.path.exists(os.path.join(data_dir, ARTWORK_LOG_FILE))
+    
+    assert len(pd.read_csv(os.path.join(data_dir, "artworks.csv"))) == 5
+    assert np.load(os.path.join(data_dir, "features.npy")).shape == (5, 4)
+    reloaded = DataManager(data_dir)
+    assert len(reloaded.artwork_data) == reloaded.feature_store.count == 5
@@ -0,0 +1,78 @@
+import json
+
+import numpy as np
+import pytest
+
+from app.utils.feature_store import FeatureStore
+
+
+@pytest.fixture
+def store_path(tmp_path):
+    return str(tmp_path / "features.store.npy")
+
+
+def test_append_and_reopen(store_path):
+    store = FeatureStore(store_path)
+    assert not store.exists()
+    assert store.append(np.ones((3, 4))) == 0
+    assert store.append(np.full((2, 4), 2.0)) == 3
+    
+    reopened = FeatureStore(store_path)
+    assert reopened.count == 5
+    assert reopened.dim == 4
+    np.testing.assert_array_equal(reopened.view()[3:], np.full((2, 4), 2.0))
+
+
+def test_capacity_doubles_without_losing_rows(store_path):
+    store = FeatureStore(store_path)
+    for value in range(10):
+        store.append(np.full((1, 2), value))
+    assert store.capacity >= 10
+    np.testing.assert_array_equal(FeatureStore(store_path).view()[:, 0], np.arange(10))
+
+
+def test_truncate_is_persisted(store_path):
+    store = FeatureStore(store_path)
+    store.append(np.arange(12, dtype=np.float32).reshape(4, 3))
+    store.truncate(2)
+    
+    reopened = FeatureStore(store_path)
+    assert reopened.count == 2
+    np.testing.assert_array_equal(reopened.view(), np.arange(6).reshape(2, 3))
+
+
+def test_append_after_truncate_overwrites_rows(store_path):
+    store = FeatureStore(store_path)
+    store.append(np.ones((4, 3)))
+    store.truncate(2)
+    store.append(np.full((1, 3), 7.0))
+    
+    reopened = FeatureStore(store_path)
+    assert reopened.count == 3
+    np.testing.assert_array_equal(reopened.view()[2], [7.0, 7.0, 7.0])
+    with open(store.meta_path) as f:
+        assert json.load(f) == {"count": 3, "dim": 3, "dtype": "float32"}
+
+
+def test_append_after_truncate_to_zero_accepts_new_dimension(store_path):
+    store = FeatureStore(store_path)
+    store.append(np.ones((2, 3)))
+    store.truncate(0)
+    store.append(np.ones((1, 5)))
+    
+    reopened = FeatureStore(store_path)
+    assert (reopened.count, reopened.dim) == (1, 5)
+    with open(store.meta_path) as f:
+        assert json.load(f)["dim"] == 5
+
+
+def test_invalid_truncate_and_dimension_are_rejected(store_path):
+    store = FeatureStore(store_path)
+    store.append(np.ones((2, 3)))
+    with pytest.raises(ValueError):
+        store.truncate(3)
+    with pytest.raises(ValueError):
+        store.truncate(-1)
+    with pytest.raises(ValueError):
+        store.append(np.ones((1, 4)))
+    assert FeatureStore(store_path).count == 2
@@ -0,0 +1,50 @@
+import json
+
+from app.utils.label_journal import LabelJournal
+
+
+def test_records_are_replayed_after_reopen(tmp_path):
+    path = str(tmp_path / "labels.journal.jsonl")
+    journal = LabelJournal(path)
+    assert journal.append(10, {"q": "a"}) == 1
+    assert journal.append(11, {"q": "b"}) == 2
+    assert journal.append(10, None) == 3
+    
+    reopened = LabelJournal(path)
+    assert len(reopened) == 3
+    assert [(r["seq"], r["artwork_id"], r["classification"]) for r in reopened.read_after(1)] == [
+        (2, 11, {"q": "b"}), (3, 10, None)]
+
+
+def test_truncated_last_line_is_dropped_and_not_merged_with_next_record(tmp_path):
+    path = str(tmp_path / "labels.journal.jsonl")
+    journal = LabelJournal(path)
+    journal.append(10, {"q": "a"})
+    journal.append(11, {"q": "b"})
+    
+    # Interruption pendant l'écriture de la troisième ligne
+    with open(path, "a") as f:
+        f.write('{"seq": 3, "artwork_id": 12, "classif')
+    
+    reopened = LabelJournal(path)
+    assert len(reopened) == 2
+    assert reopened.append(13, {"q": "c"}) == 3
+    
+    with open(path) as f:
+        records = [json.loads(line) for line in f]
+    assert [record["artwork_id"] for record in records] == [10, 11, 13]
+    assert [record["artwork_id"] for record in LabelJournal(path).read_after(0)] == [10, 11, 13]
+
+
+def test_compaction_keeps_records_after_snapshot(tmp_path):
+    path = str(tmp_path / "labels.journal.jsonl")
+    journal = LabelJournal(path)
+    for artwork_id in range(5):
+        journal.append(artwork_id, {"q": "a"})
+    journal.compact(3)
+    assert len(journal) == 2
+    
+    reopened = LabelJournal(path)
+    assert [record["seq"] for record in reopened.read_after(0)] == [4, 5]
+    assert reopened.snapshot_seq == 3
+    assert reopened.append(5, {"q": "b"}) == 6
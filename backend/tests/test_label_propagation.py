@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+from app.ml.label_propagation import KNNGraph, LabelPropagation
+
+
+@pytest.fixture
+def graph():
+    rng = np.random.default_rng(0)
+    centers = rng.normal(size=(3, 8))
+    features = (centers[rng.integers(0, 3, 200)] + 0.3 * rng.normal(size=(200, 8))).astype(np.float32)
+    graph = KNNGraph(k=8)
+    graph.extend(features)
+    return graph
+
+
+def assert_matches_solve(graph, propagation, classifications, atol):
+    reference = LabelPropagation(graph, tolerance=1e-8, max_iterations=2000)
+    reference.solve(classifications)
+    assert set(propagation.scores) == set(reference.scores)
+    for question, (answers, scores) in reference.scores.items():
+        updated_answers, updated_scores = propagation.scores[question]
+        columns = [updated_answers.index(answer) for answer in answers]
+        np.testing.assert_allclose(updated_scores[:, columns], scores, atol=atol)
+
+
+def test_incremental_updates_match_full_solve(graph):
+    propagation = LabelPropagation(graph, tolerance=1e-8, max_iterations=2000)
+    propagation.solve({})
+    
+    classifications = {}
+    rng = np.random.default_rng(1)
+    for row in rng.choice(graph.num_nodes, 15, replace=False).tolist():
+        classification = {"style": str(row % 3), "sujet": str(row % 2)}
+        propagation.update(row, None, classification)
+        classifications[row] = classification
+    assert_matches_solve(graph, propagation, classifications, atol=1e-5)
+
+
+def test_relabel_and_removal_match_full_solve(graph):
+    classifications = {0: {"style": "a"}, 5: {"style": "b"}, 9: {"style": "a"}}
+    propagation = LabelPropagation(graph, tolerance=1e-8, max_iterations=2000)
+    propagation.solve(classifications)
+    
+    propagation.update(5, classifications[5], {"style": "c"})
+    classifications[5] = {"style": "c"}
+    propagation.update(0, classifications.pop(0), None)
+    assert_matches_solve(graph, propagation, classifications, atol=1e-5)
+
+
+def test_update_labels_classified_row_with_loose_tolerance(graph):
+    propagation = LabelPropagation(graph, tolerance=1e-2)
+    propagation.solve({})
+    pushes = propagation.update(0, None, {"style": "a"})
+    assert 0 < pushes
+    labels, confidences = propagation.predict(np.array([0]))["style"]
+    assert labels == ["a"] and confidences[0] == pytest.approx(1.0)
@@ -4,7 +4,7 @@ import { useState, useEffect } from "react";
 import { Button } from "@/components/ui/button";
 import { Card, CardContent, CardDescription, CardFooter, CardHeader, CardTitle } from "@/components/ui/card";
 import { Loader2, Upload, Search, Filter, Image as ImageIcon } from "lucide-react";
-import { api, Artwork } from "@/services/api";
+import { api, Artwork, thumbnailUrl } from "@/services/api";
 import { toast } from "sonner";
 
 export default function DatasetPage() {
@@ -56,7 +56,7 @@ export default function DatasetPage() {
       setUploading(true);
       
       // TODO: Implémenter l'upload réel vers le backend
-      // const newArtwork = await api.uploadArtwork("Nouvelle œuvre", "Inconnu", new Date().getFullYear(), file);
+      // const newArtwork = await api.uploadArtworkAndWait("Nouvelle œuvre", "Inconnu", new Date().getFullYear(), file);
       
       // Simuler un délai pour l'instant
       await new Promise(resolve => setTimeout(resolve, 1500));
@@ -162,7 +162,7 @@ export default function DatasetPage() {
             <Card key={artwork.id} className="artwork-card">
               <div className="aspect-square overflow-hidden bg-secondary/30">
                 <img
-                  src={`http://localhost:8000/images/${artwork.imagepath}`}
+                  src={thumbnailUrl(artwork, 400)}
                   alt={artwork.title}
                   className="w-full h-full object-contain"
                 />
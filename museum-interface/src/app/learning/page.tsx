@@ -5,7 +5,7 @@ import { Button } from "@/components/ui/button";
 import { Card, CardContent, CardDescription, CardFooter, CardHeader, CardTitle } from "@/components/ui/card";
 import { Progress } from "@/components/ui/progress";
 import { ChevronLeft, Check, X, Info, HelpCircle, Loader2 } from "lucide-react";
-import { api, Artwork, Question, ModelStats } from "@/services/api";
+import { api, Artwork, Question, ModelStats, thumbnailUrl } from "@/services/api";
 import { toast } from "sonner";
 
 export default function LearningPage() {
@@ -240,7 +240,7 @@ export default function LearningPage() {
           <CardContent className="flex justify-center py-6">
             <div className="border rounded-lg overflow-hidden artwork-card">
               <img
-                src={`http://localhost:8000/images/${currentArtwork.imagepath}`}
+                src={thumbnailUrl(currentArtwork, 800)}
                 alt={currentArtwork.title}
                 className="w-full h-[400px] object-contain bg-secondary/30"
               />
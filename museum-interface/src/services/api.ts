@@ -6,6 +6,7 @@ import axios from 'axios';
 
 // Configuration de base
 const API_BASE_URL = 'http://localhost:8000/api';
+const IMAGES_BASE_URL = 'http://localhost:8000/images';
 
 // Création d'une instance axios
 const apiClient = axios.create({
@@ -22,6 +23,14 @@ export interface Artwork {
   artist: string;
   year: number;
   imagepath: string;
+  thumbnail_version?: string | null;
+}
+
+// URL d'une miniature ; la version de l'image permet au navigateur de la garder en cache
+export function thumbnailUrl(artwork: Artwork, width: 200 | 400 | 800): string {
+  const filename = artwork.imagepath.split('/').pop();
+  const version = artwork.thumbnail_version ? `?v=${artwork.thumbnail_version}` : '';
+  return `${IMAGES_BASE_URL}/${width}/${filename}${version}`;
 }
 
 export interface Question {
@@ -36,12 +45,33 @@ export interface Classification {
   classification: Record<string, string>;
 }
 
+export interface UploadJob {
+  job_id: string;
+  status: JobStatus;
+  title: string;
+  artist: string;
+  year: number;
+  imagepath: string;
+}
+
+export type JobStatus = 'pending' | 'running' | 'done' | 'failed';
+
+export interface Job<T> {
+  id: string;
+  status: JobStatus;
+  created_at: number;
+  finished_at: number | null;
+  result: T | null;
+  error: string | null;
+}
+
 export interface ModelStats {
   accuracy: number;
   classified_count: number;
   total_count: number;
   confidence_distribution: Record<string, number>;
   learning_curve: number[];
+  learning_curve_steps?: number[];
   class_distribution?: Record<string, number>;
 }
 
@@ -84,7 +114,8 @@ export const api = {
 
   // Récupération des statistiques du modèle
   async getModelStats(): Promise<ModelStats> {
-    const response = await apiClient.get('/model/stats');
+    // Courbe d'apprentissage réduite côté serveur à 200 points
+    const response = await apiClient.get('/model/stats', { params: { points: 200 } });
     return response.data;
   },
 
@@ -112,8 +143,9 @@ export const api = {
     return response.data;
   },
 
-  // Téléchargement d'une nouvelle œuvre d'art
-  async uploadArtwork(title: string, artist: string, year: number, image: File): Promise<Artwork> {
+  // Téléchargement d'une nouvelle œuvre d'art (traitée en arrière-plan : suivre la
+  // tâche retournée avec waitForJob pour obtenir l'œuvre ajoutée et son ID)
+  async uploadArtwork(title: string, artist: string, year: number, image: File): Promise<UploadJob> {
     const formData = new FormData();
     formData.append('title', title);
     formData.append('artist', artist);
@@ -128,4 +160,34 @@ export const api = {
 
     return response.data;
   },
+
+  // Récupération de l'état d'une tâche d'arrière-plan
+  async getJob<T>(jobId: string): Promise<Job<T>> {
+    const response = await apiClient.get(`/jobs/${jobId}`);
+    return response.data;
+  },
+
+  // Attente de la fin d'une tâche d'arrière-plan (son résultat, ou une erreur si elle a échoué)
+  async waitForJob<T>(jobId: string, intervalMs = 500, timeoutMs = 120000): Promise<T> {
+    const deadline = Date.now() + timeoutMs;
+    for (;;) {
+      const job = await api.getJob<T>(jobId);
+      if (job.status === 'done') {
+        return job.result as T;
+      }
+      if (job.status === 'failed') {
+        throw new Error(job.error || `La tâche ${jobId} a échoué`);
+      }
+      if (Date.now() >= deadline) {
+        throw new Error(`La tâche ${jobId} n'est pas terminée après ${timeoutMs} ms`);
+      }
+      await new Promise((resolve) => setTimeout(resolve, intervalMs));
+    }
+  },
+
+  // Téléchargement d'une nouvelle œuvre d'art, puis attente de son ajout
+  async uploadArtworkAndWait(title: string, artist: string, year: number, image: File): Promise<Artwork> {
+    const job = await api.uploadArtwork(title, artist, year, image);
+    return api.waitForJob<Artwork>(job.job_id);
+  },
 }; 
\ No newline at end of file